@@ -14,8 +14,14 @@ import sqlite3
 import threading
 import time
 import uuid
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    from core import queue_doorbell
+except ImportError:  # pragma: no cover
+    import queue_doorbell  # type: ignore
 
 _IP_PERMISSION_LEVELS = {
     "view": 1,
@@ -1176,6 +1182,136 @@ _JSON_COLUMNS = {
 }
 
 
+_TRACE_EVENT_INSERT_SQL = """
+    INSERT INTO trace_events
+    (id, event_type, session_id, workspace_id, ip_id, workflow, run_id,
+     stage_id, todo_id, message_id, llm_call_id, artifact_id,
+     actor_user_id, correlation_id, causation_id, idempotency_key,
+     worker_run_id, severity, attribution_confidence, missing_reason,
+     payload, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_LLM_CALL_INSERT_SQL = """
+    INSERT INTO llm_calls
+    (id, message_id, run_id, stage_id, todo_id, session_id, workspace_id,
+     ip_id, workflow, model, provider, base_url_hash, call_role, attempt,
+     tokens_input, tokens_output, tokens_reasoning, cache_read_tokens,
+     cache_write_tokens, cost_usd, latency_ms, status, error_type,
+     worker_run_id, attribution_confidence, missing_reason,
+     created_at, completed_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_QUEUE_INSERT_SQL = """
+    INSERT INTO session_queue
+    (id, session_id, direction, msg_type, payload, created_at, processed_at, delivered_at, expires_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+# ============================================================
+# Group commit
+# ============================================================
+
+def _group_commit_window_s() -> float:
+    """ATLAS_DB_GROUP_COMMIT_MS as seconds; 0 (the default) disables group commit."""
+    try:
+        return max(0.0, float(os.environ.get("ATLAS_DB_GROUP_COMMIT_MS", "0") or 0)) / 1000.0
+    except ValueError:
+        return 0.0
+
+
+class _GroupCommitter:
+    """Background committer for the hot single-row append paths of one DB file.
+
+    With per-statement commits every trace/llm_calls/queue INSERT pays its own
+    WAL fsync under the per-path lock, so 100 sessions writing a handful of
+    rows per turn queue up behind each other's fsyncs. Here writers hand the
+    INSERT to one thread that waits ``window_s`` for concurrent writers to
+    join, then runs the whole batch (consecutive identical statements via
+    ``executemany``) in ONE transaction. ``submit`` still blocks until the
+    row is committed, so callers keep read-your-write and durability; only
+    the fsync is shared. If the batch fails it is replayed row by row so a
+    bad row fails only its own writer.
+    """
+
+    def __init__(self, db: "AtlasDB", window_s: float, max_batch: int = 512):
+        self._db = db
+        self._window_s = window_s
+        self._max_batch = max_batch
+        self._cond = threading.Condition()
+        self._pending: List[list] = []
+        self.pid = os.getpid()
+        # (st_dev, st_ino) the committer's connection was opened on: a runtime
+        # DB that is unlinked and recreated must not keep receiving rows
+        # through a connection to the old inode.
+        self._file_id: Optional[tuple] = None
+        # Batches committed / rows written, for tests and benchmarks.
+        self.batches = 0
+        self.rows = 0
+        self._thread = threading.Thread(
+            target=self._run, name="atlas-db-group-commit", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, sql: str, parameters: tuple) -> None:
+        item = [sql, parameters, threading.Event(), None]
+        with self._cond:
+            self._pending.append(item)
+            self._cond.notify()
+        item[2].wait()
+        if item[3] is not None:
+            raise item[3]
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                if len(self._pending) < self._max_batch:
+                    self._cond.wait(self._window_s)
+                batch = self._pending[: self._max_batch]
+                del self._pending[: self._max_batch]
+            self._commit(batch)
+
+    def _commit(self, batch: List[list]) -> None:
+        db = self._db
+        try:
+            with db._lock:
+                try:
+                    st = os.stat(db.db_path)
+                    file_id = (st.st_dev, st.st_ino)
+                except OSError:
+                    file_id = None
+                if file_id != self._file_id:
+                    db.close()
+                    self._file_id = file_id
+                conn = db._connect()
+                try:
+                    start = 0
+                    while start < len(batch):
+                        end = start + 1
+                        while end < len(batch) and batch[end][0] == batch[start][0]:
+                            end += 1
+                        conn.executemany(batch[start][0], [item[1] for item in batch[start:end]])
+                        start = end
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+            self.batches += 1
+            self.rows += len(batch)
+        except Exception:
+            for item in batch:
+                try:
+                    db._execute(item[0], item[1])
+                except Exception as exc:  # noqa: BLE001 — surfaced to the writer
+                    item[3] = exc
+        for item in batch:
+            item[2].set()
+
+
 # ============================================================
 # AtlasDB
 # ============================================================
@@ -1233,6 +1369,10 @@ class AtlasDB:
     # iterated after the lock releases without colliding with another thread.
     _TLS = threading.local()
 
+    # One _GroupCommitter per db file, created on first use when
+    # ATLAS_DB_GROUP_COMMIT_MS > 0. Guarded by _LOCKS_GUARD.
+    _COMMITTERS_BY_PATH: Dict[str, "_GroupCommitter"] = {}
+
     def __init__(self, db_path: str = None, schema_set: str = "full"):
         """Open (and lazily initialize) a SQLite-backed AtlasDB.
 
@@ -1347,13 +1487,118 @@ class AtlasDB:
         return conn
 
     def _execute(self, sql: str, parameters: tuple = ()) -> sqlite3.Cursor:
-        """Execute SQL inside the lock."""
+        """Execute SQL inside the lock (committed unless inside transaction())."""
         with self._lock:
             conn = self._connect()
             cursor = conn.execute(sql, parameters)
-            conn.commit()
+            if not self._in_transaction():
+                conn.commit()
             return cursor
 
+    def _executemany(self, sql: str, rows: List[tuple]) -> None:
+        """executemany inside the lock: one statement, one commit for all rows."""
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connect()
+            if self._in_transaction():
+                conn.executemany(sql, rows)
+                return
+            try:
+                conn.executemany(sql, rows)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+    def _in_transaction(self) -> bool:
+        depths = getattr(type(self)._TLS, "tx_depth", None)
+        return bool(depths and depths.get(self.db_path))
+
+    @contextmanager
+    def transaction(self):
+        """Run every write in the block as ONE SQLite transaction (one commit).
+
+        Holds the per-path lock for the whole block and opens it with
+        ``BEGIN IMMEDIATE``. Writes through ``_execute`` (most single-row
+        methods, including record_trace_event / record_llm_call /
+        enqueue_message) and the bulk APIs join the transaction instead of
+        committing per statement. Nested blocks flatten into the outermost
+        one; an exception rolls everything back. Methods that issue their own
+        ``BEGIN IMMEDIATE`` (dequeue_message, the rollup folds) must not be
+        called inside the block.
+        """
+        with self._lock:
+            conn = self._connect()
+            tls = type(self)._TLS
+            depths = getattr(tls, "tx_depth", None)
+            if depths is None:
+                depths = tls.tx_depth = {}
+            depth = depths.get(self.db_path, 0)
+            if depth == 0:
+                if conn.in_transaction:
+                    conn.commit()
+                conn.execute("BEGIN IMMEDIATE")
+            depths[self.db_path] = depth + 1
+            try:
+                yield self
+            except BaseException:
+                depths[self.db_path] = depth
+                if depth == 0:
+                    conn.rollback()
+                    self._pending_rings().clear()
+                raise
+            depths[self.db_path] = depth
+            if depth == 0:
+                conn.commit()
+                rings = self._pending_rings()
+                pending = list(rings)
+                rings.clear()
+                for session_id, direction in pending:
+                    queue_doorbell.ring(self.db_path, session_id, direction)
+
+    def _pending_rings(self) -> Dict[tuple, None]:
+        """Queue doorbells deferred until this thread's transaction commits."""
+        tls = type(self)._TLS
+        by_path = getattr(tls, "pending_rings", None)
+        if by_path is None:
+            by_path = tls.pending_rings = {}
+        return by_path.setdefault(self.db_path, {})
+
+    def _ring(self, session_id: str, direction: str) -> None:
+        """Wake queue readers once the row is committed (see queue_doorbell)."""
+        if self._in_transaction():
+            self._pending_rings()[(session_id, direction)] = None
+        else:
+            queue_doorbell.ring(self.db_path, session_id, direction)
+
+    def _group_committer(self) -> Optional["_GroupCommitter"]:
+        """This file's group committer, or None when group commit is off."""
+        window_s = _group_commit_window_s()
+        if window_s <= 0 or self.db_path == ":memory:":
+            return None
+        key = AtlasDB._lock_key(self.db_path)
+        with AtlasDB._LOCKS_GUARD:
+            committer = AtlasDB._COMMITTERS_BY_PATH.get(key)
+            # A forked child inherits the dict but not the committer thread.
+            if committer is None or committer.pid != os.getpid():
+                committer = _GroupCommitter(AtlasDB(self.db_path, self._schema_set), window_s)
+                AtlasDB._COMMITTERS_BY_PATH[key] = committer
+            return committer
+
+    def _append(self, sql: str, parameters: tuple) -> None:
+        """Single-row INSERT on a hot append path; group-committed when enabled.
+
+        Falls back to a direct write inside transaction() or when this thread
+        already holds the path lock (the committer needs it to make progress).
+        """
+        committer = self._group_committer()
+        owned = getattr(self._lock, "_is_owned", None)
+        if committer is None or self._in_transaction() or (owned is not None and owned()):
+            self._execute(sql, parameters)
+        else:
+            committer.submit(sql, parameters)
+
     def _fetchone(self, sql: str, parameters: tuple = ()) -> Optional[sqlite3.Row]:
         """Fetch a single row inside the lock."""
         with self._lock:
@@ -4257,14 +4502,11 @@ class AtlasDB:
         msg_id = self._new_id()
         now = self._now()
         payload_json = self._dump_json(payload)
-        sql = """
-            INSERT INTO session_queue
-            (id, session_id, direction, msg_type, payload, created_at, processed_at, delivered_at, expires_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
+        sql = _QUEUE_INSERT_SQL
         params = (msg_id, session_id, direction, msg_type, payload_json, now, None, None, expires_at)
         if busy_timeout_ms is None:
-            self._execute(sql, params)
+            self._append(sql, params)
+            self._ring(session_id, direction)
             return msg_id
 
         with self._lock:
@@ -4278,8 +4520,30 @@ class AtlasDB:
             finally:
                 if prev_ms is not None:
                     conn.execute(f"PRAGMA busy_timeout={prev_ms}")
+        self._ring(session_id, direction)
         return msg_id
 
+    def enqueue_messages(self, messages: Iterable[Dict[str, Any]]) -> List[str]:
+        """Bulk enqueue_message: one executemany + one commit. Returns ids.
+
+        Each item holds ``session_id``, ``direction``, ``msg_type`` and
+        optionally ``payload`` / ``expires_at``. All rows share one created_at;
+        dequeue order within the batch follows rowid, i.e. list order.
+        """
+        now = self._now()
+        ids: List[str] = []
+        rows = []
+        for msg in messages:
+            ids.append(self._new_id())
+            rows.append((
+                ids[-1], msg["session_id"], msg["direction"], msg["msg_type"],
+                self._dump_json(msg.get("payload")), now, None, None, msg.get("expires_at"),
+            ))
+        self._executemany(_QUEUE_INSERT_SQL, rows)
+        for session_id, direction in dict.fromkeys((row[1], row[2]) for row in rows):
+            self._ring(session_id, direction)
+        return ids
+
     def dequeue_message(
         self,
         session_id: str,
@@ -4289,54 +4553,78 @@ class AtlasDB:
         """Blocking poll for the next unprocessed message in the given direction.
 
         Atomically marks the message as processed and returns it.
-        Retries until a message arrives or timeout expires.
+        Retries until a message arrives or timeout expires; between attempts
+        it sleeps on the queue doorbell, so an enqueue wakes it at once.
         """
         deadline = None
         if timeout is not None:
             deadline = self._now() + timeout
 
-        while True:
-            with self._lock:
-                conn = self._connect()
-                # Use IMMEDIATE to acquire the write lock early for atomicity
-                conn.execute("BEGIN IMMEDIATE")
-                try:
-                    # Strict total order: (created_at, rowid). created_at is
-                    # wall-clock time.time() (non-monotonic, tie-prone); the
-                    # monotonic per-file ``rowid`` is the collision-free
-                    # tiebreaker so two rows enqueued at an identical created_at
-                    # still dequeue lowest-rowid-first, never reordered/skipped
-                    # (plan §2.3 / R1).
-                    row = conn.execute(
-                        """
-                        SELECT rowid AS _rowid, * FROM session_queue
-                        WHERE session_id = ? AND direction = ? AND processed_at IS NULL
-                        ORDER BY created_at ASC, rowid ASC
-                        LIMIT 1
-                        """,
-                        (session_id, direction),
-                    ).fetchone()
-
-                    if row is not None:
-                        now = self._now()
-                        conn.execute(
-                            "UPDATE session_queue SET processed_at = ? WHERE id = ?",
-                            (now, row["id"]),
-                        )
-                        conn.commit()
-                        result = self._row_to_dict(row, "session_queue")
-                        result.pop("_rowid", None)
-                        result["processed_at"] = now
-                        return result
+        row = self._claim_next(session_id, direction)
+        if row is not None or timeout is not None and timeout <= 0:
+            return row
+        # Subscribe before the re-check below so no ring can be missed.
+        doorbell = queue_doorbell.listen() if self.db_path != ":memory:" else None
+        if doorbell is not None:
+            doorbell.subscribe(self.db_path, session_id, direction)
+        try:
+            while True:
+                row = self._claim_next(session_id, direction)
+                if row is not None:
+                    return row
+                if deadline is not None and self._now() >= deadline:
+                    return None
+                if doorbell is None:
+                    time.sleep(0.05)
+                    continue
+                wait = queue_doorbell.FALLBACK_POLL_S
+                if deadline is not None:
+                    wait = min(wait, max(deadline - self._now(), 0.0))
+                doorbell.wait(wait)
+        finally:
+            if doorbell is not None:
+                doorbell.close()
+
+    def _claim_next(self, session_id: str, direction: str) -> Optional[Dict[str, Any]]:
+        """One dequeue attempt: claim the oldest unprocessed row, or None."""
+        with self._lock:
+            conn = self._connect()
+            # Use IMMEDIATE to acquire the write lock early for atomicity
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Strict total order: (created_at, rowid). created_at is
+                # wall-clock time.time() (non-monotonic, tie-prone); the
+                # monotonic per-file ``rowid`` is the collision-free
+                # tiebreaker so two rows enqueued at an identical created_at
+                # still dequeue lowest-rowid-first, never reordered/skipped
+                # (plan §2.3 / R1).
+                row = conn.execute(
+                    """
+                    SELECT rowid AS _rowid, * FROM session_queue
+                    WHERE session_id = ? AND direction = ? AND processed_at IS NULL
+                    ORDER BY created_at ASC, rowid ASC
+                    LIMIT 1
+                    """,
+                    (session_id, direction),
+                ).fetchone()
 
+                if row is not None:
+                    now = self._now()
+                    conn.execute(
+                        "UPDATE session_queue SET processed_at = ? WHERE id = ?",
+                        (now, row["id"]),
+                    )
                     conn.commit()
-                except Exception:
-                    conn.rollback()
-                    raise
+                    result = self._row_to_dict(row, "session_queue")
+                    result.pop("_rowid", None)
+                    result["processed_at"] = now
+                    return result
 
-            if deadline is not None and self._now() >= deadline:
-                return None
-            time.sleep(0.05)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return None
 
     def poll_messages(
         self,
@@ -5974,45 +6262,140 @@ class AtlasDB:
                 return self._row_to_dict(existing, "trace_events")
 
         event_id = self._new_id()
-        now = created_at if created_at is not None else self._now()
-        confidence = _norm_attribution_confidence(attribution_confidence)
-        self._execute(
-            """
-            INSERT INTO trace_events
-            (id, event_type, session_id, workspace_id, ip_id, workflow, run_id,
-             stage_id, todo_id, message_id, llm_call_id, artifact_id,
-             actor_user_id, correlation_id, causation_id, idempotency_key,
-             worker_run_id, severity, attribution_confidence, missing_reason,
-             payload, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
+        self._append(
+            _TRACE_EVENT_INSERT_SQL,
+            self._trace_event_params(
                 event_id,
                 event_type,
-                session_id,
-                workspace_id,
-                ip_id,
-                workflow,
-                run_id,
-                stage_id,
-                todo_id,
-                message_id,
-                llm_call_id,
-                artifact_id,
-                actor_user_id,
-                correlation_id,
-                causation_id,
-                key or None,
-                worker_run_id,
-                severity,
-                confidence,
-                missing_reason,
-                self._dump_json(payload),
-                now,
+                payload=payload,
+                session_id=session_id,
+                workspace_id=workspace_id,
+                ip_id=ip_id,
+                workflow=workflow,
+                run_id=run_id,
+                stage_id=stage_id,
+                todo_id=todo_id,
+                message_id=message_id,
+                llm_call_id=llm_call_id,
+                artifact_id=artifact_id,
+                actor_user_id=actor_user_id,
+                correlation_id=correlation_id,
+                causation_id=causation_id,
+                idempotency_key=key,
+                created_at=created_at,
+                worker_run_id=worker_run_id,
+                severity=severity,
+                attribution_confidence=attribution_confidence,
+                missing_reason=missing_reason,
             ),
         )
         return self.list_trace_events(event_id=event_id)[0]
 
+    def _trace_event_params(
+        self,
+        event_id: str,
+        event_type: str,
+        payload: Any = None,
+        session_id: str = "",
+        workspace_id: str = "",
+        ip_id: str = "",
+        workflow: str = "",
+        run_id: str = "",
+        stage_id: str = "",
+        todo_id: str = "",
+        message_id: str = "",
+        llm_call_id: str = "",
+        artifact_id: str = "",
+        actor_user_id: str = "",
+        correlation_id: str = "",
+        causation_id: str = "",
+        idempotency_key: str = "",
+        created_at: float = None,
+        worker_run_id: str = "",
+        severity: str = "",
+        attribution_confidence: str = "",
+        missing_reason: str = "",
+    ) -> tuple:
+        """Row for _TRACE_EVENT_INSERT_SQL (shared by the single and bulk writers)."""
+        return (
+            event_id,
+            event_type,
+            session_id,
+            workspace_id,
+            ip_id,
+            workflow,
+            run_id,
+            stage_id,
+            todo_id,
+            message_id,
+            llm_call_id,
+            artifact_id,
+            actor_user_id,
+            correlation_id,
+            causation_id,
+            str(idempotency_key or "").strip() or None,
+            worker_run_id,
+            severity,
+            _norm_attribution_confidence(attribution_confidence),
+            missing_reason,
+            self._dump_json(payload),
+            created_at if created_at is not None else self._now(),
+        )
+
+    def record_trace_events(self, events: Iterable[Dict[str, Any]]) -> List[str]:
+        """Bulk record_trace_event: one executemany + one commit. Returns ids.
+
+        Each item holds record_trace_event keyword arguments. Room chat types
+        are still routed to the control DB, and an item whose idempotency_key
+        already exists (in the DB or earlier in the batch) is not re-inserted;
+        its slot in the result holds the existing event id.
+        """
+        events = list(events)
+        ids: List[Optional[str]] = [None] * len(events)
+        local = []
+        chat = []
+        control = self._control_db_for_chat() if any(
+            e.get("event_type") in _CONTROL_TRACE_EVENT_TYPES for e in events
+        ) else None
+        for i, event in enumerate(events):
+            if control is not None and event.get("event_type") in _CONTROL_TRACE_EVENT_TYPES:
+                chat.append(i)
+            else:
+                local.append(i)
+        if chat:
+            for i, event_id in zip(chat, control.record_trace_events([events[i] for i in chat])):
+                ids[i] = event_id
+        if not local:
+            return ids
+
+        with self._lock:
+            keys = {
+                str(events[i].get("idempotency_key") or "").strip() for i in local
+            } - {""}
+            seen: Dict[str, str] = {}
+            keys_list = sorted(keys)
+            for k in range(0, len(keys_list), 500):
+                chunk = keys_list[k:k + 500]
+                for row in self._fetchall(
+                    "SELECT id, idempotency_key FROM trace_events WHERE idempotency_key IN ("
+                    + ",".join("?" * len(chunk)) + ")",
+                    tuple(chunk),
+                ):
+                    seen[row["idempotency_key"]] = row["id"]
+            rows = []
+            for i in local:
+                key = str(events[i].get("idempotency_key") or "").strip()
+                if key and key in seen:
+                    ids[i] = seen[key]
+                    continue
+                event_id = self._new_id()
+                if key:
+                    seen[key] = event_id
+                rows.append(self._trace_event_params(event_id, **events[i]))
+                ids[i] = event_id
+            self._executemany(_TRACE_EVENT_INSERT_SQL, rows)
+        return ids
+
     def list_trace_events(
         self,
         event_id: str = None,
@@ -6268,6 +6651,73 @@ class AtlasDB:
         completed_at: float = None,
     ) -> Dict[str, Any]:
         call_id = self._new_id()
+        self._append(
+            _LLM_CALL_INSERT_SQL,
+            self._llm_call_params(
+                call_id,
+                session_id=session_id,
+                message_id=message_id,
+                run_id=run_id,
+                stage_id=stage_id,
+                todo_id=todo_id,
+                workspace_id=workspace_id,
+                ip_id=ip_id,
+                workflow=workflow,
+                model=model,
+                provider=provider,
+                base_url_hash=base_url_hash,
+                call_role=call_role,
+                attempt=attempt,
+                tokens_input=tokens_input,
+                tokens_output=tokens_output,
+                tokens_reasoning=tokens_reasoning,
+                cache_read_tokens=cache_read_tokens,
+                cache_write_tokens=cache_write_tokens,
+                cost_usd=cost_usd,
+                latency_ms=latency_ms,
+                status=status,
+                error_type=error_type,
+                worker_run_id=worker_run_id,
+                attribution_confidence=attribution_confidence,
+                missing_reason=missing_reason,
+                created_at=created_at,
+                completed_at=completed_at,
+            ),
+        )
+        return self.list_llm_calls(call_id=call_id)[0]
+
+    def _llm_call_params(
+        self,
+        call_id: str,
+        session_id: str = "",
+        message_id: str = "",
+        run_id: str = "",
+        stage_id: str = "",
+        todo_id: str = "",
+        workspace_id: str = "",
+        ip_id: str = "",
+        workflow: str = "",
+        model: str = "",
+        provider: str = "",
+        base_url_hash: str = "",
+        call_role: str = "primary",
+        attempt: int = 1,
+        tokens_input: int = 0,
+        tokens_output: int = 0,
+        tokens_reasoning: int = 0,
+        cache_read_tokens: int = 0,
+        cache_write_tokens: int = 0,
+        cost_usd: float = 0.0,
+        latency_ms: float = None,
+        status: str = "ok",
+        error_type: str = "",
+        worker_run_id: str = "",
+        attribution_confidence: str = "",
+        missing_reason: str = "",
+        created_at: float = None,
+        completed_at: float = None,
+    ) -> tuple:
+        """Row for _LLM_CALL_INSERT_SQL (shared by the single and bulk writers)."""
         now = self._now()
         created = created_at or now
         completed = completed_at if completed_at is not None else now
@@ -6275,49 +6725,49 @@ class AtlasDB:
         # an out-of-enum value fails loud here exactly like every other flow
         # write path (session_inputs / flow_events / rollups). Empty -> None.
         confidence = _norm_attribution_confidence(attribution_confidence)
-        self._execute(
-            """
-            INSERT INTO llm_calls
-            (id, message_id, run_id, stage_id, todo_id, session_id, workspace_id,
-             ip_id, workflow, model, provider, base_url_hash, call_role, attempt,
-             tokens_input, tokens_output, tokens_reasoning, cache_read_tokens,
-             cache_write_tokens, cost_usd, latency_ms, status, error_type,
-             worker_run_id, attribution_confidence, missing_reason,
-             created_at, completed_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                call_id,
-                message_id,
-                run_id,
-                stage_id,
-                todo_id,
-                session_id,
-                workspace_id,
-                ip_id,
-                workflow,
-                model,
-                provider,
-                base_url_hash,
-                call_role,
-                attempt,
-                tokens_input,
-                tokens_output,
-                tokens_reasoning,
-                cache_read_tokens,
-                cache_write_tokens,
-                cost_usd,
-                latency_ms,
-                status,
-                error_type,
-                worker_run_id,
-                confidence,
-                missing_reason,
-                created,
-                completed,
-            ),
-        )
-        return self.list_llm_calls(call_id=call_id)[0]
+        return (
+            call_id,
+            message_id,
+            run_id,
+            stage_id,
+            todo_id,
+            session_id,
+            workspace_id,
+            ip_id,
+            workflow,
+            model,
+            provider,
+            base_url_hash,
+            call_role,
+            attempt,
+            tokens_input,
+            tokens_output,
+            tokens_reasoning,
+            cache_read_tokens,
+            cache_write_tokens,
+            cost_usd,
+            latency_ms,
+            status,
+            error_type,
+            worker_run_id,
+            confidence,
+            missing_reason,
+            created,
+            completed,
+        )
+
+    def record_llm_calls(self, calls: Iterable[Dict[str, Any]]) -> List[str]:
+        """Bulk record_llm_call: one executemany + one commit. Returns ids.
+
+        Each item holds record_llm_call keyword arguments.
+        """
+        ids: List[str] = []
+        rows = []
+        for call in calls:
+            ids.append(self._new_id())
+            rows.append(self._llm_call_params(ids[-1], **call))
+        self._executemany(_LLM_CALL_INSERT_SQL, rows)
+        return ids
 
     def list_llm_calls(
         self,
@@ -13,6 +13,7 @@ import time
 import weakref
 from typing import Any, Callable, cast
 
+from core import queue_doorbell
 from core.session_process_manager import SessionProcessManager  # pyright: ignore[reportMissingImports]
 from core.session_worker_policy import SessionWorkerPolicy  # pyright: ignore[reportMissingImports]
 from core.session_names import normalize_session_name
@@ -195,6 +196,8 @@ class _SessionBridge:
         self._agent_lock = threading.Lock()
         self._agent_starter = None
         self._stop_flag = False
+        # Set by _MultiUserBridge: wakes next_event() after an outbox put.
+        self._on_emit: Callable[[], None] | None = None
         self.clients = weakref.WeakSet()
         self.created_at = time.time()
         self.last_active = time.time()
@@ -238,6 +241,8 @@ class _SessionBridge:
                     self._pending_ask_user.pop(flow_id, None)
         self.touch()
         self._outbox.put_nowait(msg)
+        if self._on_emit is not None:
+            self._on_emit()
 
     def pending_ask_user_events(self) -> list[dict[str, Any]]:
         with self._pending_ask_user_lock:
@@ -457,6 +462,14 @@ class _MultiUserBridge:
         # rate-limited to at most once per policy.reaper_interval_sec via this
         # monotonic stamp. Guarded by _sessions_lock when read/written.
         self._last_reap_at = 0.0
+        # next_event() sleeps on a queue doorbell (core.queue_doorbell): worker
+        # out-rows ring it with their session id, local emits poke it. Output
+        # is then polled only for the sessions that rang, plus a full sweep of
+        # every active runtime DB each FALLBACK_POLL_S.
+        self._event_doorbell: queue_doorbell.Listener | None = None
+        self._event_doorbell_lock = threading.Lock()
+        self._event_doorbell_tried = False
+        self._last_output_sweep = 0.0
         self._default_session = self._ensure_session("default")
 
     def _using_processes(self) -> bool:
@@ -539,18 +552,28 @@ class _MultiUserBridge:
         except Exception:
             pass
 
-    def _poll_process_outputs(self) -> None:
+    def _poll_process_outputs(self, only: set[str] | None = None) -> None:
+        """Deliver new worker out-rows to session outboxes.
+
+        ``only`` limits the poll to sessions whose doorbell rang (skipping the
+        zombie sweep); None polls every active session.
+        """
         manager = self._process_manager
         if manager is None:
             return
         dead_sessions: list[str] = []
-        cleanup = getattr(manager, "cleanup_zombies", None)
-        if callable(cleanup):
-            try:
-                dead_sessions = [str(session_id) for session_id in cleanup()]
-            except Exception:
-                dead_sessions = []
-        for session_id in list(dict.fromkeys([*manager.list_active(), *dead_sessions])):
+        if only is not None:
+            known = {*manager.list_active(), *self._process_output_cursors}
+            targets = [session_id for session_id in only if session_id in known]
+        else:
+            cleanup = getattr(manager, "cleanup_zombies", None)
+            if callable(cleanup):
+                try:
+                    dead_sessions = [str(session_id) for session_id in cleanup()]
+                except Exception:
+                    dead_sessions = []
+            targets = [*manager.list_active(), *dead_sessions]
+        for session_id in list(dict.fromkeys(targets)):
             since_id = self._process_output_cursors.get(session_id)
             saw_lifecycle_end = False
             try:
@@ -1323,6 +1346,9 @@ class _MultiUserBridge:
                 session = _SessionBridge(session_id)
                 if self._agent_starter is not None:
                     session.set_agent_starter(self._agent_starter)
+                doorbell = getattr(self, "_event_doorbell", None)
+                if doorbell is not None:
+                    session._on_emit = doorbell.poke
                 self._sessions[session_id] = session
             return session
 
@@ -1949,9 +1975,20 @@ class _MultiUserBridge:
 
         def _poll():
             deadline = time.monotonic() + max(float(timeout or 0), 0.0)
+            doorbell = self._next_event_doorbell()
+            rung: set[str] | None = None
             while True:
                 if self._process_manager is not None:
-                    self._poll_process_outputs()
+                    now = time.monotonic()
+                    if (
+                        doorbell is None
+                        or queue_doorbell.ALL in (rung or ())
+                        or now - self._last_output_sweep >= queue_doorbell.FALLBACK_POLL_S
+                    ):
+                        self._last_output_sweep = now
+                        self._poll_process_outputs()
+                    elif rung and rung - {""}:
+                        self._poll_process_outputs(only=rung - {""})
                     # Wave-3 C1: run the idle reaper here, on the next_event
                     # EXECUTOR thread (off the asyncio broadcaster loop), so a
                     # blocking graceful stop never stalls websocket fan-out.
@@ -1972,10 +2009,42 @@ class _MultiUserBridge:
                 remaining = deadline - time.monotonic()
                 if remaining <= 0:
                     return None, None
-                time.sleep(min(0.01, remaining))
+                if doorbell is None:
+                    time.sleep(min(0.01, remaining))
+                else:
+                    rung = doorbell.wait(remaining)
 
         return await loop.run_in_executor(None, _poll)
 
+    def _next_event_doorbell(self) -> queue_doorbell.Listener | None:
+        """The doorbell next_event() sleeps on, or None to keep 10ms polling.
+
+        Process mode needs a manager whose worker out-rows ring it (legacy /
+        test managers without ``rings_output_doorbell`` keep polling).
+        """
+        lock = getattr(self, "_event_doorbell_lock", None)
+        if lock is None:  # bridge assembled without __init__: keep polling
+            return None
+        with lock:
+            if self._event_doorbell_tried:
+                return self._event_doorbell
+            self._event_doorbell_tried = True
+            manager = self._process_manager
+            if manager is not None:
+                rings = getattr(manager, "rings_output_doorbell", None)
+                if not (callable(rings) and rings()):
+                    return None
+            doorbell = queue_doorbell.listen()
+            if doorbell is None:
+                return None
+            if manager is not None:
+                doorbell.subscribe_direction("out")
+            self._event_doorbell = doorbell
+        with self._sessions_lock:
+            for session in self._sessions.values():
+                session._on_emit = doorbell.poke
+        return doorbell
+
     @property
     def agent_running(self) -> bool:
         if self._process_manager is not None:
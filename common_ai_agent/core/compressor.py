@@ -23,6 +23,11 @@ import re as _re
 from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional
 
+try:
+    from core import token_counter
+except ImportError:  # pragma: no cover
+    import token_counter  # type: ignore
+
 
 class CompressionLLMError(RuntimeError):
     """Raised by ``compress_history`` (only when ``raise_on_llm_failure=True``)
@@ -50,9 +55,6 @@ _LLM_FAILURE_MARKERS = (
 _DATA_IMAGE_RE = _re.compile(
     r"data:image/[A-Za-z0-9.+-]+(?:;[A-Za-z0-9=.+-]+)*;base64,[A-Za-z0-9+/=\r\n]+"
 )
-# Mirrors Codex's fixed context estimate for resized prompt images. The raw
-# base64 payload is transport data, not model-visible text.
-_RESIZED_IMAGE_BYTES_ESTIMATE = 7373
 _IMAGE_TEXT_PLACEHOLDER = "[Image omitted from compression text]"
 
 
@@ -105,23 +107,7 @@ def _content_text(content: Any) -> str:
 def _content_estimate_tokens(content: Any) -> int:
     """Estimate model-visible tokens for text plus image blocks."""
 
-    if isinstance(content, str):
-        adjusted = len(content)
-        for match in _DATA_IMAGE_RE.finditer(content):
-            adjusted -= len(match.group(0))
-            adjusted += _RESIZED_IMAGE_BYTES_ESTIMATE
-        return max(0, adjusted // 4)
-    if isinstance(content, dict):
-        if str(content.get("type") or "") == "input_image":
-            return max(1, _RESIZED_IMAGE_BYTES_ESTIMATE // 4)
-        return sum(
-            _content_estimate_tokens(value)
-            for value in content.values()
-            if isinstance(value, (str, list, dict))
-        )
-    if isinstance(content, list):
-        return sum(_content_estimate_tokens(block) for block in content)
-    return len(str(content)) // 4 if content is not None else 0
+    return token_counter.count_content(content)
 
 
 def _content_blocks(content: Any) -> list[Any]:
@@ -325,22 +311,11 @@ def _hook_command(hook_path: Path) -> list:
 # ---------------------------------------------------------------------------
 
 def _default_estimate(message: Dict[str, Any]) -> int:
-    total_tokens = _content_estimate_tokens(message.get("content", ""))
-
     # Native tool-call assistant turns often have empty content; the actual
-    # tokens live in tool_calls (function name + serialized arguments). Without
-    # this, threshold checks fire late on tool-heavy sessions.
-    tcs = message.get("tool_calls")
-    if tcs and isinstance(tcs, list):
-        for tc in tcs:
-            if not isinstance(tc, dict):
-                continue
-            fn = tc.get("function", {}) if isinstance(tc.get("function"), dict) else {}
-            total_tokens += len(str(fn.get("name", ""))) // 4
-            args = fn.get("arguments", "")
-            total_tokens += (len(args) if isinstance(args, str) else len(str(args))) // 4
-
-    return total_tokens
+    # tokens live in tool_calls (function name + serialized arguments), which
+    # count_message includes. Without them, threshold checks fire late on
+    # tool-heavy sessions.
+    return token_counter.count_message(message)
 
 
 def _message_text(m: Dict[str, Any]) -> str:
@@ -1317,7 +1292,8 @@ def compress_history(
         quiet: Suppress informational prints.
         cfg: Config namespace (ENABLE_COMPRESSION, MAX_CONTEXT_TOKENS, etc.).
         llm_call_fn: Callable for LLM streaming (replaces chat_completion_stream).
-        estimate_tokens_fn: Per-message token estimator (falls back to char//4).
+        estimate_tokens_fn: Per-message token estimator (falls back to
+            core.token_counter).
         get_actual_tokens_fn: Returns total token count for all messages.
         last_input_tokens: Last actual token count from API (0 = unknown).
         on_compressed_fn: Called (no args) after compression completes.
@@ -14,6 +14,11 @@ from typing import Dict, Optional
 import os
 import sys
 
+try:
+    from core import token_counter
+except ImportError:  # pragma: no cover
+    import token_counter  # type: ignore
+
 # Emoji/special char support: disabled on Linux unless explicitly enabled
 _USE_EMOJI = sys.platform != 'linux' and os.environ.get('NO_EMOJI', '').lower() not in ('1', 'true', 'yes')
 
@@ -28,7 +33,8 @@ class ContextTracker:
     """
     Tracks token usage for all context components.
 
-    Uses 4 chars ≈ 1 token heuristic for estimation.
+    Estimates come from core.token_counter (cached per text, so updating
+    after each turn only counts the new messages).
     """
 
     def __init__(self, max_tokens: int = 200000):
@@ -52,16 +58,16 @@ class ContextTracker:
 
     def update_system_prompt(self, prompt: str):
         """Update system prompt token count (base only, excluding skill)"""
-        self.system_prompt_tokens = len(prompt) // 4 - self.skill_tokens
+        self.system_prompt_tokens = token_counter.count_text(prompt) - self.skill_tokens
 
     def update_skill(self, skill_name: Optional[str], skill_prompt: str):
         """Update active skill token count separately from system prompt"""
-        self.skill_tokens = len(skill_prompt) // 4 if skill_prompt else 0
+        self.skill_tokens = token_counter.count_text(skill_prompt) if skill_prompt else 0
         self.active_skill_name = skill_name
 
     def update_tools(self, tools_json: str):
         """Update tools definition token count"""
-        self.tools_tokens = len(tools_json) // 4
+        self.tools_tokens = token_counter.count_text(tools_json)
 
     def update_memory(self, memory_content: Dict[str, str]):
         """
@@ -70,8 +76,8 @@ class ContextTracker:
         Args:
             memory_content: Dict of {filename: content}
         """
-        total_chars = sum(len(content) for content in memory_content.values())
-        self.memory_tokens = total_chars // 4
+        self.memory_tokens = sum(token_counter.count_text(content)
+                                 for content in memory_content.values())
 
     def update_messages(self, messages: list, exclude_system: bool = True):
         """
@@ -84,8 +90,6 @@ class ContextTracker:
             messages: List of message dicts with "content" and optional "_tokens"
             exclude_system: If True, exclude system message (already counted in system_prompt)
         """
-        from llm_client import estimate_message_tokens
-
         if exclude_system:
             # Skip first message if it's system role
             msg_list = [m for m in messages if m.get("role") != "system"]
@@ -123,15 +127,13 @@ class ContextTracker:
                 else:
                     # Fallback if metadata doesn't have clear output count
                     # Estimate based on content
-                    content = str(msg.get("content", ""))
-                    msg_tokens = len(content) // 4
+                    msg_tokens = token_counter.count_message(msg)
                     total_tokens += msg_tokens
                     estimated_count += 1
             else:
                  # Fallback for user/system messages or assistant without metadata
                  # Estimate based on content
-                content = str(msg.get("content", ""))
-                msg_tokens = len(content) // 4
+                msg_tokens = token_counter.count_message(msg)
                 total_tokens += msg_tokens
                 estimated_count += 1
 
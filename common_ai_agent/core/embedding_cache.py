@@ -0,0 +1,241 @@
+"""
+Persistent, content-addressed embedding cache shared by every embedder.
+
+RAGDatabase (chunk indexing), GraphLite (notes, ``heal_embeddings``) and the
+memory graph all embed through ``llm_client.get_embedding(s)``, which checks
+this cache before calling the API. Re-indexing an unchanged file or re-adding
+a note therefore costs a SQLite lookup instead of a request.
+
+Entries are keyed by ``(model, dim, sha256(text))`` and stored as float32
+blobs in one SQLite file (``EMBEDDING_CACHE_PATH``; disabled with
+``RAG_ENABLE_PERSISTENT_CACHE=false``). Switching
+``EMBEDDING_MODEL`` simply stops matching the old model's rows; they stay
+usable if the model is switched back (so a switch back and forth costs no
+API calls), and ``rag_clear(purge_embedding_cache=True)`` drops the current
+model's rows via ``invalidate_model()``. When the file grows past ``EMBEDDING_CACHE_MAX_MB`` the least
+recently used rows are evicted.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+Vector = List[float]
+
+# After eviction the cache is trimmed to this fraction of max_bytes, so a
+# full cache does not evict on every insert.
+EVICT_TARGET_RATIO = 0.9
+
+# SQLite caps bound parameters per statement; stay well under it.
+_LOOKUP_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    dim INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    vec BLOB NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (model, dim, hash)
+);
+CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used);
+"""
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", errors="replace")).hexdigest()
+
+
+class EmbeddingCache:
+    """SQLite-backed ``(model, dim, sha256) -> float32 vector`` LRU cache."""
+
+    def __init__(self, path, max_bytes: int = 512 << 20):
+        self.path = Path(path).expanduser()
+        self.max_bytes = max(0, int(max_bytes))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._bytes: Optional[int] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            self._bytes = self._total_bytes(conn)
+        return self._conn
+
+    @staticmethod
+    def _total_bytes(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT COALESCE(SUM(LENGTH(vec)), 0) FROM embeddings").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ------------------------------------------------------------------ lookup
+
+    def get_many(self, model: str, texts: Sequence[str],
+                 dim: Optional[int] = None) -> List[Optional[Vector]]:
+        """Cached vectors for ``texts`` (None for misses), in input order.
+
+        ``dim=None`` accepts any stored dimension for the model; if a text
+        has rows at several dimensions, the most recently used one wins.
+        """
+        hashes = [text_hash(t) for t in texts]
+        found: Dict[str, Vector] = {}
+        now = time.time()
+        with self._lock:
+            conn = self._db()
+            unique = list(dict.fromkeys(hashes))
+            for i in range(0, len(unique), _LOOKUP_CHUNK):
+                part = unique[i:i + _LOOKUP_CHUNK]
+                marks = ",".join("?" * len(part))
+                sql = f"SELECT hash, vec FROM embeddings WHERE model = ? AND hash IN ({marks})"
+                params: list = [model, *part]
+                if dim:
+                    sql += " AND dim = ?"
+                    params.append(int(dim))
+                # Oldest first, so the newest row per hash is the one kept.
+                sql += " ORDER BY last_used ASC"
+                for h, blob in conn.execute(sql, params):
+                    vec = array("f")
+                    vec.frombytes(blob)
+                    found[h] = vec.tolist()
+            if found:
+                # Touch for LRU; rows of another dim for the same text are left alone.
+                conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND dim = ? AND hash = ?",
+                    [(now, model, len(v), h) for h, v in found.items()],
+                )
+                conn.commit()
+            hit = sum(1 for h in hashes if h in found)
+            self.hits += hit
+            self.misses += len(hashes) - hit
+        return [found.get(h) for h in hashes]
+
+    def get(self, model: str, text: str, dim: Optional[int] = None) -> Optional[Vector]:
+        return self.get_many(model, [text], dim=dim)[0]
+
+    # ------------------------------------------------------------------ store
+
+    def put_many(self, model: str, items: Sequence[Tuple[str, Vector]]):
+        """Store ``(text, vector)`` pairs for ``model``."""
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        for text, vector in items:
+            if not vector:
+                continue
+            rows.append((model, len(vector), text_hash(text),
+                         array("f", vector).tobytes(), now))
+        if not rows:
+            return
+        with self._lock:
+            conn = self._db()
+            for row in rows:
+                before = conn.total_changes
+                conn.execute(
+                    "INSERT OR IGNORE INTO embeddings (model, dim, hash, vec, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)", row)
+                if conn.total_changes != before:
+                    self._bytes += len(row[3])
+            conn.commit()
+            if self.max_bytes and self._bytes > self.max_bytes:
+                self._evict(conn)
+
+    def put(self, model: str, text: str, vector: Vector):
+        self.put_many(model, [(text, vector)])
+
+    def _evict(self, conn: sqlite3.Connection):
+        target = int(self.max_bytes * EVICT_TARGET_RATIO)
+        # Other processes share the file, so recount before trusting _bytes.
+        self._bytes = self._total_bytes(conn)
+        if self._bytes <= self.max_bytes:
+            return
+        victims = []
+        freed = 0
+        for rowid, size in conn.execute(
+                "SELECT rowid, LENGTH(vec) FROM embeddings ORDER BY last_used ASC"):
+            if self._bytes - freed <= target:
+                break
+            victims.append((rowid,))
+            freed += size
+        conn.executemany("DELETE FROM embeddings WHERE rowid = ?", victims)
+        conn.commit()
+        self._bytes -= freed
+        self.evictions += len(victims)
+
+    # ------------------------------------------------------------------ admin
+
+    def invalidate_model(self, model: str) -> int:
+        """Drop every entry for ``model``; other models are untouched."""
+        with self._lock:
+            conn = self._db()
+            cur = conn.execute("DELETE FROM embeddings WHERE model = ?", (model,))
+            conn.commit()
+            self._bytes = self._total_bytes(conn)
+            return cur.rowcount
+
+    def clear(self):
+        with self._lock:
+            conn = self._db()
+            conn.execute("DELETE FROM embeddings")
+            conn.commit()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            conn = self._db()
+            models = dict(conn.execute(
+                "SELECT model, COUNT(*) FROM embeddings GROUP BY model").fetchall())
+            lookups = self.hits + self.misses
+            return {
+                "path": str(self.path),
+                "entries": sum(models.values()),
+                "by_model": models,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+# ==================== Process-wide instance ====================
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Shared cache for this process, or None when disabled in config."""
+    global _cache
+    import config
+    if not getattr(config, "RAG_ENABLE_PERSISTENT_CACHE", True):
+        return None
+    path = Path(os.path.expanduser(getattr(config, "EMBEDDING_CACHE_PATH",
+                                           "~/.common_ai_agent/embedding_cache.db")))
+    max_bytes = int(getattr(config, "EMBEDDING_CACHE_MAX_MB", 512)) << 20
+    with _cache_lock:
+        if _cache is None or _cache.path != path:
+            if _cache is not None:
+                _cache.close()
+            _cache = EmbeddingCache(path, max_bytes=max_bytes)
+        _cache.max_bytes = max_bytes
+        return _cache
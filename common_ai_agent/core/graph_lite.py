@@ -644,6 +644,9 @@ Indices to link:"""
                      model: Optional[str] = None) -> List[float]:
         """
         Get embedding for text using centralized llm_client.
+        Backed by the persistent embedding cache shared with RAG
+        (core/embedding_cache.py), so re-adding a note or healing
+        unchanged nodes does not call the API again.
 
         Args:
             text: Text to embed
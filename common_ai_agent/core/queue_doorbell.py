@@ -0,0 +1,248 @@
+"""core/queue_doorbell.py — wake session_queue readers when a row commits.
+
+The SQLite ``session_queue`` stays the durable source of truth; this module
+only tells a blocked reader *when* to look, so readers can sleep instead of
+re-querying every 50 ms.
+
+Transport: Unix datagram sockets under one per-user directory
+(``ATLAS_QUEUE_DOORBELL_DIR``, default ``$TMPDIR/atlas-doorbell-<uid>``):
+
+  s/<name>            one bound socket per Listener
+  k/<digest>/<name>   "listener <name> subscribes to key <digest>"
+
+``ring(db_path, session_id, direction)`` runs after the enqueue commits and
+sends the session id to every subscriber of the exact
+(db, session, direction) key and of the direction-wide key, which is the
+multiplexed doorbell the web bridge listens on. Rings are best effort:
+
+  - a subscriber that is gone (ECONNREFUSED / ENOENT) is unsubscribed;
+  - a full receive queue (EAGAIN) means the listener is already awake; the
+    ringer drops an ``<name>.over`` marker so a multiplexed listener knows
+    a session id was lost and sweeps every session instead.
+
+A reader must subscribe *before* it checks the queue: a ring between that
+check and ``wait`` is buffered in the socket, so no wakeup is lost. Readers
+still re-check on a timeout (``FALLBACK_POLL_S``), which also covers
+platforms without AF_UNIX and ``ATLAS_QUEUE_DOORBELL=false``.
+"""
+from __future__ import annotations
+
+import hashlib
+import itertools
+import os
+import socket
+import tempfile
+import threading
+import weakref
+from pathlib import Path
+from typing import List, Optional, Set
+
+# Reported by Listener.wait when rings were dropped: re-check everything.
+ALL = "*"
+
+FALLBACK_POLL_S = max(
+    float(os.environ.get("ATLAS_QUEUE_FALLBACK_POLL_MS", "1000") or 1000) / 1000.0, 0.01
+)
+
+_names = itertools.count()
+_sender: Optional[socket.socket] = None
+_sender_pid = 0
+_sender_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    if not hasattr(socket, "AF_UNIX"):
+        return False
+    raw = os.environ.get("ATLAS_QUEUE_DOORBELL", "true").strip().lower()
+    return raw not in ("0", "false", "no", "off")
+
+
+def _root() -> Optional[Path]:
+    if not enabled():
+        return None
+    custom = os.environ.get("ATLAS_QUEUE_DOORBELL_DIR", "").strip()
+    if custom:
+        return Path(custom)
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return Path(tempfile.gettempdir()) / f"atlas-doorbell-{uid}"
+
+
+def _digest(key: str) -> str:
+    return hashlib.sha1(key.encode("utf-8", "surrogatepass")).hexdigest()[:20]
+
+
+def _db_key(db_path: str) -> str:
+    try:
+        return os.path.realpath(os.path.expanduser(str(db_path)))
+    except (OSError, ValueError):
+        return str(db_path)
+
+
+def _session_key(db_path: str, session_id: str, direction: str) -> str:
+    return f"{_db_key(db_path)}\0{session_id}\0{direction}"
+
+
+def _direction_key(direction: str) -> str:
+    return f"*\0{direction}"
+
+
+def _sender_socket() -> socket.socket:
+    global _sender, _sender_pid
+    with _sender_lock:
+        if _sender is None or _sender_pid != os.getpid():
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.setblocking(False)
+            _sender, _sender_pid = sock, os.getpid()
+        return _sender
+
+
+def _send(root: Path, name: str, payload: bytes) -> bool:
+    """Deliver one ring to listener *name*; False when it no longer exists."""
+    addr = str(root / "s" / name)
+    sock = _sender_socket()
+    try:
+        sock.sendto(payload, addr)
+    except BlockingIOError:
+        # Queue full: the listener has wakeups pending but this session id
+        # is lost. Leave a marker, then retry once in case it drained in
+        # between (so the marker is seen by a wakeup that is still to come).
+        try:
+            with open(addr + ".over", "a"):
+                pass
+            sock.sendto(payload, addr)
+        except OSError:
+            pass
+    except (ConnectionRefusedError, FileNotFoundError):
+        for stale in (addr, addr + ".over"):
+            try:
+                os.unlink(stale)
+            except OSError:
+                pass
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def ring(db_path: str, session_id: str, direction: str) -> None:
+    """Wake readers of (db_path, session_id, direction) and of the direction."""
+    if db_path == ":memory:":
+        return
+    root = _root()
+    if root is None:
+        return
+    payload = str(session_id).encode("utf-8", "surrogatepass")
+    for key in (_session_key(db_path, session_id, direction), _direction_key(direction)):
+        subs = root / "k" / _digest(key)
+        try:
+            entries = os.scandir(subs)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if not _send(root, entry.name, payload):
+                    try:
+                        os.unlink(entry.path)
+                    except OSError:
+                        pass
+
+
+def _cleanup(sock: socket.socket, paths: List[str]) -> None:
+    for path in paths:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    for path in paths[2:]:
+        try:
+            os.rmdir(os.path.dirname(path))  # last subscriber of the key
+        except OSError:
+            pass
+    sock.close()
+
+
+class Listener:
+    """One bound datagram socket, subscribed to any number of keys."""
+
+    def __init__(self, root: Path):
+        root.mkdir(parents=True, exist_ok=True, mode=0o700)
+        (root / "s").mkdir(exist_ok=True)
+        self._root = root
+        self.name = f"{os.getpid()}-{next(_names)}-{os.urandom(3).hex()}"
+        self._addr = str(root / "s" / self.name)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        # Socket, marker and subscription files, removed on close/collection.
+        self._paths = [self._addr, self._addr + ".over"]
+        try:
+            self._sock.bind(self._addr)
+        except OSError:
+            self._sock.close()
+            raise
+        self._finalizer = weakref.finalize(self, _cleanup, self._sock, self._paths)
+
+    def _subscribe_key(self, key: str) -> None:
+        subs = self._root / "k" / _digest(key)
+        path = str(subs / self.name)
+        for _ in range(3):  # a closing listener may rmdir the key in between
+            subs.mkdir(parents=True, exist_ok=True)
+            try:
+                with open(path, "a"):
+                    pass
+                break
+            except FileNotFoundError:
+                continue
+        self._paths.append(path)
+
+    def subscribe(self, db_path: str, session_id: str, direction: str) -> None:
+        self._subscribe_key(_session_key(db_path, session_id, direction))
+
+    def subscribe_direction(self, direction: str) -> None:
+        """Rings for every session in *direction*, on any database."""
+        self._subscribe_key(_direction_key(direction))
+
+    def poke(self) -> None:
+        """Wake this listener's wait() from another thread in-process."""
+        try:
+            _sender_socket().sendto(b"", self._addr)
+        except OSError:
+            pass
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        """Block until rung or *timeout*; the session ids that rang.
+
+        Empty on timeout; a poke shows up as ``""``; ``ALL`` when rings
+        were dropped on a full queue.
+        """
+        self._sock.settimeout(None if timeout is None else max(float(timeout), 0.0))
+        try:
+            data = self._sock.recv(4096)
+        except (socket.timeout, BlockingIOError, InterruptedError):
+            return set()
+        rung = {data.decode("utf-8", "surrogatepass")}
+        self._sock.settimeout(0)
+        while True:
+            try:
+                data = self._sock.recv(4096)
+            except (BlockingIOError, InterruptedError):
+                break
+            rung.add(data.decode("utf-8", "surrogatepass"))
+        try:
+            os.unlink(self._addr + ".over")
+            rung.add(ALL)
+        except OSError:
+            pass
+        return rung
+
+    def close(self) -> None:
+        self._finalizer()
+
+
+def listen() -> Optional[Listener]:
+    """A new Listener, or None when the doorbell is unavailable here."""
+    root = _root()
+    if root is None:
+        return None
+    try:
+        return Listener(root)
+    except OSError:
+        return None
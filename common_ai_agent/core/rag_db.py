@@ -8,17 +8,33 @@ Features:
 - Hash-based incremental re-indexing
 - Semantic search via embeddings
 
-Storage: JSON files in ~/.rag/
+Storage: SQLite metadata + float32 embedding sidecar in ~/.rag/
+(see core/rag_store.py; legacy rag_index.json is migrated on first load)
 """
 import json
 import hashlib
 import re
 import os
+import time
 from dataclasses import dataclass, asdict, field
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Optional, Any, Tuple
 
+try:
+    from core.rag_vector_index import EmbeddingIndex
+    from core.rag_store import RAGSegmentStore
+    from core.rag_embed_pipeline import EmbeddingJournal, EmbeddingPipeline, TokenBucket
+    from core.rag_watch import InotifyWatcher, file_stat
+except ImportError:
+    from rag_vector_index import EmbeddingIndex
+    from rag_store import RAGSegmentStore
+    from rag_embed_pipeline import EmbeddingJournal, EmbeddingPipeline, TokenBucket
+    from rag_watch import InotifyWatcher, file_stat
+
+# Resume journal for an interrupted index_directory (see rag_embed_pipeline).
+EMBED_JOURNAL_FILE = "embed_progress.jsonl"
+
 
 @dataclass
 class Chunk:
@@ -83,7 +99,9 @@ class RAGDatabase:
         Initialize RAG Database.
         """
         self.rag_dir = Path(os.path.expanduser(rag_dir))
+        # Legacy single-file index; only read once to migrate into self.store.
         self.index_path = self.rag_dir / "rag_index.json"
+        self.store = RAGSegmentStore(self.rag_dir)
         
         # Config file location: use RAG_CONFIG_PATH if set, otherwise RAG_DIR/.ragconfig
         try:
@@ -99,9 +117,24 @@ class RAGDatabase:
         
         self.chunks: Dict[str, Chunk] = {}
         self.file_hashes: Dict[str, str] = {}
+        # (mtime_ns, size, inode) of each file when it was last hashed; a
+        # file whose stat still matches is not re-read by _smart_reindex.
+        self.file_stats: Dict[str, Tuple[int, int, int]] = {}
         self.categories: Dict[str, CategoryConfig] = {}
         self.known_acronyms: Dict[str, str] = {}  # Extracted from chunks
 
+        # Contiguous, pre-normalized embedding matrix used by search().
+        # Rebuilt lazily after any change to self.chunks. Chunks loaded from
+        # self.store keep embedding=None; their vectors go straight from the
+        # store's sidecar into the matrix on first search.
+        self._vector_index: Optional[EmbeddingIndex] = None
+        # Previous matrix, reused row-by-row on rebuild.
+        self._stale_vector_index: Optional[EmbeddingIndex] = None
+        # Created on first index_file/index_directory (needs config + rate limit).
+        self._embed_pipeline: Optional[EmbeddingPipeline] = None
+        # inotify watcher (RAG_WATCH_FILES); False once found unavailable.
+        self._watcher = None
+
         # Rate limiting settings (load from config, convert ms to seconds)
         self.api_call_count = 0
         self.last_api_call_time = 0
@@ -141,6 +174,8 @@ class RAGDatabase:
             if chunk.embedding and len(chunk.embedding) > 0:
                 stored_dim = len(chunk.embedding)
                 break
+        if stored_dim == 0 and self.store.exists():
+            stored_dim = self.store.embedding_dimension()
         
         if stored_dim == 0:
             return
@@ -167,37 +202,35 @@ class RAGDatabase:
                         def action(s): return s
                         @staticmethod
                         def success(s): return s
-            import shutil
-            
             print(Color.warning(f"\n[RAG] ⚠️  Dimension Mismatch Detected!"))
             print(Color.warning(f"  Stored Index: {stored_dim} dimensions"))
             print(Color.warning(f"  Current Model: {current_dim} dimensions"))
-            print(Color.action(f"  🔄 Automatically resetting RAG database for compatibility..."))
-            
-            # Always reset in-memory state so the agent can continue safely.
-            self.chunks = {}
-            self.file_hashes = {}
-            self.categories = {}
-            
-            # Best-effort reset of on-disk storage. In restricted/sandboxed
-            # environments this may fail; we should not crash startup.
-            try:
-                if self.rag_dir.exists():
-                    shutil.rmtree(self.rag_dir)
-                self._ensure_initialized()
-                print(Color.success(f"  ✅ RAG database reset complete. Re-indexing will start automatically."))
-            except Exception as e:
-                print(Color.warning(f"  ⚠️  Failed to reset RAG directory '{self.rag_dir}': {e}"))
-                print(Color.warning("  Continuing with empty in-memory DB. Please delete/re-index manually if needed."))
+            print(Color.action(f"  🔄 Automatically resetting RAG index for compatibility..."))
+            self._reset_index()
+            print(Color.success(f"  ✅ RAG index reset complete. Re-indexing will start automatically."))
             print()
 
+    def _reset_index(self):
+        """Drop every chunk and file hash, keeping .ragconfig and the RAG dir.
+
+        Used when the stored vectors no longer match the embedding model.
+        Re-indexing goes through the shared embedding cache, which is keyed
+        by model, so switching back to a previous model costs no API calls.
+        """
+        # Reset in-memory state first so we can safely continue even if
+        # the on-disk reset fails in restricted environments.
+        self.chunks = {}
+        self.file_hashes = {}
+        self.file_stats = {}
+        self.categories = {}
+        self._invalidate_vector_index()
+        # Records the current model/dimension alongside the now-empty index.
+        self.save()
+
     def _ensure_initialized(self):
         """Create RAG directory and files if needed."""
         self.rag_dir.mkdir(parents=True, exist_ok=True)
         
-        if not self.index_path.exists():
-            self.index_path.write_text('{"chunks": {}, "file_hashes": {}}', encoding="utf-8")
-        
         # Create default .ragconfig if not exists
         if not self.config_file.exists():
             self._create_default_config()
@@ -1206,21 +1239,66 @@ Return ONLY valid JSON:
         Returns:
             Number of chunks created
         """
+        prepared = self._prepare_file(file_path, category, quiet=quiet)
+        if prepared is None:
+            return 0
+        new_chunks = prepared[3]
+
+        if new_chunks and not skip_embeddings:
+            total = len(new_chunks)
+            import sys
+
+            def progress(done, unique_total):
+                pct = int(done * 100 / unique_total) if unique_total else 100
+                sys.stderr.write(f"\r[RAG]   Embedding: {done}/{unique_total} ({pct}%)   ")
+                sys.stderr.flush()
+
+            texts = [self._embedding_text(chunk) for chunk in new_chunks]
+            # Committed right below, so no need to journal for resume.
+            embeddings = self._get_embed_pipeline().embed(texts, progress=progress, persist=False)
+            self._attach_embeddings(new_chunks, embeddings)
+
+            # Clear progress line and move to next
+            sys.stderr.write(f"\r[RAG]   Embedding: {total}/{total} (100%) ✅               \n")
+            sys.stderr.flush()
+
+        self._commit_file(*prepared)
+
+        if not quiet:
+            print(f"[RAG] Indexed: {Path(file_path).name} ({len(new_chunks)} chunks)")
+        return len(new_chunks)
+
+    def _prepare_file(self, file_path: str, category: str = None, quiet: bool = False):
+        """
+        Read and chunk a file whose hash changed.
+
+        Returns (rel_path, hash, abs_path, chunks, stat), or None when the
+        file is missing or unchanged. self.chunks is not touched until
+        _commit_file.
+        """
         path = Path(file_path)
-        if not path.exists():
+        # Stat before reading, so a write racing with us changes the stat
+        # we record and is picked up next time.
+        stat = file_stat(path)
+        if stat is None:
             if not quiet:
                 print(f"[RAG] File not found: {file_path}")
-            return 0
+            return None
 
-        # Check if reindex needed (hash comparison)
-        current_hash = self._get_file_hash(file_path)
+        # Check if reindex needed (stat first, then hash comparison)
         rel_path = self._to_relative_path(str(path.resolve()))
         stored_hash = self.file_hashes.get(rel_path)
+        if stored_hash is not None and self.file_stats.get(rel_path) == stat:
+            current_hash = stored_hash
+        else:
+            current_hash = self._get_file_hash(file_path)
 
         if current_hash == stored_hash:
+            # Touched but identical content: remember the new stat.
+            self.file_stats[rel_path] = stat
             if not quiet:
                 print(f"[RAG] Skipping (unchanged): {path.name}")
-            return 0
+            return None
         
         # Read content
         content = path.read_text(encoding='utf-8', errors='ignore')
@@ -1237,12 +1315,6 @@ Return ONLY valid JSON:
             else:
                 category = "verilog"  # Default
         
-        # Remove old chunks from this file (check both absolute and relative paths for compatibility)
-        old_chunks = [cid for cid, c in self.chunks.items() 
-                      if c.source_file == rel_path or c.source_file == str(path.resolve())]
-        for cid in old_chunks:
-            del self.chunks[cid]
-        
         # Chunk based on category (use relative path)
         if category in ["verilog"]:
             new_chunks = self.chunk_verilog_hierarchical(content, rel_path)
@@ -1252,166 +1324,166 @@ Return ONLY valid JSON:
             new_chunks = self.chunk_spec(content, rel_path)
         else:
             new_chunks = []
-        
-        # Generate embeddings for chunks (skip if requested)
-        if new_chunks and not skip_embeddings:
-            total = len(new_chunks)
-            import sys
-            import threading
-            from concurrent.futures import ThreadPoolExecutor, as_completed
-            
-            # Prepare texts for embedding with CONTEXT INJECTION
-            # Instead of raw content, we embed: 
-            # "[Section Title] - [Summary] \n\n [Content]"
-            # This ensures the vector allows semantic search on context even if the content is generic.
-            texts = []
-            for chunk in new_chunks:
-                context_prefix = ""
-                if "section_title" in chunk.metadata:
-                    context_prefix += f"{chunk.metadata['section_title']}"
-                if "summary" in chunk.metadata:
-                     if context_prefix: context_prefix += " - "
-                     context_prefix += f"{chunk.metadata['summary']}"
-                
-                # Create contextualized text
-                if context_prefix:
-                    full_text = f"[{context_prefix}]\n\n{chunk.content}"
-                else:
-                    full_text = chunk.content
-                
-                # Trust the upstream chunking (MAX_CHUNK_SIZE=1200) to keep us within limits.
-                # No artificial truncation.
-                texts.append(full_text)
-
-            embeddings = [None] * total
-            completed = [0]  # Use list to allow modification in closure
-            api_calls = [0]  # Track API calls in parallel
-            lock = threading.Lock()
-            
-            def embed_one(idx_text):
-                idx, text = idx_text
-                embedding = self._get_embedding(text)
-                with lock:
-                    api_calls[0] += 1
-                return idx, embedding
-            
-            # Parallel embedding with progress
-            with ThreadPoolExecutor(max_workers=10) as executor:
-                futures = {executor.submit(embed_one, (i, t)): i for i, t in enumerate(texts)}
-                
-                for future in as_completed(futures):
-                    idx, embedding = future.result()
-                    embeddings[idx] = embedding
-                    completed[0] += 1
-                    
-                    # Update progress (on same line)
-                    pct = int(completed[0] * 100 / total)
-                    sys.stderr.write(f"\r[RAG]   Embedding: {completed[0]}/{total} ({pct}%)   ")
-                    sys.stderr.flush()
-            
-            # Update API call count
-            self.api_call_count += api_calls[0]
-            
-            # Assign embeddings AND CLASSIFY chunks
-            # Parallelize classification for Spec files
-            spec_chunks_to_classify = []
-            spec_indices = []
-
-            for i, chunk in enumerate(new_chunks):
-                chunk.embedding = embeddings[i]
-                if chunk.category == "spec":
-                    spec_chunks_to_classify.append(chunk)
-                    spec_indices.append(i)
-            
-            if spec_chunks_to_classify:
-                # Parallel classification
-                total_spec = len(spec_chunks_to_classify)
-                completed_spec = [0]
-                
-                def classify_one(chunk):
-                    # Smart Optimization: Skip LLM for obvious types to speed up indexing
-                    # 1. Tables (detected by markdown parser)
-                    if chunk.metadata.get("has_table") or (chunk.chunk_type == "table"):
-                         return {
-                             "content_type": "table",
-                             "importance": "important",
-                             "confidence": 0.9,
-                             "reasoning": "Detected table structure in markdown",
-                             "classified_at": datetime.now().isoformat()
-                         }
-                    
-                    # 2. Code Blocks (likely examples)
-                    if chunk.chunk_type == "code_block":
-                         return {
-                             "content_type": "example",
-                             "importance": "important", 
-                             "confidence": 0.8,
-                             "reasoning": "Detected code block",
-                             "classified_at": datetime.now().isoformat()
-                         }
-
-                    # 3. Very short chunks or references
-                    if len(chunk.content) < 150:
-                        return self._fallback_classification(chunk)
-
-                    # 4. Try heuristic first
-                    heuristic = self._fallback_classification(chunk)
-                    if heuristic['confidence'] >= 0.8:
-                        heuristic['reasoning'] += " (High confidence match)"
-                        return heuristic
+        return rel_path, current_hash, str(path.resolve()), new_chunks, stat
 
-                    try:
-                        return self._classify_chunk_llm(chunk)
-                    except Exception:
-                        return heuristic
+    def _commit_file(self, rel_path: str, current_hash: str, abs_path: str, new_chunks: List[Chunk],
+                     stat: Optional[Tuple[int, int, int]] = None):
+        """Replace a file's chunks, record its hash and stat, and persist."""
+        # Remove old chunks from this file (check both absolute and relative paths for compatibility)
+        old_chunks = [cid for cid, c in self.chunks.items() 
+                      if c.source_file == rel_path or c.source_file == abs_path]
+        for cid in old_chunks:
+            del self.chunks[cid]
 
-                sys.stderr.write(f"\n[RAG]   Classifying {total_spec} spec chunks...\n")
-                
-                with ThreadPoolExecutor(max_workers=5) as executor:  # 5 workers to be safe with rate limits
-                    future_to_chunk = {executor.submit(classify_one, chunk): chunk for chunk in spec_chunks_to_classify}
-                    
-                    for future in as_completed(future_to_chunk):
-                        chunk = future_to_chunk[future]
-                        try:
-                            classification = future.result()
-                            chunk.metadata.update({
-                                "content_type": classification["content_type"],
-                                "importance": classification["importance"],
-                                "classification_confidence": classification.get("confidence", 0.5),
-                                "classified_at": classification.get("classified_at")
-                            })
-                        except Exception:
-                            pass # Should be handled by classify_one
-                        
-                        completed_spec[0] += 1
-                        pct = int(completed_spec[0] * 100 / total_spec)
-                        sys.stderr.write(f"\r[RAG]   Classifying: {completed_spec[0]}/{total_spec} ({pct}%)   ")
-                        sys.stderr.flush()
-
-                sys.stderr.write(f"\r[RAG]   Classifying: {total_spec}/{total_spec} (100%) ✅               \n")
-
-            for i, chunk in enumerate(new_chunks):
-                # Add to DB (embeddings and metadata already set)
-                self.chunks[chunk.id] = chunk
+        for chunk in new_chunks:
+            self.chunks[chunk.id] = chunk
 
-            
-            # Clear progress line and move to next
-            sys.stderr.write(f"\r[RAG]   Embedding: {total}/{total} (100%) ✅               \n")
-            sys.stderr.flush()
-        elif new_chunks:
-            # Skip embeddings - just add chunks without embeddings
-            for chunk in new_chunks:
-                self.chunks[chunk.id] = chunk
-        
         # Update hash (use relative path)
         self.file_hashes[rel_path] = current_hash
+        if stat is not None:
+            self.file_stats[rel_path] = stat
+        else:
+            self.file_stats.pop(rel_path, None)
+        if self._watcher:
+            self._watcher.watch([abs_path])
+        self._invalidate_vector_index()
 
         # Incremental save after each file (prevents data loss on Ctrl+C)
         self.save()
 
-        if not quiet:
-            print(f"[RAG] Indexed: {path.name} ({len(new_chunks)} chunks)")
-        return len(new_chunks)
+    @staticmethod
+    def _embedding_text(chunk: Chunk) -> str:
+        """
+        Text to embed for a chunk, with CONTEXT INJECTION.
+
+        Instead of raw content, we embed:
+        "[Section Title] - [Summary] \n\n [Content]"
+        This ensures the vector allows semantic search on context even if the content is generic.
+        """
+        context_prefix = ""
+        if "section_title" in chunk.metadata:
+            context_prefix += f"{chunk.metadata['section_title']}"
+        if "summary" in chunk.metadata:
+            if context_prefix: context_prefix += " - "
+            context_prefix += f"{chunk.metadata['summary']}"
+
+        # Trust the upstream chunking (MAX_CHUNK_SIZE=1200) to keep us within limits.
+        # No artificial truncation.
+        if context_prefix:
+            return f"[{context_prefix}]\n\n{chunk.content}"
+        return chunk.content
+
+    def _attach_embeddings(self, new_chunks: List[Chunk], embeddings: List[List[float]]):
+        """Assign embeddings AND CLASSIFY spec chunks."""
+        import sys
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        # Parallelize classification for Spec files
+        spec_chunks_to_classify = []
+
+        for i, chunk in enumerate(new_chunks):
+            chunk.embedding = embeddings[i]
+            if chunk.category == "spec":
+                spec_chunks_to_classify.append(chunk)
+
+        if not spec_chunks_to_classify:
+            return
+
+        # Parallel classification
+        total_spec = len(spec_chunks_to_classify)
+        completed_spec = [0]
+
+        def classify_one(chunk):
+            # Smart Optimization: Skip LLM for obvious types to speed up indexing
+            # 1. Tables (detected by markdown parser)
+            if chunk.metadata.get("has_table") or (chunk.chunk_type == "table"):
+                 return {
+                     "content_type": "table",
+                     "importance": "important",
+                     "confidence": 0.9,
+                     "reasoning": "Detected table structure in markdown",
+                     "classified_at": datetime.now().isoformat()
+                 }
+
+            # 2. Code Blocks (likely examples)
+            if chunk.chunk_type == "code_block":
+                 return {
+                     "content_type": "example",
+                     "importance": "important", 
+                     "confidence": 0.8,
+                     "reasoning": "Detected code block",
+                     "classified_at": datetime.now().isoformat()
+                 }
+
+            # 3. Very short chunks or references
+            if len(chunk.content) < 150:
+                return self._fallback_classification(chunk)
+
+            # 4. Try heuristic first
+            heuristic = self._fallback_classification(chunk)
+            if heuristic['confidence'] >= 0.8:
+                heuristic['reasoning'] += " (High confidence match)"
+                return heuristic
+
+            try:
+                return self._classify_chunk_llm(chunk)
+            except Exception:
+                return heuristic
+
+        sys.stderr.write(f"\n[RAG]   Classifying {total_spec} spec chunks...\n")
+
+        with ThreadPoolExecutor(max_workers=5) as executor:  # 5 workers to be safe with rate limits
+            future_to_chunk = {executor.submit(classify_one, chunk): chunk for chunk in spec_chunks_to_classify}
+
+            for future in as_completed(future_to_chunk):
+                chunk = future_to_chunk[future]
+                try:
+                    classification = future.result()
+                    chunk.metadata.update({
+                        "content_type": classification["content_type"],
+                        "importance": classification["importance"],
+                        "classification_confidence": classification.get("confidence", 0.5),
+                        "classified_at": classification.get("classified_at")
+                    })
+                except Exception:
+                    pass # Should be handled by classify_one
+
+                completed_spec[0] += 1
+                pct = int(completed_spec[0] * 100 / total_spec)
+                sys.stderr.write(f"\r[RAG]   Classifying: {completed_spec[0]}/{total_spec} ({pct}%)   ")
+                sys.stderr.flush()
+
+        sys.stderr.write(f"\r[RAG]   Classifying: {total_spec}/{total_spec} (100%) ✅               \n")
+
+    def _get_embed_pipeline(self) -> EmbeddingPipeline:
+        """Batched, rate-limited, resumable embedder shared by index_file/index_directory."""
+        if self._embed_pipeline is None:
+            import config
+            max_in_flight = max(1, int(getattr(config, "RAG_EMBEDDING_MAX_IN_FLIGHT", 4) or 1))
+            # RAG_RATE_LIMIT_DELAY_MS keeps its meaning (min spacing between
+            # API calls); it now paces batch requests instead of single texts.
+            # Burst capacity 1, so concurrent batches still start one delay apart.
+            import llm_client
+            rate = 1.0 / self.rate_limit_delay if self.rate_limit_delay > 0 else 0.0
+            self._embed_pipeline = EmbeddingPipeline(
+                embed_batch=self._embed_batch,
+                batch_size=getattr(config, "RAG_EMBEDDING_BATCH_SIZE", 50),
+                max_in_flight=max_in_flight,
+                bucket=TokenBucket(rate, capacity=1) if rate else None,
+                journal=EmbeddingJournal(self.rag_dir / EMBED_JOURNAL_FILE),
+                model=config.EMBEDDING_MODEL,
+                fallback=self._get_embedding,
+                on_close=llm_client.close_embedding_connections,
+            )
+        return self._embed_pipeline
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """One embeddings API request for many texts."""
+        import llm_client
+        vectors = llm_client.get_embeddings(texts)
+        with self._rate_lock:
+            self.api_call_count += 1
+        return vectors
 
     def index_directory(self, dir_path: str, patterns: List[str] = None,
                         category: str = None) -> int:
@@ -1505,41 +1577,67 @@ Return ONLY valid JSON:
             print(f"[RAG] No files found matching patterns")
             return 0
 
-        # Second pass: index files with progress
+        # Second pass: chunk changed files, then embed them in windows so
+        # batches span file boundaries (small files no longer mean tiny requests).
         print(f"[RAG] Indexing {len(all_files)} file(s)...")
         total_chunks = 0
+        pipeline = self._get_embed_pipeline()
+        window_target = pipeline.batch_size * pipeline.max_in_flight * 4
+        window: List[tuple] = []
+        window_chunks = 0
+        embedded = 0
+        started = time.perf_counter()
+
+        def flush_window():
+            nonlocal total_chunks, embedded
+            if not window:
+                return
+            texts = [self._embedding_text(c) for _, prepared in window for c in prepared[3]]
+            vectors = pipeline.embed(texts) if texts else []
+            embedded += len(texts)
+            offset = 0
+            for file_name, prepared in window:
+                new_chunks = prepared[3]
+                self._attach_embeddings(new_chunks, vectors[offset:offset + len(new_chunks)])
+                offset += len(new_chunks)
+                self._commit_file(*prepared)
+                total_chunks += len(new_chunks)
+                print(f"[RAG]   ✅ {file_name}: {len(new_chunks)} chunks", flush=True)
+            window.clear()
 
         for idx, file_path in enumerate(all_files, 1):
             file_name = Path(file_path).name
-
-            # Check if file needs reindexing
-            path = Path(file_path)
-            current_hash = self._get_file_hash(str(file_path))
-            rel_path = self._to_relative_path(str(path.resolve()))
-            stored_hash = self.file_hashes.get(rel_path)
-
-            if current_hash == stored_hash:
+            prepared = self._prepare_file(str(file_path), category, quiet=True)
+            if prepared is None:
                 # File unchanged - skip
                 print(f"[RAG] ({idx}/{len(all_files)}) Skipping {file_name}... ⏭️  (unchanged)", flush=True)
                 continue
 
-            print(f"[RAG] ({idx}/{len(all_files)}) Indexing {file_name}...", flush=True)
-
-            # Index the file with embeddings
-            chunks = self.index_file(str(file_path), category, quiet=True, skip_embeddings=False)
-            total_chunks += chunks
-
-            print(f"[RAG]   ✅ {chunks} chunks", flush=True)
+            print(f"[RAG] ({idx}/{len(all_files)}) Chunked {file_name} ({len(prepared[3])} chunks)", flush=True)
+            window.append((file_name, prepared))
+            window_chunks += len(prepared[3])
+            if window_chunks >= window_target:
+                flush_window()
+                window_chunks = 0
+        flush_window()
+
+        # Every file is committed to the store now; resume state is no longer needed.
+        pipeline.reset_journal()
+        # Release the worker threads and their keep-alive connections; a
+        # later index_file starts a fresh pool on demand.
+        pipeline.close()
+        elapsed = time.perf_counter() - started
+        rate = embedded / elapsed if elapsed > 0 else 0.0
 
         print(f"[RAG] ✅ Indexed {len(all_files)} file(s), {total_chunks} chunks created")
         print(f"[RAG]   📊 API calls: {self.api_call_count}")
+        print(f"[RAG]   ⚡ Throughput: {rate:.1f} chunks/s "
+              f"(batch={pipeline.batch_size}, in-flight={pipeline.max_in_flight})")
         print(f"[RAG]   ⏱️  Rate limit: {self.rate_limit_delay * 1000:.0f}ms between calls")
 
         self.save()
         return total_chunks
 
-
-
     def _extract_known_acronyms(self):
         """
         Scan chunks for "Term (Acronym)" patterns to populate known_acronyms.
@@ -1696,61 +1794,89 @@ Return ONLY valid JSON:
         else:
             allowed_categories = [c.strip() for c in categories.split(',')]
         
-        results = []
-
-        for chunk in self.chunks.values():
-            # Filter by category
-            if chunk.category not in allowed_categories:
-                continue
+        index = self._get_vector_index()
+        hits = index.search(
+            query_embedding,
+            allowed_categories,
+            limit=limit,
+            level=level,
+            preferred_type=intent["preferred_type"],
+            boost_factor=intent["boost_factor"],
+        )
+        return [(score, self.chunks[cid]) for score, cid in hits]
+
+    def _get_vector_index(self) -> EmbeddingIndex:
+        """Return the embedding matrix for the current chunks, building it if stale."""
+        if self._vector_index is None:
+            # Chunks loaded at startup carry no embedding; read theirs from
+            # the store's sidecar (skipping any the previous index still has)
+            # instead of attaching a float list to every chunk.
+            previous = self._stale_vector_index
+            known = previous._positions() if previous is not None else {}
+            missing = [cid for cid, c in self.chunks.items() if c.embedding is None and cid not in known]
+            vectors = self.store.load_embeddings(missing) if missing and self.store.exists() else {}
+            self._vector_index = EmbeddingIndex.build(self.chunks, vectors=vectors, previous=previous)
+            self._stale_vector_index = None
+        return self._vector_index
+
+    def _invalidate_vector_index(self):
+        """Mark the embedding matrix stale after self.chunks changed.
+
+        The old index is kept so the rebuild can reuse its normalized rows.
+        """
+        if self._vector_index is not None:
+            self._stale_vector_index = self._vector_index
+        self._vector_index = None
 
-            # Filter by level
-            if level is not None and chunk.level != level:
-                continue
+    def _smart_reindex(self):
+        """Check for file changes and reindex if needed.
 
-            # Calculate similarity (embedding is never None now)
-            try:
-                score = self._cosine_similarity(query_embedding, chunk.embedding)
-                
-                # CLASSIFICATION BOOSTING LOGIC
-                if score > 0.0:
-                    # 1. Content Type Boost
-                    # If query is seeking a definition and chunk IS a definition -> Boost
-                    if intent["preferred_type"] and chunk.metadata.get("content_type") == intent["preferred_type"]:
-                        score *= intent["boost_factor"]
-                    
-                    # 2. Importance Boost
-                    # Critical/Important chunks get a general boost
-                    importance = chunk.metadata.get("importance")
-                    if importance == "critical":
-                        score *= 1.3
-                    elif importance == "important":
-                        score *= 1.1
-
-                    # 3. Confidence Penalty
-                    # If classification was uncertain, trust it less
-                    conf = chunk.metadata.get("classification_confidence", 1.0)
-                    if conf < 0.7:
-                        score *= 0.9
-                    
-                    results.append((score, chunk))
-            except Exception:
+        Files are only hashed when their (mtime_ns, size, inode) differs from
+        the one recorded at index time. With RAG_WATCH_FILES the inotify
+        watcher narrows the check to files written since the last search.
+        """
+        stats_changed = False
+        for file_path in self._reindex_candidates():
+            stored_hash = self.file_hashes.get(file_path)
+            if stored_hash is None:
                 continue
-        
-        # Sort by score
-        results.sort(reverse=True, key=lambda x: x[0])
-        
-        return results[:limit]
-
-    def _smart_reindex(self):
-        """Check for file changes and reindex if needed."""
-        for file_path, stored_hash in list(self.file_hashes.items()):
             # Resolve relative path against project root
             abs_path = self.project_root / file_path
-            if abs_path.exists():
-                current_hash = self._get_file_hash(str(abs_path))
-                if current_hash != stored_hash:
-                    print(f"[RAG] Change detected: {Path(file_path).name}")
-                    self.index_file(str(abs_path))
+            stat = file_stat(abs_path)
+            if stat is None or stat == self.file_stats.get(file_path):
+                continue
+            current_hash = self._get_file_hash(str(abs_path))
+            if current_hash != stored_hash:
+                print(f"[RAG] Change detected: {Path(file_path).name}")
+                self.index_file(str(abs_path))
+            else:
+                self.file_stats[file_path] = stat
+                stats_changed = True
+        if stats_changed:
+            self.save()
+
+    def _reindex_candidates(self) -> List[str]:
+        """Indexed paths that may have changed since the last search."""
+        watcher = self._get_watcher()
+        changed = watcher.drain() if watcher else None
+        if changed is None:
+            return list(self.file_hashes)
+        return [self._to_relative_path(p) for p in changed]
+
+    def _get_watcher(self):
+        """Start the inotify watcher on first use when RAG_WATCH_FILES is set."""
+        if self._watcher is None:
+            import config
+            self._watcher = False
+            if getattr(config, "RAG_WATCH_FILES", False) and InotifyWatcher.supported():
+                try:
+                    watcher = InotifyWatcher()
+                except OSError as e:
+                    print(f"[RAG] File watcher unavailable ({e}); using stat checks")
+                else:
+                    watcher.watch(self.project_root / p for p in self.file_hashes)
+                    self._watcher = watcher
+        return self._watcher
 
     # ==================== Embedding (reuse from graph_lite) ====================
 
@@ -1867,30 +1993,43 @@ Return ONLY valid JSON:
     # ==================== Persistence ====================
 
     def save(self):
-        """Save RAG index to JSON file."""
+        """Persist new/removed chunks and file hashes to the segment store."""
         try:
             import config
-            data = {
-                "chunks": {cid: c.to_dict() for cid, c in self.chunks.items()},
-                "file_hashes": self.file_hashes,
-                "embedding_model": config.EMBEDDING_MODEL,
-                "embedding_dimension": config.EMBEDDING_DIMENSION or self.embedding_dimension
-            }
-            self.index_path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+            self.store.sync(
+                self.chunks,
+                self.file_hashes,
+                file_stats=self.file_stats,
+                embedding_model=config.EMBEDDING_MODEL,
+                embedding_dimension=config.EMBEDDING_DIMENSION or self.embedding_dimension,
+            )
         except Exception as e:
             print(f"[RAG] Save failed: {e}")
 
+    def _migrate_json_index(self):
+        """One-time import of a legacy rag_index.json into the segment store."""
+        data = json.loads(self.index_path.read_text(encoding="utf-8", errors="replace"))
+        chunks = {cid: Chunk.from_dict(cdata) for cid, cdata in data.get("chunks", {}).items()}
+        self.store.sync(
+            chunks,
+            data.get("file_hashes", {}),
+            embedding_model=data.get("embedding_model"),
+            embedding_dimension=data.get("embedding_dimension"),
+        )
+        self.index_path.replace(self.index_path.with_suffix(".json.migrated"))
+        print(f"[RAG] Migrated {len(chunks)} chunks from {self.index_path.name} to {self.store.db_path.name}")
+
     def _load(self):
-        """Load RAG index from JSON file."""
+        """Load chunk metadata from the segment store (embeddings stay on disk)."""
         try:
-            if not self.index_path.exists():
-                return
+            if not self.store.exists():
+                if not self.index_path.exists():
+                    return
+                self._migrate_json_index()
 
-            data = json.loads(self.index_path.read_text(encoding="utf-8", errors="replace"))
-            
             # Check for model compatibility BEFORE loading chunks
             import config
-            stored_model = data.get("embedding_model")
+            stored_model = self.store.get_meta().get("embedding_model")
             current_model = config.EMBEDDING_MODEL
             
             # Strict model name check
@@ -1908,55 +2047,22 @@ Return ONLY valid JSON:
                             def action(s): return s
                             @staticmethod
                             def success(s): return s
-                import shutil
-                import os
-                
                 print(Color.warning(f"\n[RAG] ⚠️  Embedding Model Mismatch Detected!"))
                 print(Color.warning(f"  Stored Index Model: {stored_model}"))
                 print(Color.warning(f"  Current Config Model: {current_model}"))
-                print(Color.action(f"  🔄 Automatically resetting RAG database for compatibility..."))
-                
-                # Backup config file if it exists
-                config_backup = None
-                if self.config_file.exists():
-                    try:
-                        config_backup = self.config_file.read_text(encoding="utf-8", errors="replace")
-                    except:
-                        pass
-
-                # Reset in-memory state first so we can safely continue even if
-                # the on-disk reset fails in restricted environments.
-                self.chunks = {}
-                self.file_hashes = {}
-                self.categories = {}
-
-                # Best-effort reset of on-disk storage.
-                try:
-                    if self.rag_dir.exists():
-                        shutil.rmtree(self.rag_dir)
-                    
-                    # Re-initialize empty DB
-                    self._ensure_initialized()
-                    
-                    # Restore config file
-                    if config_backup:
-                        try:
-                            self.config_file.write_text(config_backup, encoding="utf-8")
-                            print(Color.success(f"  ✅ Restored .ragconfig settings"))
-                        except Exception as e:
-                            print(Color.warning(f"  ⚠️  Failed to restore .ragconfig: {e}"))
-                except Exception as e:
-                    print(Color.warning(f"  ⚠️  Failed to reset RAG database '{self.rag_dir}': {e}"))
-                    print(Color.warning("  Continuing with empty in-memory DB. Please delete/re-index manually if needed."))
+                print(Color.action(f"  🔄 Re-indexing with {current_model} (cached embeddings for other models are kept)..."))
+                self._reset_index()
 
                 # Stop loading
                 return
 
             self.chunks = {
-                cid: Chunk.from_dict(cdata) 
-                for cid, cdata in data.get("chunks", {}).items()
+                cid: Chunk.from_dict(cdata)
+                for cid, cdata in self.store.load_chunks().items()
             }
-            self.file_hashes = data.get("file_hashes", {})
+            self.file_hashes = self.store.load_file_hashes()
+            self.file_stats = self.store.load_file_stats()
+            self._invalidate_vector_index()
             self._extract_known_acronyms()
             
         except Exception as e:
@@ -1964,11 +2070,15 @@ Return ONLY valid JSON:
             # If load fails, start fresh
             self.chunks = {}
             self.file_hashes = {}
+            self.file_stats = {}
+            self._invalidate_vector_index()
 
     def clear(self):
         """Clear all indexed data."""
         self.chunks.clear()
         self.file_hashes.clear()
+        self.file_stats.clear()
+        self._invalidate_vector_index()
         self.save()
         print("[RAG] Database cleared")
 
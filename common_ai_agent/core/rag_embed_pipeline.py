@@ -0,0 +1,247 @@
+"""
+Batched, concurrent embedding pipeline for RAG indexing.
+
+RAGDatabase.index_file / index_directory used to call _get_embedding once
+per chunk, each call serialized through _throttle(). This pipeline instead:
+
+- dedupes chunk texts by sha256 so identical chunks are embedded once
+- packs the remaining texts into batches (one embeddings request each)
+- keeps at most ``max_in_flight`` batches running, each gated by a
+  token bucket so the request rate stays under the provider limit
+- appends every finished batch to a JSONL journal keyed by content hash,
+  so an interrupted ``rag_index`` resumes without re-requesting vectors
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+Vector = List[float]
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", errors="replace")).hexdigest()
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens/second, burst of ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = float(rate)
+        self.capacity = max(float(capacity), 1.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until ``tokens`` are available, then take them."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class EmbeddingJournal:
+    """Append-only ``{"h": sha256, "m": model, "v": [...]}`` lines."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def load(self, model: str) -> Dict[str, Vector]:
+        vectors: Dict[str, Vector] = {}
+        if not self.path.exists():
+            return vectors
+        with open(self.path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn final line from an interrupted write
+                if rec.get("m") == model and rec.get("v"):
+                    vectors[rec["h"]] = rec["v"]
+        return vectors
+
+    def append(self, model: str, items: Dict[str, Vector]):
+        if not items:
+            return
+        lines = "".join(json.dumps({"h": h, "m": model, "v": v}) + "\n" for h, v in items.items())
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+                f.flush()
+
+    def clear(self):
+        with self._lock:
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+@dataclass
+class PipelineStats:
+    texts: int = 0
+    unique: int = 0
+    resumed: int = 0
+    requested: int = 0
+    batches: int = 0
+    failed_batches: int = 0
+    seconds: float = 0.0
+
+    @property
+    def chunks_per_sec(self) -> float:
+        return self.texts / self.seconds if self.seconds > 0 else 0.0
+
+
+class EmbeddingPipeline:
+    """Embed many texts with batching, dedupe, bounded concurrency and resume.
+
+    Args:
+        embed_batch: ``texts -> vectors`` (one embeddings request)
+        batch_size: texts per request
+        max_in_flight: concurrent requests
+        bucket: request-rate limiter (None = unlimited)
+        journal: resume journal (None = no persistence)
+        model: journal key so a model switch never reuses stale vectors
+        fallback: ``text -> vector`` used per text when a batch fails
+    """
+
+    def __init__(self, embed_batch: Callable[[List[str]], List[Vector]],
+                 batch_size: int = 50, max_in_flight: int = 4,
+                 bucket: Optional[TokenBucket] = None,
+                 journal: Optional[EmbeddingJournal] = None,
+                 model: str = "",
+                 fallback: Optional[Callable[[str], Vector]] = None,
+                 on_close: Optional[Callable[[], None]] = None):
+        self.embed_batch = embed_batch
+        self.batch_size = max(1, int(batch_size))
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.bucket = bucket
+        self.journal = journal
+        self.model = model
+        self.fallback = fallback
+        self.on_close = on_close
+        # One long-lived pool, so worker threads (and whatever keep-alive
+        # connections embed_batch keeps per thread) survive across embed()
+        # calls. Created lazily, released by close().
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._resume: Optional[Dict[str, Vector]] = None
+        self.last_stats = PipelineStats()
+
+    def _resume_vectors(self) -> Dict[str, Vector]:
+        if self._resume is None:
+            self._resume = self.journal.load(self.model) if self.journal else {}
+        return self._resume
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_in_flight,
+                                                thread_name_prefix="rag-embed")
+            return self._pool
+
+    def close(self):
+        """Stop the worker threads and run ``on_close`` (e.g. drop connections)."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+        if self.on_close:
+            self.on_close()
+
+    def reset_journal(self):
+        """Forget resume state once the caller has durably stored the results."""
+        if self.journal:
+            self.journal.clear()
+        self._resume = {}
+
+    def _run_batch(self, hashes: List[str], texts: List[str], persist: bool) -> Dict[str, Vector]:
+        if self.bucket:
+            self.bucket.acquire()
+        vectors = self.embed_batch(texts)
+        if len(vectors) != len(texts):
+            raise ValueError(f"embed_batch returned {len(vectors)} vectors for {len(texts)} texts")
+        out = dict(zip(hashes, vectors))
+        if persist and self.journal:
+            self.journal.append(self.model, out)
+        return out
+
+    def embed(self, texts: Sequence[str],
+              progress: Optional[Callable[[int, int], None]] = None,
+              persist: bool = True) -> List[Vector]:
+        """Return one vector per input text, in input order.
+
+        ``persist=False`` still reuses journaled vectors but does not append,
+        for short one-off calls that are committed immediately.
+        """
+        start = time.perf_counter()
+        stats = PipelineStats(texts=len(texts))
+        hashes = [content_hash(t) for t in texts]
+        unique: Dict[str, str] = {}
+        for h, t in zip(hashes, texts):
+            unique.setdefault(h, t)
+        stats.unique = len(unique)
+
+        resume = self._resume_vectors()
+        done: Dict[str, Vector] = {h: resume[h] for h in unique if h in resume}
+        stats.resumed = len(done)
+        todo = [h for h in unique if h not in done]
+        stats.requested = len(todo)
+        batches = [todo[i:i + self.batch_size] for i in range(0, len(todo), self.batch_size)]
+        stats.batches = len(batches)
+
+        finished = len(done)
+        if progress:
+            progress(finished, len(unique))
+        if batches:
+            pool = self._executor()
+            futures = {pool.submit(self._run_batch, b, [unique[h] for h in b], persist): b for b in batches}
+            try:
+                self._collect(futures, done, unique, stats, finished, progress)
+            except BaseException:
+                # Ctrl+C or a hard failure: don't start queued batches;
+                # finished ones are already in the journal for resume.
+                for future in futures:
+                    future.cancel()
+                # Let the batches already running land in the journal
+                # before returning control (the pool outlives this call).
+                wait(futures)
+                raise
+
+        stats.seconds = time.perf_counter() - start
+        self.last_stats = stats
+        return [done[h] for h in hashes]
+
+    def _collect(self, futures, done, unique, stats, finished, progress):
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                done.update(future.result())
+            except Exception:
+                stats.failed_batches += 1
+                if self.fallback is None:
+                    raise
+                # Per-text fallback is not journaled: it may be a
+                # zero vector standing in for a failed request.
+                for h in batch:
+                    done[h] = self.fallback(unique[h])
+            finished += len(batch)
+            if progress:
+                progress(finished, len(unique))
@@ -0,0 +1,453 @@
+"""
+Segmented, append-only on-disk store for RAGDatabase.
+
+Replaces the single indented ``rag_index.json`` that was re-serialized on
+every ``save()`` and fully parsed at startup.
+
+Layout under ``rag_dir``:
+    rag_store.db        SQLite (WAL): chunk metadata (no embeddings),
+                        file hashes and stats, store meta (embedding model /
+                        dimension)
+    rag_embeddings.f32  append-only float32 sidecar; each chunk row records
+                        its byte offset and dimension (compaction rotates
+                        this to rag_embeddings.<gen>.f32, named in meta)
+
+``sync()`` diffs the in-memory chunk map against what is already persisted
+and only appends new chunks / deletes removed ones, so an incremental
+``index_file`` costs O(changed chunks) on disk. Deleted vectors leave
+garbage in the sidecar; once garbage exceeds ``COMPACT_GARBAGE_RATIO`` a
+background thread rewrites the sidecar with live vectors only.
+
+Several processes (session workers) may share one ``rag_dir``. Writers
+take a SQLite write transaction and re-read the active sidecar name before
+appending, so none of them appends to a sidecar another process has just
+compacted away.
+
+Loading is lazy: ``load_chunks()`` returns chunk metadata with
+``embedding=None``; vectors are read from the sidecar on first search via
+``load_embeddings()``.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from dataclasses import fields
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+STORE_DB = "rag_store.db"
+EMBEDDINGS_FILE = "rag_embeddings.f32"
+
+# Rewrite the sidecar once at least this fraction of it is dead vectors.
+COMPACT_GARBAGE_RATIO = 0.5
+# ...but never bother for tiny sidecars.
+COMPACT_MIN_BYTES = 1 << 20
+# Compaction output older than this with no commit is assumed abandoned.
+STALE_COMPACTION_S = 3600
+
+_FLOAT_BYTES = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    id TEXT PRIMARY KEY,
+    source_file TEXT NOT NULL,
+    data TEXT NOT NULL,
+    vec_offset INTEGER NOT NULL DEFAULT -1,
+    vec_dim INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_chunks_source ON chunks(source_file);
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path TEXT PRIMARY KEY,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS file_stats (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    inode INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class RAGSegmentStore:
+    """SQLite metadata + float32 embedding sidecar for one RAG directory."""
+
+    def __init__(self, rag_dir: Path):
+        self.rag_dir = Path(rag_dir)
+        self.db_path = self.rag_dir / STORE_DB
+        # Active sidecar; re-read from meta on connect (compaction rotates it).
+        self.vec_path = self.rag_dir / EMBEDDINGS_FILE
+        # Serializes sidecar appends against background compaction.
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._compactor: Optional[threading.Thread] = None
+        # Snapshot of what is already on disk, so sync() can diff cheaply.
+        self._persisted_ids: Optional[set] = None
+        self._persisted_hashes: Dict[str, str] = {}
+        self._persisted_stats: Dict[str, tuple] = {}
+
+    # ------------------------------------------------------------ connection
+
+    def exists(self) -> bool:
+        return self.db_path.exists()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.rag_dir.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            self._refresh_vec_path(conn)
+            self._remove_stray_sidecars()
+        return self._conn
+
+    def _refresh_vec_path(self, conn: sqlite3.Connection):
+        """Re-read the active sidecar name; another process may have compacted."""
+        row = conn.execute("SELECT value FROM meta WHERE key = 'embeddings_file'").fetchone()
+        self.vec_path = self.rag_dir / (json.loads(row[0]) if row else EMBEDDINGS_FILE)
+
+    def _remove_stray_sidecars(self):
+        """Delete sidecars left behind by a compaction that crashed or finished.
+
+        In-progress compaction output (``*.tmp``, possibly another process's)
+        is only removed once it is clearly abandoned.
+        """
+        for path in self.rag_dir.glob("rag_embeddings*.f32"):
+            if path != self.vec_path:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+        cutoff = time.time() - STALE_COMPACTION_S
+        for path in self.rag_dir.glob("rag_embeddings*.tmp"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                pass
+
+    def close(self):
+        """Wait for compaction and release the SQLite handle."""
+        self.wait_for_compaction()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._persisted_ids = None
+            self._persisted_hashes = {}
+            self._persisted_stats = {}
+
+    # ------------------------------------------------------------------ meta
+
+    def get_meta(self) -> Dict[str, Any]:
+        if not self.exists():
+            return {}
+        with self._lock:
+            rows = self._connect().execute("SELECT key, value FROM meta").fetchall()
+        return {k: json.loads(v) for k, v in rows}
+
+    def set_meta(self, **values):
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)",
+                [(k, json.dumps(v)) for k, v in values.items()],
+            )
+            conn.commit()
+
+    # ------------------------------------------------------------------ load
+
+    def load_chunks(self) -> Dict[str, Dict[str, Any]]:
+        """Return ``{chunk_id: chunk_dict}`` without embeddings."""
+        with self._lock:
+            rows = self._connect().execute("SELECT id, data FROM chunks ORDER BY rowid").fetchall()
+            self._persisted_ids = {cid for cid, _ in rows}
+        chunks = {}
+        for cid, data in rows:
+            d = json.loads(data)
+            d["embedding"] = None
+            chunks[cid] = d
+        return chunks
+
+    def load_file_hashes(self) -> Dict[str, str]:
+        with self._lock:
+            rows = self._connect().execute("SELECT path, hash FROM file_hashes").fetchall()
+        self._persisted_hashes = dict(rows)
+        return dict(rows)
+
+    def load_file_stats(self) -> Dict[str, tuple]:
+        """``{path: (mtime_ns, size, inode)}`` recorded when each file was hashed."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT path, mtime_ns, size, inode FROM file_stats").fetchall()
+        self._persisted_stats = {p: (m, s, i) for p, m, s, i in rows}
+        return dict(self._persisted_stats)
+
+    def embedding_dimension(self) -> int:
+        """Dimension of the first stored vector (0 when none)."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT vec_dim FROM chunks WHERE vec_dim > 0 LIMIT 1"
+            ).fetchone()
+        return int(row[0]) if row else 0
+
+    def load_embeddings(self, ids: Optional[Iterable[str]] = None) -> Dict[str, array]:
+        """Read stored vectors as ``{chunk_id: array('f')}``.
+
+        Reads the sidecar once and slices it, which is much cheaper than the
+        per-chunk JSON float lists the old format parsed at startup.
+        """
+        with self._lock:
+            conn = self._connect()
+            for attempt in range(3):
+                # One read transaction: offsets and the sidecar pointer come
+                # from the same snapshot even if another process compacts.
+                conn.execute("BEGIN")
+                try:
+                    self._refresh_vec_path(conn)
+                    rows = conn.execute(
+                        "SELECT id, vec_offset, vec_dim FROM chunks WHERE vec_offset >= 0"
+                    ).fetchall()
+                    if not rows:
+                        return {}
+                    blob = array("f")
+                    try:
+                        with open(self.vec_path, "rb") as f:
+                            blob.frombytes(f.read())
+                        break
+                    except FileNotFoundError:
+                        # Compacted and unlinked between snapshot and open.
+                        if attempt == 2:
+                            return {}
+                finally:
+                    conn.rollback()
+        wanted = set(ids) if ids is not None else None
+        out = {}
+        for cid, offset, dim in rows:
+            if wanted is not None and cid not in wanted:
+                continue
+            start = offset // _FLOAT_BYTES
+            vec = blob[start:start + dim]
+            if len(vec) == dim:
+                out[cid] = vec
+        return out
+
+    # ------------------------------------------------------------------ save
+
+    def sync(self, chunks: Dict[str, Any], file_hashes: Dict[str, str],
+             file_stats: Optional[Dict[str, tuple]] = None, **meta):
+        """Persist the delta between ``chunks`` and what is on disk.
+
+        New chunks get their embedding appended to the sidecar and a metadata
+        row; chunks no longer present are deleted (their vectors become
+        garbage until compaction). ``chunks`` maps id -> Chunk. ``file_stats``
+        (``{path: (mtime_ns, size, inode)}``) is diffed the same way as
+        ``file_hashes``; None leaves the stored stats alone.
+        """
+        with self._lock:
+            conn = self._connect()
+            # Write lock first, then re-read the sidecar pointer: another
+            # process may have compacted since we last looked.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                garbage = self._sync_locked(conn, chunks, file_hashes, file_stats, meta)
+            except BaseException:
+                conn.rollback()
+                raise
+
+        if garbage:
+            self._maybe_compact()
+
+    def _sync_locked(self, conn: sqlite3.Connection, chunks, file_hashes, file_stats, meta) -> int:
+        """Body of sync(); the caller holds the write transaction."""
+        self._refresh_vec_path(conn)
+        if self._persisted_ids is None:
+            self._persisted_ids = {r[0] for r in conn.execute("SELECT id FROM chunks")}
+            self._persisted_hashes = dict(conn.execute("SELECT path, hash FROM file_hashes"))
+            self._persisted_stats = {p: (m, s, i) for p, m, s, i in conn.execute(
+                "SELECT path, mtime_ns, size, inode FROM file_stats")}
+        current = set(chunks)
+        added = [cid for cid in chunks if cid not in self._persisted_ids]
+        removed = self._persisted_ids - current
+
+        garbage = 0
+        if removed:
+            removed_list = list(removed)
+            for i in range(0, len(removed_list), 500):
+                part = removed_list[i:i + 500]
+                marks = ",".join("?" * len(part))
+                row = conn.execute(
+                    f"SELECT COALESCE(SUM(vec_dim), 0) FROM chunks WHERE id IN ({marks})", part
+                ).fetchone()
+                garbage += int(row[0]) * _FLOAT_BYTES
+                conn.execute(f"DELETE FROM chunks WHERE id IN ({marks})", part)
+
+        rows = []
+        if added:
+            offset = self.vec_path.stat().st_size if self.vec_path.exists() else 0
+            buf = array("f")
+            for cid in added:
+                chunk = chunks[cid]
+                emb = chunk.embedding
+                # Avoid to_dict(): asdict() deep-copies the embedding list.
+                data = {f.name: getattr(chunk, f.name) for f in fields(chunk) if f.name != "embedding"}
+                if emb:
+                    rows.append((cid, chunk.source_file, json.dumps(data, ensure_ascii=False),
+                                 offset + len(buf) * _FLOAT_BYTES, len(emb)))
+                    buf.extend(emb)
+                else:
+                    rows.append((cid, chunk.source_file, json.dumps(data, ensure_ascii=False), -1, 0))
+            if buf:
+                with open(self.vec_path, "ab") as f:
+                    buf.tofile(f)
+                    f.flush()
+                    os.fsync(f.fileno())
+            conn.executemany(
+                "INSERT OR REPLACE INTO chunks(id, source_file, data, vec_offset, vec_dim) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+        stale_paths = [p for p in self._persisted_hashes if p not in file_hashes]
+        changed_hashes = [(p, h) for p, h in file_hashes.items() if self._persisted_hashes.get(p) != h]
+        if stale_paths:
+            conn.executemany("DELETE FROM file_hashes WHERE path = ?", [(p,) for p in stale_paths])
+        if changed_hashes:
+            conn.executemany("INSERT OR REPLACE INTO file_hashes(path, hash) VALUES (?, ?)", changed_hashes)
+        if file_stats is not None:
+            gone = [p for p in self._persisted_stats if p not in file_stats]
+            changed_stats = [(p, *st) for p, st in file_stats.items()
+                             if self._persisted_stats.get(p) != tuple(st)]
+            if gone:
+                conn.executemany("DELETE FROM file_stats WHERE path = ?", [(p,) for p in gone])
+            if changed_stats:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO file_stats(path, mtime_ns, size, inode) VALUES (?, ?, ?, ?)",
+                    changed_stats,
+                )
+
+        if garbage:
+            prev = conn.execute("SELECT value FROM meta WHERE key = 'garbage_bytes'").fetchone()
+            meta["garbage_bytes"] = (json.loads(prev[0]) if prev else 0) + garbage
+        if meta:
+            conn.executemany(
+                "INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)",
+                [(k, json.dumps(v)) for k, v in meta.items()],
+            )
+        conn.commit()
+        self._persisted_ids = current
+        self._persisted_hashes = dict(file_hashes)
+        if file_stats is not None:
+            self._persisted_stats = {p: tuple(st) for p, st in file_stats.items()}
+        return garbage
+
+    # ------------------------------------------------------------ compaction
+
+    def _maybe_compact(self):
+        meta = self.get_meta()
+        garbage = int(meta.get("garbage_bytes", 0) or 0)
+        size = self.vec_path.stat().st_size if self.vec_path.exists() else 0
+        if size < COMPACT_MIN_BYTES or garbage < size * COMPACT_GARBAGE_RATIO:
+            return
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self.compact, name="rag-store-compact", daemon=True)
+        self._compactor.start()
+
+    def wait_for_compaction(self, timeout: Optional[float] = None):
+        t = self._compactor
+        if t is not None and t.is_alive():
+            t.join(timeout)
+
+    def compact(self):
+        """Rewrite the sidecar with live vectors only and repoint offsets.
+
+        Live vectors are copied to a new generation file without holding the
+        lock, so saves and searches keep running. The lock and a write
+        transaction are taken only at the end, to copy vectors appended in
+        the meantime, commit the new offsets together with the
+        ``embeddings_file`` pointer, and swap. A crash at any point leaves
+        the DB referencing a complete sidecar; the unreferenced file is
+        removed afterwards (or on next open).
+        """
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN")
+            try:
+                self._refresh_vec_path(conn)
+                src_path = self.vec_path
+                rows = conn.execute(
+                    "SELECT id, vec_offset, vec_dim FROM chunks WHERE vec_offset >= 0 ORDER BY vec_offset"
+                ).fetchall()
+                row = conn.execute("SELECT value FROM meta WHERE key = 'embeddings_gen'").fetchone()
+            finally:
+                conn.rollback()
+        gen = (json.loads(row[0]) if row else 0) + 1
+        tmp_path = self.rag_dir / f"rag_embeddings.{gen}.{os.getpid()}.tmp"
+        new_path = self.rag_dir / f"rag_embeddings.{gen}.f32"
+
+        try:
+            with open(src_path, "rb") as src, open(tmp_path, "wb") as dst:
+                copied: Dict[str, tuple] = {}
+                new_offset = 0
+                for cid, offset, dim in rows:
+                    src.seek(offset)
+                    dst.write(src.read(dim * _FLOAT_BYTES))
+                    copied[cid] = (new_offset, offset, dim)
+                    new_offset += dim * _FLOAT_BYTES
+
+                with self._lock:
+                    conn = self._connect()
+                    conn.execute("BEGIN IMMEDIATE")
+                    try:
+                        self._refresh_vec_path(conn)
+                        if self.vec_path != src_path:
+                            # Another process compacted first; ours is stale.
+                            conn.rollback()
+                            return
+                        updates = []
+                        live_bytes = 0
+                        for cid, offset, dim in conn.execute(
+                            "SELECT id, vec_offset, vec_dim FROM chunks WHERE vec_offset >= 0 ORDER BY vec_offset"
+                        ).fetchall():
+                            prev = copied.get(cid)
+                            if prev is not None and prev[1:] == (offset, dim):
+                                updates.append((prev[0], cid))
+                            else:
+                                # Appended while we were copying.
+                                src.seek(offset)
+                                dst.write(src.read(dim * _FLOAT_BYTES))
+                                updates.append((new_offset, cid))
+                                new_offset += dim * _FLOAT_BYTES
+                            live_bytes += dim * _FLOAT_BYTES
+                        dst.flush()
+                        os.fsync(dst.fileno())
+                        os.replace(tmp_path, new_path)
+                        conn.executemany("UPDATE chunks SET vec_offset = ? WHERE id = ?", updates)
+                        conn.executemany(
+                            "INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)",
+                            [("garbage_bytes", json.dumps(new_offset - live_bytes)),
+                             ("embeddings_gen", json.dumps(gen)),
+                             ("embeddings_file", json.dumps(new_path.name))],
+                        )
+                        conn.commit()
+                    except BaseException:
+                        conn.rollback()
+                        raise
+                    self.vec_path = new_path
+                    self._remove_stray_sidecars()
+        finally:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
@@ -0,0 +1,253 @@
+"""
+Contiguous embedding index for RAGDatabase.search.
+
+Holds one L2-normalized float32 row per chunk so a query is a single
+matrix-vector product plus an argpartition top-k instead of a per-chunk
+pure-Python cosine loop. Category / level filters are cached boolean masks
+and the classification boosts (intent, importance, confidence) are applied
+as per-row vectors.
+
+NumPy is optional. Without it the index keeps pre-normalized ``array('f')``
+rows and scores them with a C-level ``sum(map(mul, ...))`` dot product, which
+still skips the per-chunk norm computation of the old loop.
+
+The index lives in memory only. Vectors are persisted once, in the
+segment store's float32 sidecar (core/rag_store.py); ``build()`` reads the
+ones not attached to chunks from there and reuses the already-normalized
+rows of the previous index for unchanged chunks, so a rebuild after
+``index_file`` costs an in-memory copy plus normalizing the new chunks.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+import operator
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover - numpy is optional
+    np = None  # type: ignore[assignment]
+
+
+# Same multipliers the per-chunk loop in RAGDatabase.search applied.
+IMPORTANCE_BOOST = {"critical": 1.3, "important": 1.1}
+LOW_CONFIDENCE_THRESHOLD = 0.7
+LOW_CONFIDENCE_PENALTY = 0.9
+
+
+def row_boost(metadata: Dict[str, Any]) -> float:
+    """Static (query-independent) score multiplier for one chunk."""
+    boost = IMPORTANCE_BOOST.get(metadata.get("importance"), 1.0)
+    try:
+        conf = float(metadata.get("classification_confidence", 1.0))
+    except (TypeError, ValueError):
+        conf = 1.0
+    if conf < LOW_CONFIDENCE_THRESHOLD:
+        boost *= LOW_CONFIDENCE_PENALTY
+    return boost
+
+
+def _normalize_py(vec: Sequence[float]) -> Optional[array]:
+    norm = math.sqrt(sum(v * v for v in vec))
+    if norm == 0:
+        return None
+    inv = 1.0 / norm
+    return array("f", (v * inv for v in vec))
+
+
+class EmbeddingIndex:
+    """Pre-normalized embedding rows plus per-row filter/boost columns."""
+
+    def __init__(self, ids: List[str], dim: int, rows: Any,
+                 valid: Sequence[bool], categories: Sequence[str],
+                 levels: Sequence[int], content_types: Sequence[Optional[str]],
+                 boosts: Sequence[float]):
+        self.ids = ids
+        self.dim = dim
+        self.size = len(ids)
+        # Interned codes keep the per-row columns compact and comparable as
+        # integer vectors.
+        self._category_codes: Dict[str, int] = {}
+        self._type_codes: Dict[Optional[str], int] = {None: 0}
+        cat_col = [self._category_codes.setdefault(c, len(self._category_codes)) for c in categories]
+        type_col = [self._type_codes.setdefault(t, len(self._type_codes)) for t in content_types]
+        self._mask_cache: Dict[Tuple[Tuple[str, ...], Optional[int]], Any] = {}
+        if np is not None:
+            self._rows = rows
+            self._valid = np.asarray(valid, dtype=bool)
+            self._cat = np.asarray(cat_col, dtype=np.int32)
+            self._level = np.asarray(levels, dtype=np.int32)
+            self._type = np.asarray(type_col, dtype=np.int32)
+            self._boost = np.asarray(boosts, dtype=np.float32)
+        else:
+            self._rows = rows
+            self._valid = list(valid)
+            self._cat = cat_col
+            self._level = list(levels)
+            self._type = type_col
+            self._boost = list(boosts)
+
+    # ------------------------------------------------------------------ build
+
+    @classmethod
+    def build(cls, chunks: Dict[str, Any],
+              vectors: Optional[Dict[str, Sequence[float]]] = None,
+              previous: Optional["EmbeddingIndex"] = None) -> "EmbeddingIndex":
+        """Build from ``RAGDatabase.chunks`` (id -> Chunk).
+
+        Args:
+            chunks: id -> Chunk
+            vectors: stored vectors for chunks whose ``embedding`` is None
+            previous: earlier index whose normalized rows are reused by id
+        """
+        vectors = vectors or {}
+        items = list(chunks.items())
+        ids = [cid for cid, _ in items]
+        prev_pos = previous._positions() if previous is not None else {}
+
+        raw: List[Optional[Sequence[float]]] = []
+        dims: Counter = Counter()
+        for cid, chunk in items:
+            if cid in prev_pos:
+                raw.append(None)
+                dims[previous.dim] += 1
+                continue
+            emb = chunk.embedding if chunk.embedding else vectors.get(cid)
+            raw.append(emb)
+            if emb is not None and len(emb):
+                dims[len(emb)] += 1
+        dim = dims.most_common(1)[0][0] if dims else 0
+        reuse = previous is not None and previous.dim == dim
+
+        if np is not None:
+            rows = np.zeros((len(items), max(dim, 1)), dtype=np.float32)
+            valid = np.zeros(len(items), dtype=bool)
+            fresh = np.zeros(len(items), dtype=bool)
+            dst, src = [], []
+            for i, (cid, _) in enumerate(items):
+                emb = raw[i]
+                if reuse and cid in prev_pos:
+                    dst.append(i)
+                    src.append(prev_pos[cid])
+                elif emb is not None and len(emb) == dim:
+                    rows[i] = emb
+                    fresh[i] = True
+            if dst:
+                rows[dst] = previous._rows[src]
+                valid[dst] = previous._valid[src]
+            norms = np.linalg.norm(rows[fresh], axis=1)
+            nonzero = norms > 0
+            norms[~nonzero] = 1.0
+            rows[fresh] /= norms[:, None]
+            valid[np.flatnonzero(fresh)[nonzero]] = True
+        else:
+            rows = []
+            valid = []
+            for i, (cid, _) in enumerate(items):
+                if reuse and cid in prev_pos:
+                    row = previous._rows[prev_pos[cid]]
+                else:
+                    emb = raw[i]
+                    row = _normalize_py(emb) if emb is not None and len(emb) == dim else None
+                rows.append(row)
+                valid.append(row is not None)
+        return cls._from_chunks(ids, dim, rows, valid, [c for _, c in items])
+
+    def _positions(self) -> Dict[str, int]:
+        return {cid: i for i, cid in enumerate(self.ids)}
+
+    @classmethod
+    def _from_chunks(cls, ids, dim, rows, valid, chunk_list) -> "EmbeddingIndex":
+        return cls(
+            ids=ids,
+            dim=dim,
+            rows=rows,
+            valid=valid,
+            categories=[c.category for c in chunk_list],
+            levels=[int(c.level or 0) for c in chunk_list],
+            content_types=[c.metadata.get("content_type") for c in chunk_list],
+            boosts=[row_boost(c.metadata) for c in chunk_list],
+        )
+
+    # ----------------------------------------------------------------- search
+
+    def _mask(self, categories: Sequence[str], level: Optional[int]):
+        key = (tuple(sorted(set(categories))), level)
+        cached = self._mask_cache.get(key)
+        if cached is not None:
+            return cached
+        codes = [self._category_codes[c] for c in key[0] if c in self._category_codes]
+        if np is not None:
+            mask = self._valid & np.isin(self._cat, codes)
+            if level is not None:
+                mask &= self._level == level
+        else:
+            code_set = set(codes)
+            mask = [
+                i for i in range(self.size)
+                if self._valid[i] and self._cat[i] in code_set
+                and (level is None or self._level[i] == level)
+            ]
+        self._mask_cache[key] = mask
+        return mask
+
+    def search(self, query: Sequence[float], categories: Sequence[str],
+               limit: int = 5, level: Optional[int] = None,
+               preferred_type: Optional[str] = None,
+               boost_factor: float = 1.0) -> List[Tuple[float, str]]:
+        """Return up to ``limit`` (score, chunk_id) pairs, best first.
+
+        Only rows with positive cosine similarity are returned, matching the
+        ``score > 0.0`` guard of the original loop.
+        """
+        if limit <= 0 or self.size == 0 or len(query) != self.dim:
+            return []
+        type_code = self._type_codes.get(preferred_type) if preferred_type else None
+        if np is not None:
+            return self._search_np(query, categories, limit, level, type_code, boost_factor)
+        return self._search_py(query, categories, limit, level, type_code, boost_factor)
+
+    def _search_np(self, query, categories, limit, level, type_code, boost_factor):
+        q = np.asarray(query, dtype=np.float32)
+        norm = float(np.linalg.norm(q))
+        if norm == 0:
+            return []
+        cand = np.flatnonzero(self._mask(categories, level))
+        if cand.size == 0:
+            return []
+        scores = self._rows[cand] @ (q / norm) if cand.size < self.size else self._rows @ (q / norm)
+        positive = scores > 0
+        cand, scores = cand[positive], scores[positive]
+        if cand.size == 0:
+            return []
+        scores = scores * self._boost[cand]
+        if type_code is not None:
+            scores = np.where(self._type[cand] == type_code, scores * boost_factor, scores)
+        if cand.size > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(cand.size)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(float(scores[i]), self.ids[cand[i]]) for i in top]
+
+    def _search_py(self, query, categories, limit, level, type_code, boost_factor):
+        q = _normalize_py(query)
+        if q is None:
+            return []
+        rows, boosts, types = self._rows, self._boost, self._type
+        mul = operator.mul
+
+        def scored():
+            for i in self._mask(categories, level):
+                score = sum(map(mul, rows[i], q))
+                if score > 0:
+                    score *= boosts[i]
+                    if type_code is not None and types[i] == type_code:
+                        score *= boost_factor
+                    yield score, -i
+
+        top = heapq.nlargest(limit, scored())
+        return [(score, self.ids[-neg_i]) for score, neg_i in top]
@@ -0,0 +1,160 @@
+"""
+Change detection for files indexed by RAGDatabase.
+
+``search()`` used to MD5 every indexed file before scoring. Files are now
+compared by ``file_stat()`` first -- ``(mtime_ns, size, inode)`` recorded at
+index time -- and only hashed when that differs.
+
+With ``RAG_WATCH_FILES=true`` on Linux, ``InotifyWatcher`` goes one step
+further: a daemon thread listens for inotify events on the directories of
+indexed files and queues the changed paths, so a search only looks at files
+that were actually written since the previous one. Uses ``ctypes`` against
+libc; no third-party dependency.
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+FileStat = Tuple[int, int, int]
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+
+_EVENT = struct.Struct("iIII")
+
+
+def file_stat(path) -> Optional[FileStat]:
+    """``(mtime_ns, size, inode)`` of ``path``, or None if it is gone."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class InotifyWatcher:
+    """Queue paths written under a set of watched directories.
+
+    ``drain()`` returns the absolute paths changed since the last call, or
+    None when the caller must rescan everything: on the first call (changes
+    made while nobody was watching) and after the kernel queue overflowed.
+    """
+
+    def __init__(self):
+        self._libc = _load_libc()
+        if self._libc is None:
+            raise OSError("inotify is not available on this platform")
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._lock = threading.Lock()
+        self._dirs: Dict[int, Path] = {}
+        self._watched: Set[Path] = set()
+        self._changed: Set[str] = set()
+        self._rescan = True
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rag-watch", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def supported() -> bool:
+        return _load_libc() is not None
+
+    def watch(self, paths: Iterable) -> None:
+        """Watch the parent directory of each file in ``paths``."""
+        for path in paths:
+            directory = Path(path).parent
+            with self._lock:
+                if directory in self._watched or self._fd < 0:
+                    continue
+                wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(directory)), WATCH_MASK)
+                if wd < 0:
+                    # Missing directory or out of watches: fall back to a rescan.
+                    self._rescan = True
+                    continue
+                self._dirs[wd] = directory
+                self._watched.add(directory)
+
+    def drain(self) -> Optional[Set[str]]:
+        with self._lock:
+            if self._rescan:
+                self._rescan = False
+                self._changed.clear()
+                return None
+            changed, self._changed = self._changed, set()
+            return changed
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=2)
+        with self._lock:
+            if self._fd >= 0:
+                os.close(self._fd)
+                self._fd = -1
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                ready, _, _ = select.select([self._fd], [], [], 0.5)
+                if not ready:
+                    continue
+                data = os.read(self._fd, 64 * 1024)
+            except (OSError, ValueError):
+                return
+            self._parse(data)
+
+    def _parse(self, data: bytes) -> None:
+        pos = 0
+        with self._lock:
+            while pos + _EVENT.size <= len(data):
+                wd, mask, _cookie, length = _EVENT.unpack_from(data, pos)
+                name = data[pos + _EVENT.size:pos + _EVENT.size + length].rstrip(b"\0")
+                pos += _EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    self._rescan = True
+                    continue
+                directory = self._dirs.get(wd)
+                if directory is None:
+                    continue
+                if mask & (IN_IGNORED | IN_DELETE_SELF):
+                    # Directory removed or renamed; watch it again if it returns.
+                    del self._dirs[wd]
+                    self._watched.discard(directory)
+                    self._rescan = True
+                    continue
+                if name:
+                    self._changed.add(str(directory / os.fsdecode(name)))
@@ -37,6 +37,7 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+from core import queue_doorbell
 from core.atlas_db import AtlasDB
 from core.atlas_db_router import AtlasDBRouter, RuntimeDBError
 from core.atlas_context import AtlasContext
@@ -355,6 +356,15 @@ class SessionProcessManager:
         with self._metrics_lock:
             return self._locked_retry_count
 
+    def rings_output_doorbell(self) -> bool:
+        """True when worker out-rows ring the queue doorbell on commit.
+
+        Every out-row is written through ``AtlasDB.enqueue_message``, which
+        rings ``core.queue_doorbell``; the web bridge then polls only the
+        sessions that rang instead of sweeping every runtime DB.
+        """
+        return queue_doorbell.enabled()
+
     def _open_runtime_db_with_recovery(self, session_id: str, resolved: str) -> AtlasDB:
         """Open a per-session runtime DB, applying the recovery contract."""
         path = Path(resolved)
@@ -39,6 +39,7 @@ _src_dir = os.path.join(_project_root, "src")
 sys.path.insert(0, _src_dir)
 sys.path.insert(0, _project_root)
 
+from core import queue_doorbell  # noqa: E402
 from core.atlas_db import AtlasDB  # noqa: E402
 from core.plan_mode import (  # noqa: E402
     PLAN_CONFIRM_EXECUTE_PROMPT,
@@ -184,6 +185,12 @@ class _OutputBatcher:
         self.flush()
         return self._sink(msg_type, payload)
 
+    def seconds_until_flush(self) -> float | None:
+        """Time left on the 50ms timer, or None when nothing is buffered."""
+        if not self._chunks or self._opened_monotonic is None:
+            return None
+        return max(self._flush_interval - (self._monotonic() - self._opened_monotonic), 0.0)
+
     def maybe_flush_timer(self) -> None:
         """Flush if the open buffer has been held longer than the 50ms timer.
 
@@ -379,6 +386,10 @@ class SessionWorker:
             now_fn=now_fn,
             monotonic_fn=monotonic_fn,
         )
+        # Queue doorbell for this session's inbound rows; opened on the first
+        # wait_matching so idle waits block on a socket instead of polling.
+        self._doorbell: queue_doorbell.Listener | None = None
+        self._doorbell_tried = False
 
     @staticmethod
     def _normalize_session(value: str | None) -> str:
@@ -745,6 +756,7 @@ class SessionWorker:
     ) -> dict[str, Any] | None:
         deadline = None if timeout is None else time.monotonic() + timeout
         wanted = set(msg_types)
+        self._open_doorbell()
         while not _shutdown_requested:
             # 50ms-timer flush (plan §2.8): while the worker waits between turns,
             # drain any token/reasoning chunks the prior turn left buffered so a
@@ -768,9 +780,35 @@ class SessionWorker:
                 return msg
             if deadline is not None and time.monotonic() >= deadline:
                 return None
-            time.sleep(POLL_INTERVAL)
+            self._wait_for_input(deadline)
         raise KeyboardInterrupt
 
+    def _open_doorbell(self) -> None:
+        """Subscribe to this session's inbound rings (once, best effort)."""
+        if self._doorbell_tried:
+            return
+        self._doorbell_tried = True
+        self._doorbell = queue_doorbell.listen()
+        if self._doorbell is not None:
+            self._doorbell.subscribe(self.db.db_path, self.session_id, "in")
+
+    def _wait_for_input(self, deadline: float | None) -> None:
+        """Sleep until an inbound ring, the batcher timer or the deadline.
+
+        Without a doorbell this is the historical POLL_INTERVAL sleep. With
+        one, the fallback re-check only runs every FALLBACK_POLL_S.
+        """
+        if self._doorbell is None:
+            time.sleep(POLL_INTERVAL)
+            return
+        wait = queue_doorbell.FALLBACK_POLL_S
+        flush_in = self._batcher.seconds_until_flush()
+        if flush_in is not None:
+            wait = min(wait, flush_in)
+        if deadline is not None:
+            wait = min(wait, max(deadline - time.monotonic(), 0.0))
+        self._doorbell.wait(wait)
+
     def drain_idle_stops(self) -> int:
         """Discard STOP messages that arrived while no turn was running.
 
@@ -1240,6 +1278,9 @@ class SessionWorker:
             self._batcher.flush()
         except Exception:
             pass
+        if self._doorbell is not None:
+            self._doorbell.close()
+            self._doorbell = None
         close = getattr(self.db, "close", None)
         if callable(close):
             close()
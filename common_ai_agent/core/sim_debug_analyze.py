@@ -3,7 +3,8 @@
 
 - trace : pyslang driver + load sites (file:line) for a signal — reuses
           workflow/sim_debug/elab.py + the shared source/top resolvers.
-- find  : VCD timeline — time of a signal's Nth edge (core/vcd_timeline.py).
+- find  : VCD timeline — time of a signal's Nth edge (core/vcd_timeline.py,
+          cached per file by core/vcd_index.py).
 - value : VCD timeline — value of a signal at a given time.
 
 Each returns readable text for the agent AND pushes a UI intent so the open
@@ -98,10 +99,11 @@ def _load_timeline(ip: str):
     if vcd is None:
         return None, None
     try:
-        from core.vcd_timeline import load
+        from core.vcd_index import open_timeline
     except Exception:
-        from vcd_timeline import load  # type: ignore
-    return load(vcd), vcd
+        from vcd_index import open_timeline  # type: ignore
+    # Parsed once per (path, mtime, size) across queries and processes.
+    return open_timeline(vcd), vcd
 
 
 def _walk_hierarchy(tree: dict) -> List[dict]:
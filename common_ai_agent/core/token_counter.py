@@ -0,0 +1,304 @@
+"""
+core/token_counter.py — offline token counts for context accounting.
+
+``llm_client.estimate_message_tokens``, ``core.compressor`` and
+``ContextTracker`` used ``len(text) // 4``, which undercounts Korean text
+by 3-5x and misses punctuation-dense JSON / Verilog, so compression fired
+too late on exactly the sessions that need it. Every estimate now goes
+through one active tokenizer:
+
+  bpe        a tiktoken-format rank file shipped locally
+             (``TOKENIZER_BPE_PATH``; lines of ``<base64 token> <rank>``).
+             Encoded with ``tiktoken`` when it is installed, else with the
+             pure-Python byte-pair merge below. Never touches the network.
+  heuristic  script-aware estimate: ASCII words, digit groups, Hangul /
+             CJK characters, punctuation runs and line breaks are costed
+             the way BPE vocabularies tend to split them.
+  chars4     the old ``len // 4``.
+
+``TOKENIZER=auto`` (default) picks ``bpe`` when the rank file exists and
+``heuristic`` otherwise. ``register_tokenizer`` adds other backends.
+
+Counts are cached per text: by object identity (an unchanged history
+message costs one dict lookup per turn) and by content digest (a copied
+or reloaded message costs one hash). Re-counting a long history after a
+turn is therefore proportional to the new messages only.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+# Inline images are transport payloads: charge Codex's fixed estimate for a
+# resized prompt image (7373 bytes), not every base64 character.
+DATA_IMAGE_RE = re.compile(
+    r"data:image/[A-Za-z0-9.+-]+(?:;[A-Za-z0-9=.+-]+)*;base64,[A-Za-z0-9+/=\r\n]+"
+)
+IMAGE_TOKENS = 7373 // 4
+
+DEFAULT_BPE_PATH = Path(__file__).resolve().parent.parent / "vendor" / "tokenizers" / "cl100k_base.tiktoken"
+
+# cl100k-style pre-tokenizer, restated without \p{..} classes (``re`` has none).
+_BPE_SPLIT_RE = re.compile(
+    r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\w]?[^\W\d_]+|\d{1,3}| ?[^\s\w]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+"""
+)
+
+
+class CharsTokenizer:
+    """The legacy 4-chars-per-token estimate."""
+
+    name = "chars4"
+
+    def count(self, text: str) -> int:
+        return len(text) // 4
+
+
+class HeuristicTokenizer:
+    """Script-aware estimate for when no vocabulary file is available."""
+
+    name = "heuristic"
+
+    _WORD = re.compile(r"[A-Za-z_]+")
+    _DIGITS = re.compile(r"[0-9]+")
+    # Hangul, kana and CJK ideographs: about one token per character.
+    _WIDE_CHARS = "\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7a3\uf900-\ufaff"
+    _WIDE = re.compile(f"[{_WIDE_CHARS}]")
+    # Other letters (accented Latin, Cyrillic, ...): byte-level merges, ~2 chars.
+    _OTHER = re.compile(rf"[^\W\d_A-Za-z{_WIDE_CHARS}]+")
+    _PUNCT = re.compile(r"[^\w\s]+")
+    _BREAK = re.compile(r"[ \t]*\n\s*|[ \t]{2,}")
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        n = sum((len(w) + 6) // 7 for w in self._WORD.findall(text))
+        n += sum((len(d) + 2) // 3 for d in self._DIGITS.findall(text))
+        n += len(self._WIDE.findall(text))
+        n += sum((len(w) + 1) // 2 for w in self._OTHER.findall(text))
+        n += sum((len(p) + 1) // 2 for p in self._PUNCT.findall(text))
+        n += len(self._BREAK.findall(text))
+        return max(n, 1)
+
+
+def _load_ranks(path: Path) -> Dict[bytes, int]:
+    ranks: Dict[bytes, int] = {}
+    with open(path, "rb") as fh:
+        for line in fh:
+            if line.strip():
+                token, rank = line.split()
+                ranks[base64.b64decode(token)] = int(rank)
+    return ranks
+
+
+class BPETokenizer:
+    """Byte-pair merge over a tiktoken-format rank file, in pure Python."""
+
+    name = "bpe"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._ranks = _load_ranks(self.path)
+        self._pieces: "OrderedDict[bytes, int]" = OrderedDict()
+
+    def _merge_count(self, piece: bytes) -> int:
+        parts = [piece[i:i + 1] for i in range(len(piece))]
+        ranks = self._ranks
+        while len(parts) > 1:
+            best, best_i = None, -1
+            for i in range(len(parts) - 1):
+                rank = ranks.get(parts[i] + parts[i + 1])
+                if rank is not None and (best is None or rank < best):
+                    best, best_i = rank, i
+            if best is None:
+                break
+            parts[best_i:best_i + 2] = [parts[best_i] + parts[best_i + 1]]
+        return len(parts)
+
+    def count(self, text: str) -> int:
+        total = 0
+        for piece in _BPE_SPLIT_RE.findall(text):
+            raw = piece.encode("utf-8", "surrogatepass")
+            if raw in self._ranks:
+                total += 1
+                continue
+            n = self._pieces.get(raw)
+            if n is None:
+                n = self._pieces[raw] = self._merge_count(raw)
+                if len(self._pieces) > 50_000:
+                    self._pieces.popitem(last=False)
+            total += n
+        return total
+
+
+class TiktokenTokenizer:
+    """``tiktoken`` with the same local rank file; no download."""
+
+    name = "bpe"
+
+    def __init__(self, path: Path):
+        import tiktoken
+        from tiktoken.load import load_tiktoken_bpe
+
+        self.path = Path(path)
+        self._enc = tiktoken.Encoding(
+            name=self.path.stem,
+            pat_str=_BPE_SPLIT_RE.pattern,
+            mergeable_ranks=load_tiktoken_bpe(str(self.path)),
+            special_tokens={},
+        )
+
+    def count(self, text: str) -> int:
+        return len(self._enc.encode_ordinary(text))
+
+
+def _bpe(path: Path):
+    try:
+        return TiktokenTokenizer(path)
+    except ImportError:
+        return BPETokenizer(path)
+
+
+_factories: Dict[str, Callable[[], Any]] = {
+    "heuristic": HeuristicTokenizer,
+    "chars4": CharsTokenizer,
+}
+
+
+def register_tokenizer(name: str, factory: Callable[[], Any]) -> None:
+    """Make ``TOKENIZER=<name>`` build ``factory()`` (an object with ``count(text)``)."""
+    _factories[name] = factory
+
+
+def _bpe_path() -> Path:
+    raw = os.environ.get("TOKENIZER_BPE_PATH", "").strip()
+    return Path(os.path.expanduser(raw)) if raw else DEFAULT_BPE_PATH
+
+
+def _build(name: str):
+    if name in ("auto", "bpe"):
+        path = _bpe_path()
+        if path.is_file():
+            try:
+                return _bpe(path)
+            except (OSError, ValueError):
+                pass
+        return HeuristicTokenizer()
+    factory = _factories.get(name)
+    return factory() if factory is not None else HeuristicTokenizer()
+
+
+_lock = threading.Lock()
+_active = None
+_active_key: Optional[tuple] = None
+
+# text identity -> (text, tokenizer name, count); digest -> count
+_by_id: "OrderedDict[int, tuple]" = OrderedDict()
+_by_digest: "OrderedDict[tuple, int]" = OrderedDict()
+_ID_ENTRIES = 20_000
+_DIGEST_ENTRIES = 100_000
+# Short strings are cheaper to count than to hash and cache.
+_MIN_CACHED_LEN = 64
+
+
+def get_tokenizer():
+    """The tokenizer selected by ``TOKENIZER`` / ``TOKENIZER_BPE_PATH``."""
+    global _active, _active_key
+    key = (os.environ.get("TOKENIZER", "auto").strip().lower() or "auto",
+           os.environ.get("TOKENIZER_BPE_PATH", ""))
+    with _lock:
+        if _active is None or _active_key != key:
+            _active, _active_key = _build(key[0]), key
+        return _active
+
+
+def set_tokenizer(tokenizer) -> None:
+    """Use *tokenizer* until the environment selection changes."""
+    global _active, _active_key
+    get_tokenizer()
+    with _lock:
+        _active = tokenizer
+
+
+def tokenizer_name() -> str:
+    return getattr(get_tokenizer(), "name", type(get_tokenizer()).__name__)
+
+
+def count_text(text: str) -> int:
+    """Tokens in *text* under the active tokenizer, cached."""
+    if not text:
+        return 0
+    if not isinstance(text, str):
+        text = str(text)
+    tok = get_tokenizer()
+    if len(text) < _MIN_CACHED_LEN:
+        return tok.count(text)
+    name = getattr(tok, "name", "")
+    hit = _by_id.get(id(text))
+    if hit is not None and hit[0] is text and hit[1] == name:
+        return hit[2]
+    key = (name, hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest())
+    n = _by_digest.get(key)
+    if n is None:
+        n = tok.count(text)
+    with _lock:
+        _by_digest[key] = n
+        _by_digest.move_to_end(key)
+        if len(_by_digest) > _DIGEST_ENTRIES:
+            _by_digest.popitem(last=False)
+        # Holding the text keeps its id from being reused while cached.
+        _by_id[id(text)] = (text, name, n)
+        if len(_by_id) > _ID_ENTRIES:
+            _by_id.popitem(last=False)
+    return n
+
+
+def count_content(content: Any) -> int:
+    """Tokens in message content: str, content blocks or an optimized dict."""
+    if isinstance(content, str):
+        images = DATA_IMAGE_RE.findall(content) if "data:image/" in content else ()
+        if images:
+            return count_text(DATA_IMAGE_RE.sub("", content)) + IMAGE_TOKENS * len(images)
+        return count_text(content)
+    if isinstance(content, dict):
+        if str(content.get("type") or "") == "input_image":
+            return max(1, IMAGE_TOKENS)
+        return sum(count_content(value) for value in content.values()
+                   if isinstance(value, (str, list, dict)))
+    if isinstance(content, list):
+        return sum(count_content(block) for block in content)
+    return count_text(str(content)) if content is not None else 0
+
+
+def count_message(message: Dict[str, Any]) -> int:
+    """Content plus native tool calls (function name and arguments)."""
+    total = count_content(message.get("content", ""))
+    tool_calls = message.get("tool_calls")
+    if tool_calls and isinstance(tool_calls, list):
+        for tc in tool_calls:
+            if not isinstance(tc, dict):
+                continue
+            fn = tc.get("function") if isinstance(tc.get("function"), dict) else {}
+            total += count_text(str(fn.get("name", "")))
+            args = fn.get("arguments", "")
+            total += count_text(args if isinstance(args, str) else str(args))
+    return total
+
+
+def clear_cache() -> None:
+    with _lock:
+        _by_id.clear()
+        _by_digest.clear()
+
+
+def error_pct(estimate: int, actual: int) -> float:
+    """Signed estimate error relative to the API's count, in percent."""
+    if actual <= 0:
+        return math.nan
+    return (estimate - actual) * 100.0 / actual
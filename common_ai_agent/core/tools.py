@@ -3295,6 +3295,21 @@ def rag_status():
                 name = level_names.get(lvl, lvl)
                 output += f"  • {name}: {count}\n"
         
+        try:
+            from embedding_cache import get_embedding_cache
+        except ImportError:
+            from core.embedding_cache import get_embedding_cache
+        cache = get_embedding_cache()
+        if cache is not None:
+            cs = cache.stats()
+            output += "\nEmbedding cache (shared with graph memory):\n"
+            output += (f"  • {cs['entries']} vectors, {cs['bytes'] / 1e6:.1f} / "
+                       f"{cs['max_bytes'] / 1e6:.0f} MB, {cs['evictions']} evicted\n")
+            output += (f"  • hits {cs['hits']}, misses {cs['misses']} "
+                       f"({cs['hit_rate']:.0%} hit rate this session)\n")
+            for model, count in sorted(cs['by_model'].items()):
+                output += f"  • {model}: {count}\n"
+
         # Show category info for agent
         output += "\n" + db.get_categories_info()
         
@@ -3302,9 +3317,14 @@ def rag_status():
     except Exception as e:
         return f"Error in rag_status: {e}"
 
-def rag_clear():
+def rag_clear(purge_embedding_cache: bool = False):
     """
     Clear all indexed RAG data.
+
+    Args:
+        purge_embedding_cache: Also drop the current embedding model's
+            entries from the shared embedding cache (other models' entries
+            are kept), so re-indexing requests fresh vectors.
     
     Returns:
         Confirmation message
@@ -3317,7 +3337,18 @@ def rag_clear():
 
         db = get_rag_db()
         db.clear()
-        return "RAG database cleared. Run rag_index() to re-index files."
+        message = "RAG database cleared. Run rag_index() to re-index files."
+        if purge_embedding_cache:
+            import config
+            try:
+                from embedding_cache import get_embedding_cache
+            except ImportError:
+                from core.embedding_cache import get_embedding_cache
+            cache = get_embedding_cache()
+            if cache is not None:
+                dropped = cache.invalidate_model(config.EMBEDDING_MODEL)
+                message += f" Dropped {dropped} cached embeddings for {config.EMBEDDING_MODEL}."
+        return message
     except Exception as e:
         return f"Error in rag_clear: {e}"
 
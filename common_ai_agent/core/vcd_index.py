@@ -0,0 +1,288 @@
+"""core/vcd_index.py — parse each VCD once: a process-wide timeline LRU plus
+an on-disk sidecar index that later processes open instead of re-parsing.
+
+`open_timeline(path)` is what `sim_debug` and `/api/vcd` call:
+
+  1. LRU hit on (path, mtime_ns, size) → the parsed VcdTimeline, no I/O.
+     Memory is capped by SIM_DEBUG_TIMELINE_CACHE_MB; least recently used
+     timelines are dropped first.
+  2. A fresh sidecar `<stem>-<hash>.vcdidx` in the `.wave_cache` directory
+     used for FST→VCD conversions (src/atlas_vcd_conversion.py) → only its
+     header (signal table, value table, per-signal offsets and page
+     checkpoints) is read; a signal's samples are read when first queried,
+     and `value_at` reads a single page.
+  3. Otherwise the VCD is streamed by `vcd_timeline.load` and the sidecar is
+     written (tmp file + rename, so concurrent writers are harmless).
+
+Sidecar layout: MAGIC, u64 header length, JSON header, then per signal its
+int64 times followed by its value codes (uint8/16/32, whichever fits).
+"""
+from __future__ import annotations
+
+import json
+import os
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from core.vcd_timeline import VcdTimeline, declare, load
+except ImportError:  # pragma: no cover
+    from vcd_timeline import VcdTimeline, declare, load  # type: ignore
+
+MAGIC = b"VCDIDX1\n"
+_LEN = struct.Struct("<Q")
+# Times per checkpoint page; value_at on a sidecar reads one page.
+PAGE = 4096
+
+# Counters for tests and diagnostics.
+stats = {"parses": 0, "index_opens": 0, "index_writes": 0, "hits": 0}
+
+_Key = Tuple[str, int, int]
+
+
+def _index_path(vcd: Path) -> Path:
+    try:
+        from src.atlas_vcd_conversion import index_cache_path
+    except ImportError:  # pragma: no cover
+        from atlas_vcd_conversion import index_cache_path  # type: ignore
+    return index_cache_path(vcd)
+
+
+def _code_type(n_values: int) -> str:
+    if n_values <= 0xFF:
+        return "B"
+    if n_values <= 0xFFFF:
+        return "H"
+    return "I"
+
+
+# ── sidecar ─────────────────────────────────────────────────────────
+class VcdIndexFile:
+    """Read-only view of a sidecar; VcdTimeline pulls samples through it."""
+
+    def __init__(self, path: Path, header: dict, data_start: int, fd: int):
+        self.path = path
+        self._fd = fd
+        self._data_start = data_start
+        self._code_type = header["code_type"]
+        self._code_size = array(self._code_type).itemsize
+        self._page = int(header["page"])
+        # vid → (offset, count, first time of each page)
+        self._signals: Dict[str, Tuple[int, int, List[int]]] = {
+            vid: (off, count, pages) for vid, (off, count, pages) in header["signals"].items()
+        }
+
+    def __del__(self):
+        self.close()
+
+    def close(self) -> None:
+        fd, self._fd = self._fd, -1
+        if fd >= 0:
+            os.close(fd)
+
+    def signal_ids(self) -> List[str]:
+        return list(self._signals)
+
+    def change_count(self) -> int:
+        return sum(count for _, count, _ in self._signals.values())
+
+    def _read(self, typecode: str, offset: int, count: int) -> array:
+        out = array(typecode)
+        if count:
+            size = out.itemsize * count
+            data = os.pread(self._fd, size, self._data_start + offset)
+            if len(data) != size:
+                raise OSError(f"truncated waveform index {self.path}")
+            out.frombytes(data)
+        return out
+
+    def series(self, vid: str) -> Optional[Tuple[array, array]]:
+        sig = self._signals.get(vid)
+        if sig is None:
+            return None
+        off, count, _ = sig
+        return (self._read("q", off, count),
+                self._read(self._code_type, off + 8 * count, count))
+
+    def code_at(self, vid: str, t: int) -> Optional[int]:
+        sig = self._signals.get(vid)
+        if sig is None:
+            return None
+        off, count, pages = sig
+        p = bisect_right(pages, t) - 1
+        if p < 0:
+            return None
+        start = p * self._page
+        times = self._read("q", off + 8 * start, min(self._page, count - start))
+        i = start + bisect_right(times, t) - 1
+        return self._read(self._code_type, off + 8 * count + i * self._code_size, 1)[0]
+
+
+def write_index(tl: VcdTimeline, out: Path, size: int, mtime_ns: int) -> None:
+    """Serialize a fully loaded timeline to *out* (atomically)."""
+    code_type = _code_type(len(tl._values))
+    signals = {}
+    offset = 0
+    for vid, times in tl.times.items():
+        signals[vid] = [offset, len(times), list(times[::PAGE])]
+        offset += len(times) * (8 + array(code_type).itemsize)
+    header = json.dumps({
+        "source": {"size": size, "mtime_ns": mtime_ns},
+        "byteorder": sys.byteorder,
+        "timescale": tl.timescale,
+        "t_min": tl.t_min,
+        "t_max": tl.t_max,
+        "declarations": tl.declarations,
+        "values": tl._values,
+        "scalars": "".join(tl._scalars),
+        "code_type": code_type,
+        "page": PAGE,
+        "signals": signals,
+    }, separators=(",", ":")).encode("utf-8")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(f".{out.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            f.write(_LEN.pack(len(header)))
+            f.write(header)
+            for vid, times in tl.times.items():
+                times.tofile(f)
+                codes = tl.codes[vid]
+                (codes if codes.typecode == code_type else array(code_type, codes)).tofile(f)
+        os.replace(tmp, out)
+    finally:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+
+def open_index(path: Path, size: int, mtime_ns: int) -> Optional[VcdTimeline]:
+    """Timeline backed by the sidecar at *path*, or None if missing/stale."""
+    try:
+        fd = os.open(str(path), os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        head = os.pread(fd, len(MAGIC) + _LEN.size, 0)
+        if len(head) != len(MAGIC) + _LEN.size or head[:len(MAGIC)] != MAGIC:
+            raise ValueError("not a waveform index")
+        (length,) = _LEN.unpack(head[len(MAGIC):])
+        header = json.loads(os.pread(fd, length, len(head)))
+        if header.get("source") != {"size": size, "mtime_ns": mtime_ns} \
+                or header.get("byteorder") != sys.byteorder:
+            raise ValueError("stale waveform index")
+    except (OSError, ValueError):
+        os.close(fd)
+        return None
+
+    tl = VcdTimeline()
+    tl.timescale = header["timescale"]
+    tl.t_min, tl.t_max = header["t_min"], header["t_max"]
+    for vid, bare, scope, width in header["declarations"]:
+        declare(tl, vid, bare, scope, width)
+    tl._values = header["values"]
+    tl._scalars = list(header["scalars"])
+    tl._value_codes = {v: i for i, v in enumerate(tl._values)}
+    tl._index = VcdIndexFile(path, header, len(head) + length, fd)
+    return tl
+
+
+# ── process-wide LRU ────────────────────────────────────────────────
+class TimelineCache:
+    """Memory-capped LRU of timelines keyed by (path, mtime_ns, size)."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[_Key, VcdTimeline]" = OrderedDict()
+        self._lock = threading.Lock()
+        # One loader per key; concurrent callers for the same VCD wait on it.
+        self._loading: Dict[_Key, threading.Lock] = {}
+
+    def get(self, path, use_index: bool = True) -> VcdTimeline:
+        p = Path(path).resolve()
+        st = p.stat()
+        key = (str(p), st.st_mtime_ns, st.st_size)
+        with self._lock:
+            tl = self._entries.get(key)
+            if tl is not None:
+                self._entries.move_to_end(key)
+                stats["hits"] += 1
+                return tl
+            loader = self._loading.setdefault(key, threading.Lock())
+        with loader:
+            with self._lock:
+                tl = self._entries.get(key)
+                if tl is not None:
+                    self._entries.move_to_end(key)
+                    stats["hits"] += 1
+                    return tl
+            tl = self._load(p, st, use_index)
+            with self._lock:
+                self._loading.pop(key, None)
+                for old in [k for k in self._entries if k[0] == key[0]]:
+                    del self._entries[old]  # older versions of this file
+                self._entries[key] = tl
+                self._evict()
+        return tl
+
+    def _load(self, p: Path, st: os.stat_result, use_index: bool) -> VcdTimeline:
+        idx = _index_path(p) if use_index else None
+        if idx is not None:
+            tl = open_index(idx, st.st_size, st.st_mtime_ns)
+            if tl is not None:
+                stats["index_opens"] += 1
+                return tl
+        tl = load(p)
+        stats["parses"] += 1
+        if idx is not None:
+            try:
+                write_index(tl, idx, st.st_size, st.st_mtime_ns)
+                stats["index_writes"] += 1
+            except OSError:
+                pass  # read-only sim dir: still cached in memory
+        return tl
+
+    def _evict(self) -> None:
+        # Sizes are re-read: sidecar-backed timelines grow as signals load.
+        sizes = {k: tl.nbytes() for k, tl in self._entries.items()}
+        total = sum(sizes.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            key, _ = self._entries.popitem(last=False)
+            total -= sizes[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_cache: Optional[TimelineCache] = None
+_cache_lock = threading.Lock()
+
+
+def timeline_cache() -> TimelineCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            try:
+                import config
+                mb = int(getattr(config, "SIM_DEBUG_TIMELINE_CACHE_MB", 512))
+            except Exception:
+                mb = 512
+            _cache = TimelineCache(mb << 20)
+        return _cache
+
+
+def open_timeline(path) -> VcdTimeline:
+    """Timeline for *path*, from memory, its sidecar index, or a parse."""
+    return timeline_cache().get(path)
@@ -6,12 +6,20 @@ drops timestamps; this keeps per-signal (time, value) so we can answer
 "when does X first rise" and "value of X at t". Scope: scalar + vector value
 changes, `#<time>` markers, `$var`/`$timescale`. No strength/real-precision
 modelling — enough for debug navigation.
+
+The file is streamed in 4 MB blocks, never read whole. Each signal keeps an
+int64 `array('q')` of change times plus an `array('I')` of codes into one
+interned value table, so a change costs ~12 bytes instead of a tuple and a
+string. `value_at` bisects the time array, `edges` is computed once per
+(signal, kind) and cached, and `load(path, signals=[...])` stores only the
+requested signals (the rest of the body is skipped without interning).
 """
 from __future__ import annotations
 
 import re
-from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 _VAR_RE = re.compile(r"\$var\s+\w+\s+(\d+)\s+(\S+)\s+(.+?)\s*\$end")
 _TS_RE = re.compile(r"\$timescale\s+(.+?)\s*\$end", re.DOTALL)
@@ -20,10 +28,28 @@ _TS_RE = re.compile(r"\$timescale\s+(.+?)\s*\$end", re.DOTALL)
 class VcdTimeline:
     def __init__(self) -> None:
         self.timescale: str = "ns"
-        # id → list[(time, value_str)]
-        self.changes: Dict[str, List[Tuple[int, str]]] = {}
+        # id → change times (sorted, int64) and parallel codes into _values
+        self.times: Dict[str, array] = {}
+        self.codes: Dict[str, array] = {}
+        # Interned value strings; code → value and value → code.
+        self._values: List[str] = []
+        self._value_codes: Dict[str, int] = {}
+        # code → single logic char used for edge classification
+        self._scalars: List[str] = []
+        self._edges_cache: Dict[Tuple[str, str], List[int]] = {}
+        # ids whose changes were stored (None = all; see load(signals=...))
+        self.loaded: Optional[Set[str]] = None
+        # On-disk sidecar (core/vcd_index.py) that signals are read from on
+        # first use instead of being held in memory up front.
+        self._index = None
+        # Numeric value ranks and per-signal min/max pyramids built by
+        # core/vcd_window.py for decimated window queries.
+        self._window_ranks = None
+        self._window_pyramids: Dict[str, object] = {}
         # id → {"name", "scope", "width"}
         self.meta: Dict[str, dict] = {}
+        # Every $var in declaration order: (id, name, scope, width).
+        self.declarations: List[Tuple[str, str, str, int]] = []
         # Exact full-path lookup and ambiguity-aware leaf lookup. Bare leaf names
         # resolve only when they identify exactly one VCD id.
         self._by_full: Dict[str, str] = {}
@@ -131,6 +157,56 @@ class VcdTimeline:
     def time_range(self) -> Tuple[int, int]:
         return (self.t_min, self.t_max)
 
+    # ── storage ───────────────────────────────────────────────────
+    def _intern(self, value: str) -> int:
+        code = self._value_codes.get(value)
+        if code is None:
+            code = len(self._values)
+            self._values.append(value)
+            self._scalars.append(_scalar(value))
+            self._value_codes[value] = code
+        return code
+
+    def _append(self, vid: str, t: int, value: str) -> None:
+        times = self.times.get(vid)
+        if times is None:
+            times = self.times[vid] = array("q")
+            self.codes[vid] = array("I")
+        times.append(t)
+        self.codes[vid].append(self._intern(value))
+
+    def _series(self, vid: str) -> Tuple[Optional[array], Optional[array]]:
+        """(times, codes) of one signal, pulled from the sidecar if needed."""
+        times = self.times.get(vid)
+        if times is None and self._index is not None:
+            loaded = self._index.series(vid)
+            if loaded is not None:
+                self.times[vid], self.codes[vid] = loaded
+                return loaded
+        return times, self.codes.get(vid)
+
+    @property
+    def changes(self) -> Dict[str, List[Tuple[int, str]]]:
+        """id → [(time, value)], materialized on demand (memory heavy)."""
+        if self._index is not None:
+            for vid in self._index.signal_ids():
+                self._series(vid)
+        values = self._values
+        return {vid: [(t, values[c]) for t, c in zip(times, self.codes[vid])]
+                for vid, times in self.times.items()}
+
+    def change_count(self) -> int:
+        if self._index is not None:
+            return self._index.change_count()
+        return sum(len(t) for t in self.times.values())
+
+    def nbytes(self) -> int:
+        """Approximate memory held by loaded samples and the signal table."""
+        data = sum(t.itemsize * len(t) for t in self.times.values())
+        data += sum(c.itemsize * len(c) for c in self.codes.values())
+        data += sum(p.nbytes() for p in self._window_pyramids.values())
+        return data + 200 * len(self.meta) + 64 * len(self._values)
+
     # ── queries ───────────────────────────────────────────────────
     def edges(self, signal: str, kind: str = "rising", scope: str = "") -> List[int]:
         """Times where `signal` transitions. kind: rising|falling|any.
@@ -138,12 +214,21 @@ class VcdTimeline:
         vid = self.resolve_id(signal, scope)
         if not vid:
             return []
-        series = self.changes.get(vid) or []
+        key = (vid, kind)
+        cached = self._edges_cache.get(key)
+        if cached is None:
+            cached = self._edges_cache[key] = self._compute_edges(vid, kind)
+        return list(cached)
+
+    def _compute_edges(self, vid: str, kind: str) -> List[int]:
+        times, codes = self._series(vid)
+        times, codes = times or (), codes or ()
+        scalars = self._scalars
         out: List[int] = []
         prev: Optional[str] = None
-        prev_raw: Optional[str] = None
-        for t, v in series:
-            cur = _scalar(v)
+        prev_code = -1
+        for t, code in zip(times, codes):
+            cur = scalars[code]
             if prev is None:
                 # The implicit pre-simulation state is X (unknown). A signal
                 # first sampled as '1' — e.g. psel/penable asserted in
@@ -155,26 +240,30 @@ class VcdTimeline:
                 if kind == "rising" and cur == "1":
                     out.append(t)
             else:
-                if kind == "any" and v != prev_raw:
+                if kind == "any" and code != prev_code:
                     out.append(t)
                 elif kind == "rising" and prev != "1" and cur == "1":
                     out.append(t)
                 elif kind == "falling" and prev != "0" and cur == "0":
                     out.append(t)
-            prev, prev_raw = cur, v
+            prev, prev_code = cur, code
         return out
 
     def value_at(self, signal: str, t: int, scope: str = "") -> Optional[str]:
         vid = self.resolve_id(signal, scope)
         if not vid:
             return None
-        series = self.changes.get(vid) or []
-        val: Optional[str] = None
-        for ct, v in series:
-            if ct > t:
-                break
-            val = v
-        return val
+        times = self.times.get(vid)
+        if times is None and self._index is not None:
+            # Reads one page of the sidecar, not the whole signal.
+            code = self._index.code_at(vid, t)
+            return None if code is None else self._values[code]
+        if not times:
+            return None
+        i = bisect_right(times, t) - 1
+        if i < 0:
+            return None
+        return self._values[self.codes[vid][i]]
 
 
 def _scalar(v: str) -> str:
@@ -184,9 +273,9 @@ def _scalar(v: str) -> str:
     if len(v) == 1:
         return v.lower()
     s = v.lower().lstrip("b")
-    if all(c == "0" for c in s):
+    if not s.strip("0"):
         return "0"
-    if any(c in "xz" for c in s):
+    if "x" in s or "z" in s:
         return "x"
     return "1"
 
@@ -199,82 +288,181 @@ def _norm_lookup(value: str) -> str:
     return s.lower()
 
 
-def load(path) -> VcdTimeline:
-    tl = VcdTimeline()
-    p = Path(path)
-    text = p.read_text(encoding="utf-8", errors="replace")
-
-    mts = _TS_RE.search(text)
+def _parse_header(tl: VcdTimeline, header: str) -> None:
+    mts = _TS_RE.search(header)
     if mts:
         m = re.search(r"[a-zµ]s", mts.group(1))
         tl.timescale = m.group(0) if m else mts.group(1).strip().split()[-1]
 
     scope_stack: List[str] = []
-    in_defs = True
-    cur_t = 0
-    seen_t = False
-
-    for raw in text.splitlines():
+    for raw in header.splitlines():
         line = raw.strip()
-        if not line:
-            continue
-        if in_defs:
-            if line.startswith("$scope"):
-                parts = line.split()
-                if len(parts) >= 3:
-                    scope_stack.append(parts[2])
-                continue
-            if line.startswith("$upscope"):
-                if scope_stack:
-                    scope_stack.pop()
-                continue
-            if line.startswith("$var"):
-                mv = _VAR_RE.search(line)
-                if mv:
-                    width = int(mv.group(1))
-                    vid = mv.group(2)
-                    name = mv.group(3).strip()
-                    # drop any [msb:lsb] suffix from the declared name
-                    bare = re.sub(r"\s*\[[^\]]*\]\s*$", "", name).strip()
-                    scope = ".".join(scope_stack)
-                    tl.meta.setdefault(vid, {"name": bare, "scope": scope, "width": width})
-                    full = f"{scope}.{bare}".lower() if scope else bare.lower()
-                    leaf = bare.lower()
-                    tl._by_full.setdefault(full, vid)
-                    tl._by_leaf.setdefault(leaf, set()).add(vid)
-                    tl._canonical_full_by_id.setdefault(vid, full)
-                continue
-            if line.startswith("$enddefinitions"):
-                in_defs = False
-                continue
-            continue
-        # ── value-change body ──
-        c0 = line[0]
-        if c0 == "#":
-            try:
-                cur_t = int(line[1:])
-            except ValueError:
-                continue
-            if not seen_t:
-                tl.t_min = cur_t
-                seen_t = True
-            tl.t_max = max(tl.t_max, cur_t)
-            continue
-        if c0 == "$":
-            continue  # $dumpvars/$end/$dumpall...
-        if c0 in "bB":
-            sp = line.find(" ")
-            if sp < 0:
-                continue
-            val, vid = line[:sp], line[sp + 1:].strip()
-        elif c0 in "rR":
-            sp = line.find(" ")
-            if sp < 0:
-                continue
-            val, vid = line[:sp], line[sp + 1:].strip()
-        else:
-            val, vid = c0, line[1:].strip()
-        if not vid:
+        if line.startswith("$scope"):
+            parts = line.split()
+            if len(parts) >= 3:
+                scope_stack.append(parts[2])
+        elif line.startswith("$upscope"):
+            if scope_stack:
+                scope_stack.pop()
+        elif line.startswith("$var"):
+            mv = _VAR_RE.search(line)
+            if mv:
+                width = int(mv.group(1))
+                vid = mv.group(2)
+                name = mv.group(3).strip()
+                # drop any [msb:lsb] suffix from the declared name
+                bare = re.sub(r"\s*\[[^\]]*\]\s*$", "", name).strip()
+                declare(tl, vid, bare, ".".join(scope_stack), width)
+
+
+def declare(tl: VcdTimeline, vid: str, bare: str, scope: str, width: int) -> None:
+    """Register one `$var` declaration (ids may be declared in several scopes)."""
+    tl.declarations.append((vid, bare, scope, width))
+    tl.meta.setdefault(vid, {"name": bare, "scope": scope, "width": width})
+    full = f"{scope}.{bare}".lower() if scope else bare.lower()
+    leaf = bare.lower()
+    tl._by_full.setdefault(full, vid)
+    tl._by_leaf.setdefault(leaf, set()).add(vid)
+    tl._canonical_full_by_id.setdefault(vid, full)
+
+
+def _wanted_ids(tl: VcdTimeline, signals: Iterable[str]) -> Set[str]:
+    """VCD ids for `signals` (names, full paths or raw ids); unknowns dropped."""
+    ids: Set[str] = set()
+    for sig in signals:
+        vid = tl.resolve_id(sig)
+        if vid:
+            ids.add(vid)
+        elif sig in tl.meta:
+            ids.add(sig)
+    return ids
+
+
+def _body_tokens(f, block: int = 1 << 22):
+    """Blocks of whitespace-separated tokens from the rest of `f`.
+
+    Blocks end on a line break, so a `b<value> <id>` pair is never split.
+    """
+    tail = b""
+    while True:
+        data = f.read(block)
+        if not data:
+            break
+        data = tail + data
+        cut = data.rfind(b"\n") + 1
+        if cut == 0:
+            tail = data
             continue
-        tl.changes.setdefault(vid, []).append((cur_t, val))
+        tail = data[cut:]
+        yield data[:cut].split()
+    if tail.strip():
+        yield tail.split()
+
+
+# Flush per-signal pending lists into the int arrays after this many changes.
+_FLUSH_EVERY = 1 << 20
+
+
+def _new_slot(tl: VcdTimeline, vid: bytes, wanted: Optional[Set[bytes]]) -> Optional[tuple]:
+    if wanted is not None and vid not in wanted:
+        return None
+    key = vid.decode("utf-8", errors="replace")
+    times: List[int] = []
+    codes: List[int] = []
+    return (times.append, codes.append, times, codes,
+            tl.times.setdefault(key, array("q")), tl.codes.setdefault(key, array("I")))
+
+
+def _flush(slots: Dict[bytes, Optional[tuple]]) -> None:
+    for slot in slots.values():
+        if slot and slot[2]:
+            slot[4].extend(slot[2])
+            slot[5].extend(slot[3])
+            slot[2].clear()
+            slot[3].clear()
+
+
+def load(path, signals: Optional[Iterable[str]] = None) -> VcdTimeline:
+    """Stream a VCD into a VcdTimeline.
+
+    With `signals`, only those signals' changes are stored; every other
+    signal still resolves by name but has no samples.
+    """
+    tl = VcdTimeline()
+    with open(path, "rb") as f:
+        header_lines: List[str] = []
+        for raw in f:
+            text = raw.decode("utf-8", errors="replace")
+            if "$enddefinitions" in text:
+                break
+            header_lines.append(text)
+        _parse_header(tl, "".join(header_lines))
+
+        wanted: Optional[Set[bytes]] = None
+        if signals is not None:
+            ids = _wanted_ids(tl, signals)
+            tl.loaded = ids
+            wanted = {vid.encode("utf-8") for vid in ids}
+
+        # Body: work on bytes and intern each distinct value once. Changes
+        # go to plain lists first (append is cheapest there) and are moved
+        # into the compact arrays in bulk.
+        value_codes: Dict[bytes, int] = {}
+        # id → (times.append, codes.append, pending times, pending codes,
+        # times array, codes array); None for ids excluded by `signals`.
+        slots: Dict[bytes, Optional[tuple]] = {}
+        pending = 0
+        cur_t = 0
+        seen_t = False
+        t_max = 0
+        for tokens in _body_tokens(f):
+            it = iter(tokens)
+            for tok in it:
+                c0 = tok[0]
+                if c0 == 0x23:  # '#'
+                    try:
+                        cur_t = int(tok[1:])
+                    except ValueError:
+                        continue
+                    if not seen_t:
+                        tl.t_min = cur_t
+                        seen_t = True
+                    if cur_t > t_max:
+                        t_max = cur_t
+                    continue
+                if c0 == 0x24:  # '$' — $dumpvars/$end/$dumpall...
+                    if tok == b"$comment":
+                        for tok in it:
+                            if tok == b"$end":
+                                break
+                    continue
+                if c0 == 0x62 or c0 == 0x42 or c0 == 0x72 or c0 == 0x52:  # bBrR
+                    val = tok
+                    vid = next(it, b"")
+                    if not vid:
+                        continue
+                else:
+                    val = tok[:1]
+                    vid = tok[1:]
+                    if not vid:
+                        continue
+                try:
+                    slot = slots[vid]
+                except KeyError:
+                    slot = slots[vid] = _new_slot(tl, vid, wanted)
+                if slot is None:
+                    continue
+                try:
+                    code = value_codes[val]
+                except KeyError:
+                    code = value_codes[val] = tl._intern(val.decode("utf-8", errors="replace"))
+                slot[0](cur_t)
+                slot[1](code)
+            # Token count bounds the changes held in the pending lists.
+            pending += len(tokens)
+            if pending >= _FLUSH_EVERY:
+                _flush(slots)
+                pending = 0
+        _flush(slots)
+        tl.t_max = t_max
     return tl
@@ -0,0 +1,166 @@
+"""core/vcd_window.py — time-window queries over a VcdTimeline for the
+waveform viewer (`GET /api/vcd/window`).
+
+The browser asks for a few signals, a time window [t0, t1] and its pixel
+width; the reply holds at most O(width) entries per signal regardless of
+the dump size:
+
+  - sparse signals (≤ width changes in the window) come back exactly, as
+    parallel `t` / `v` columns;
+  - dense signals are decimated per pixel column: for each column with at
+    least one change, the change count `n`, the `min` / `max` value shown
+    in the column (including the value entering it) and the `last` value.
+
+Values are codes into one `values` table per reply. min/max order is
+numeric; values containing x/z sort above every number, so `max` reveals
+an unknown anywhere in the column.
+
+Range min/max uses a per-signal pyramid of block minima/maxima (built once
+per signal and kept on the timeline), so a column spanning millions of
+changes costs a few C-level `min()` calls over short slices.
+"""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from core.vcd_timeline import VcdTimeline
+except ImportError:  # pragma: no cover
+    from vcd_timeline import VcdTimeline  # type: ignore
+
+# Pyramid fan-out: each level keeps the min/max of BLOCK entries below it.
+BLOCK = 64
+
+
+def _numeric_key(value: str) -> Tuple[int, float]:
+    """Sort key: numbers ascending, then anything containing x/z."""
+    v = value.lower()
+    body = v[1:] if v[:1] in ("b", "r") else v
+    if not body or "x" in body or "z" in body:
+        return (1, 0.0)
+    try:
+        return (0, float(body) if v[:1] == "r" else float(int(body, 2)))
+    except ValueError:
+        return (1, 0.0)
+
+
+def _ranks(tl: VcdTimeline) -> Tuple[List[int], List[int]]:
+    """(code → rank, rank → code) in numeric order; cached on the timeline."""
+    cached = tl._window_ranks
+    if cached is None or len(cached[0]) != len(tl._values):
+        order = sorted(range(len(tl._values)), key=lambda c: _numeric_key(tl._values[c]))
+        rank = [0] * len(order)
+        for r, code in enumerate(order):
+            rank[code] = r
+        cached = tl._window_ranks = (rank, order)
+    return cached
+
+
+class _Pyramid:
+    """Block min/max levels over one signal's value ranks."""
+
+    def __init__(self, ranks: array):
+        self.mins: List[array] = [ranks]
+        self.maxs: List[array] = [ranks]
+        while len(self.mins[-1]) > BLOCK:
+            lo, hi = self.mins[-1], self.maxs[-1]
+            self.mins.append(array("I", [min(lo[k:k + BLOCK]) for k in range(0, len(lo), BLOCK)]))
+            self.maxs.append(array("I", [max(hi[k:k + BLOCK]) for k in range(0, len(hi), BLOCK)]))
+
+    def nbytes(self) -> int:
+        return sum(a.itemsize * len(a) for a in self.mins[1:] + self.maxs[1:])
+
+    def min_max(self, a: int, b: int, level: int = 0) -> Tuple[int, int]:
+        """min and max rank over entries [a, b) of `level` (b > a)."""
+        lo, hi = self.mins[level], self.maxs[level]
+        if b - a <= 2 * BLOCK or level + 1 == len(self.mins):
+            return min(lo[a:b]), max(hi[a:b])
+        a_up = -(-a // BLOCK)
+        b_up = b // BLOCK
+        mn, mx = self.min_max(a_up, b_up, level + 1) if b_up > a_up else (None, None)
+        for s, e in ((a, a_up * BLOCK), (b_up * BLOCK, b)):
+            if e > s:
+                smn, smx = min(lo[s:e]), max(hi[s:e])
+                mn = smn if mn is None or smn < mn else mn
+                mx = smx if mx is None or smx > mx else mx
+        return mn, mx
+
+
+def _pyramid(tl: VcdTimeline, vid: str, codes: array) -> _Pyramid:
+    pyr = tl._window_pyramids.get(vid)
+    if pyr is None:
+        rank = _ranks(tl)[0]
+        pyr = tl._window_pyramids[vid] = _Pyramid(array("I", map(rank.__getitem__, codes)))
+    return pyr
+
+
+def _signal_window(tl: VcdTimeline, vid: str, t0: int, t1: int, width: int,
+                   emit) -> dict:
+    times, codes = tl._series(vid)
+    if not times:
+        return {"initial": None, "t": [], "v": []}
+    i0 = bisect_left(times, t0)
+    i1 = bisect_right(times, t1)
+    initial = emit(codes[i0 - 1]) if i0 > 0 else None
+    if i1 - i0 <= width:
+        return {"initial": initial,
+                "t": list(times[i0:i1]),
+                "v": [emit(c) for c in codes[i0:i1]]}
+
+    pyr = _pyramid(tl, vid, codes)
+    by_rank = _ranks(tl)[1]
+    span = t1 - t0 + 1
+    col: List[int] = []
+    n: List[int] = []
+    mins: List[int] = []
+    maxs: List[int] = []
+    last: List[int] = []
+    start = i0
+    for c in range(width):
+        end = i1 if c == width - 1 else bisect_left(times, t0 + (c + 1) * span // width, start, i1)
+        if end > start:
+            lo, hi = pyr.min_max(max(start - 1, 0), end)
+            col.append(c)
+            n.append(end - start)
+            mins.append(emit(by_rank[lo]))
+            maxs.append(emit(by_rank[hi]))
+            last.append(emit(codes[end - 1]))
+        start = end
+    return {"initial": initial, "decimated": True,
+            "col": col, "n": n, "min": mins, "max": maxs, "last": last}
+
+
+def query_window(tl: VcdTimeline, signals: Iterable[str], t0: Optional[int] = None,
+                 t1: Optional[int] = None, width: int = 1000) -> dict:
+    """Columnar, width-bounded view of `signals` over [t0, t1]."""
+    t0 = tl.t_min if t0 is None else int(t0)
+    t1 = tl.t_max if t1 is None else int(t1)
+    if t1 < t0:
+        t0, t1 = t1, t0
+    width = max(1, min(int(width), 16384))
+
+    values: List[str] = []
+    remap: Dict[int, int] = {}
+
+    def emit(code: int) -> int:
+        out = remap.get(code)
+        if out is None:
+            out = remap[code] = len(values)
+            values.append(tl._values[code])
+        return out
+
+    rows = []
+    missing = []
+    for sig in signals:
+        resolved = tl.resolve_signal(sig)
+        if resolved is None:
+            missing.append(sig)
+            continue
+        row = {"signal": sig, "resolved": resolved["full"], "width": resolved.get("width")}
+        row.update(_signal_window(tl, resolved["id"], t0, t1, width, emit))
+        rows.append(row)
+    return {"t0": t0, "t1": t1, "width": width, "timescale": tl.timescale,
+            "time_range": list(tl.time_range()), "values": values,
+            "signals": rows, "missing": missing}
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_atlas_db_writes.py — AtlasDB agent-turn writes: per-statement commits vs batching.
+
+Usage:
+    python3 scripts/bench_atlas_db_writes.py                  # 100 sessions × 20 turns
+    python3 scripts/bench_atlas_db_writes.py --sessions 200 --turns 10 --window-ms 5
+
+Each session is a thread with its own AtlasDB handle on ONE control DB file.
+A turn writes what a worker turn writes: the inbound and outbound
+session_queue rows, --events trace_events and one llm_calls row. Modes (each
+in a fresh child process and DB file):
+  - per-stmt     the single-row writers as-is: one commit (WAL fsync) per row
+  - transaction  the same calls inside `with db.transaction():` per turn
+  - bulk         enqueue_messages / record_trace_events / record_llm_calls
+  - group        single-row writers with ATLAS_DB_GROUP_COMMIT_MS=--window-ms
+
+commits/turn is the number of WAL commits (fsyncs) per turn; where fsync is
+expensive (network or spinning disks) it, not Python time, bounds per-stmt.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+MODES = ("per-stmt", "transaction", "bulk", "group")
+
+
+def _turn_single(db, sid, turn, events):
+    db.enqueue_message(sid, "in", "user", {"turn": turn})
+    for k in range(events):
+        db.record_trace_event("tool_call", {"turn": turn, "k": k}, session_id=sid)
+    db.record_llm_call(session_id=sid, model="bench", tokens_input=100, tokens_output=20)
+    db.enqueue_message(sid, "out", "assistant", {"turn": turn})
+
+
+def _turn_bulk(db, sid, turn, events):
+    db.enqueue_messages([{"session_id": sid, "direction": "in", "msg_type": "user",
+                          "payload": {"turn": turn}}])
+    db.record_trace_events([{"event_type": "tool_call", "payload": {"turn": turn, "k": k},
+                             "session_id": sid} for k in range(events)])
+    db.record_llm_calls([{"session_id": sid, "model": "bench", "tokens_input": 100,
+                          "tokens_output": 20}])
+    db.enqueue_messages([{"session_id": sid, "direction": "out", "msg_type": "assistant",
+                          "payload": {"turn": turn}}])
+
+
+def run_child(mode, db_path, sessions, turns, events):
+    from core.atlas_db import AtlasDB
+
+    AtlasDB(db_path)  # schema once, before the threads start
+    errors = []
+    barrier = threading.Barrier(sessions + 1)
+
+    def session(n):
+        db = AtlasDB(db_path)
+        sid = f"bench-{n}"
+        barrier.wait()
+        try:
+            for turn in range(turns):
+                if mode == "transaction":
+                    with db.transaction():
+                        _turn_single(db, sid, turn, events)
+                elif mode == "bulk":
+                    _turn_bulk(db, sid, turn, events)
+                else:
+                    _turn_single(db, sid, turn, events)
+        except Exception as exc:  # noqa: BLE001
+            errors.append(repr(exc))
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(sessions)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    db = AtlasDB(db_path)
+    rows = db._fetchone("SELECT COUNT(*) AS n FROM trace_events")["n"]
+    n_turns = sessions * turns
+    commits = {"per-stmt": n_turns * (events + 3), "transaction": n_turns, "bulk": n_turns * 4}
+    if mode == "group":
+        commits["group"] = db._group_committer().batches
+    print(json.dumps({"elapsed": elapsed, "errors": errors[:3], "trace_rows": rows,
+                      "commits": commits[mode]}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--events", type=int, default=4, help="trace events per turn")
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1], args.sessions, args.turns, args.events)
+        return
+
+    work = Path(tempfile.mkdtemp(prefix="atlas_db_bench_"))
+    print(f"{args.sessions} sessions × {args.turns} turns, {args.events + 3} rows per turn, one DB file")
+    print(f"{'mode':13}{'turns/s':>10}{'rows/s':>10}{'elapsed':>10}{'commits/turn':>15}")
+    baseline = None
+    for mode in MODES:
+        env = dict(os.environ)
+        env["ATLAS_DB_GROUP_COMMIT_MS"] = str(args.window_ms) if mode == "group" else "0"
+        db_path = work / f"{mode}.db"
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", mode, str(db_path),
+             "--sessions", str(args.sessions), "--turns", str(args.turns),
+             "--events", str(args.events)],
+            capture_output=True, text=True, check=True, env=env,
+        ).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        turns = args.sessions * args.turns
+        rate = turns / r["elapsed"]
+        baseline = baseline or rate
+        note = f"  errors: {r['errors']}" if r["errors"] else ""
+        if r["trace_rows"] != turns * args.events:
+            note += f"  ROW COUNT {r['trace_rows']}"
+        print(f"{mode:13}{rate:>10.0f}{rate * (args.events + 3):>10.0f}{r['elapsed']:>9.2f}s"
+              f"{r['commits'] / turns:>15.2f}  {rate / baseline:.1f}x{note}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_llm_rate_limit.py — per-process vs host-wide TPM limiting against a fake OpenAI server.
+
+Usage:
+    python3 scripts/bench_llm_rate_limit.py                       # 4 processes x 4 threads
+    python3 scripts/bench_llm_rate_limit.py --procs 8 --tpm 20000 --seconds 30
+
+A local ThreadingHTTPServer answers /v1/chat/completions with a fixed
+usage (prompt + completion tokens) after --latency seconds and logs when
+each request arrived. For each mode, --procs child processes run --threads
+threads that call llm_client._chat_completion_nonstream in a loop, all
+with TPM_LIMIT=--tpm over a --window second window:
+
+  - local   _RateLimiter per process (RATE_LIMIT_SHARED=false): every
+            process enforces the full budget alone;
+  - shared  _SharedRateLimiter on one SQLite file: one budget per host.
+
+Measured from the server's log: peak tokens in any window (must stay at or
+under the TPM for the limiter to be honest), average tokens per window over
+the whole windows of the run (throughput; near the TPM is good), and
+distinct client connections (threads of a process share the pool).
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+PROMPT_TOKENS, COMPLETION_TOKENS = 400, 100
+
+
+def serve(latency):
+    log, peers = [], set()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            log.append(time.time())
+            peers.add(self.client_address)
+            time.sleep(latency)
+            body = json.dumps({
+                "choices": [{"message": {"role": "assistant", "content": "ok"}}],
+                "usage": {"prompt_tokens": PROMPT_TOKENS, "completion_tokens": COMPLETION_TOKENS},
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 128  # a burst of connects must not wait on SYN retries
+
+    srv = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, log, peers
+
+
+def run_child(mode, base_url, db_path, tpm, window, threads, start, seconds):
+    import config
+    import llm_client
+
+    config.BASE_URL, config.API_KEY, config.MODEL_NAME = base_url, "bench", "bench-model"
+    if mode == "shared":
+        llm_client._rate_limiter = llm_client._SharedRateLimiter(
+            tpm=tpm, window_s=window, path=db_path, scope="bench")
+    else:
+        llm_client._rate_limiter = llm_client._RateLimiter(tpm=tpm, window_s=window)
+    llm_client._rate_limiter._default_token_estimate = PROMPT_TOKENS + COMPLETION_TOKENS
+    time.sleep(max(start - time.time(), 0))  # every child imported: start together
+    deadline = start + seconds
+
+    def loop():
+        messages = [{"role": "user", "content": "ping"}]
+        while time.time() < deadline:
+            for _ in llm_client._chat_completion_nonstream(messages, suppress_spinner=True):
+                pass
+
+    workers = [threading.Thread(target=loop) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    os._exit(0)
+
+
+def window_stats(log, start, window, seconds, cost):
+    """Peak tokens in any window; average tokens per window over whole windows."""
+    log = sorted(log)
+    peak, lo = 0, 0
+    for hi, ts in enumerate(log):
+        while log[lo] <= ts - window:
+            lo += 1
+        peak = max(peak, (hi - lo + 1) * cost)
+    windows = max(int(seconds // window), 1)
+    done = sum(1 for ts in log if start <= ts < start + windows * window)
+    return peak, done * cost / windows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--procs", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--tpm", type=int, default=10000, help="token budget per window")
+    parser.add_argument("--window", type=float, default=5.0, help="limiter window in seconds")
+    parser.add_argument("--seconds", type=float, default=15.0)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake server reply delay")
+    parser.add_argument("--child", nargs=8, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, base_url, db_path, tpm, window, threads, start, seconds = args.child
+        run_child(mode, base_url, db_path, int(tpm), float(window), int(threads),
+                  float(start), float(seconds))
+        return
+
+    work = Path(tempfile.mkdtemp(prefix="rl_bench_"))
+    cost = PROMPT_TOKENS + COMPLETION_TOKENS
+    try:
+        print(f"{'mode':8}{'requests':>10}{'peak/window':>13}{'avg/window':>12}{'TPM':>8}{'conns':>7}")
+        for mode in ("local", "shared"):
+            srv, log, peers = serve(args.latency)
+            base_url = f"http://127.0.0.1:{srv.server_address[1]}/v1"
+            start = time.time() + 2.0 + 0.5 * args.procs
+            procs = [subprocess.Popen(
+                [sys.executable, __file__, "--child", mode, base_url, str(work / "rl.db"),
+                 str(args.tpm), str(args.window), str(args.threads), str(start), str(args.seconds)],
+                stdout=subprocess.DEVNULL)
+                for _ in range(args.procs)]
+            for p in procs:
+                p.wait()
+            srv.shutdown()
+            srv.server_close()
+            peak, avg = window_stats(log, start, args.window, args.seconds, cost)
+            print(f"{mode:8}{len(log):>10}{peak:>13}{avg:>12.0f}{args.tpm:>8}{len(peers):>7}", flush=True)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
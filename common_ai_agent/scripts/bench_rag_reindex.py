@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_rag_reindex.py — per-query change detection cost of RAGDatabase.search().
+
+Usage:
+    python3 scripts/bench_rag_reindex.py
+    python3 scripts/bench_rag_reindex.py --files 20000 --size 16384
+
+Creates N indexed files and measures the work search() does before scoring,
+with no file changed:
+  - legacy    MD5 of every indexed file (the old _smart_reindex)
+  - stat      _smart_reindex with stat-first detection (hash only on change)
+  - watch     _smart_reindex with RAG_WATCH_FILES (inotify, Linux only)
+
+Files sit in the page cache, so the legacy numbers are a lower bound; on a
+cold cache or network filesystem the gap is much wider.
+"""
+
+import argparse
+import hashlib
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+import config  # noqa: E402
+from core.rag_db import RAGDatabase  # noqa: E402
+from core.rag_watch import InotifyWatcher, file_stat  # noqa: E402
+
+
+def legacy_reindex(db):
+    for file_path, stored_hash in db.file_hashes.items():
+        abs_path = db.project_root / file_path
+        if abs_path.exists():
+            with open(abs_path, "rb") as f:
+                if hashlib.md5(f.read()).hexdigest() != stored_hash:
+                    raise AssertionError(f"{file_path} changed")
+
+
+def timed(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--size", type=int, default=8192, help="bytes per file")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    work = Path(tempfile.mkdtemp(prefix="rag_reindex_bench_")).resolve()
+    try:
+        project = work / "project"
+        line = b"assign q = d & en;  // filler\n"
+        body = line * (args.size // len(line) + 1)
+        for i in range(args.files):
+            path = project / f"rtl{i % 50}" / f"m{i}.sv"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(f"module m{i};\n".encode() + body[:args.size])
+
+        with patch.object(RAGDatabase, "_validate_dimension_compatibility"):
+            db = RAGDatabase(rag_dir=str(work / "rag"))
+        db.project_root = project
+        for path in project.rglob("*.sv"):
+            rel = str(path.relative_to(project))
+            db.file_hashes[rel] = db._get_file_hash(str(path))
+            db.file_stats[rel] = file_stat(path)
+        db.save()
+
+        results = [("legacy", timed(lambda: legacy_reindex(db), args.repeats)),
+                   ("stat", timed(db._smart_reindex, args.repeats))]
+        if InotifyWatcher.supported():
+            with patch.object(config, "RAG_WATCH_FILES", True):
+                db._watcher = None
+                db._smart_reindex()  # start watching; first call is a full sweep
+                results.append(("watch", timed(db._smart_reindex, args.repeats)))
+            db._watcher.close()
+        db.store.close()
+
+        print(f"files={args.files} size={args.size}B repeats={args.repeats} (median per query)")
+        base = results[0][1]
+        for name, seconds in results:
+            print(f"{name:8}{seconds * 1000:>10.2f} ms {base / max(seconds, 1e-9):>9.1f}x")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
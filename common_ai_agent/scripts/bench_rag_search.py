@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_rag_search.py — RAG search scoring: per-chunk loop vs EmbeddingIndex.
+
+Usage:
+    python3 scripts/bench_rag_search.py
+    python3 scripts/bench_rag_search.py --sizes 10000 100000 1000000 --dim 256
+    python3 scripts/bench_rag_search.py --legacy-max 100000   # skip slow loop above N
+
+Synthesizes N chunks with random embeddings and times only the scoring step
+of RAGDatabase.search (no query expansion / embedding call). "legacy" is the
+pre-index loop that called _cosine_similarity once per chunk; "index" is
+EmbeddingIndex.search (NumPy matvec + argpartition when NumPy is installed,
+pre-normalized array('f') rows otherwise). No network calls are made.
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from core.rag_db import Chunk  # noqa: E402
+from core.rag_vector_index import EmbeddingIndex, np  # noqa: E402
+
+CATEGORIES = ["verilog", "testbench", "spec"]
+
+
+def _cosine(v1, v2):
+    dot = sum(a * b for a, b in zip(v1, v2))
+    na = math.sqrt(sum(a * a for a in v1))
+    nb = math.sqrt(sum(b * b for b in v2))
+    return dot / (na * nb) if na and nb else 0.0
+
+
+def make_chunks(n, dim, seed=0):
+    rng = random.Random(seed)
+    chunks = {}
+    for i in range(n):
+        cid = f"chunk_{i:08d}"
+        chunks[cid] = Chunk(
+            id=cid, source_file=f"rtl/m{i % 997}.sv", category=CATEGORIES[i % 3],
+            level=1 + i % 5, chunk_type="module", content="", start_line=1, end_line=1,
+            embedding=[rng.uniform(-1.0, 1.0) for _ in range(dim)],
+            metadata={"importance": "important"} if i % 7 == 0 else {},
+        )
+    return chunks
+
+
+def legacy_search(chunks, query, categories, limit):
+    results = []
+    for chunk in chunks.values():
+        if chunk.category not in categories:
+            continue
+        score = _cosine(query, chunk.embedding)
+        if score > 0.0:
+            if chunk.metadata.get("importance") == "important":
+                score *= 1.1
+            results.append((score, chunk))
+    results.sort(reverse=True, key=lambda x: x[0])
+    return results[:limit]
+
+
+def _time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--legacy-max", type=int, default=100_000,
+                        help="skip the legacy loop above this many chunks")
+    args = parser.parse_args()
+
+    backend = "numpy" if np is not None else "pure-python"
+    print(f"backend={backend} dim={args.dim} limit={args.limit}")
+    print(f"{'chunks':>10} {'build(s)':>10} {'legacy(ms)':>12} {'index(ms)':>10} {'speedup':>8}")
+    query = [random.Random(42).uniform(-1.0, 1.0) for _ in range(args.dim)]
+    for n in args.sizes:
+        chunks = make_chunks(n, args.dim)
+        t0 = time.perf_counter()
+        index = EmbeddingIndex.build(chunks)
+        build_s = time.perf_counter() - t0
+        index_s = _time(lambda: index.search(query, CATEGORIES, limit=args.limit), args.repeat)
+        if n <= args.legacy_max:
+            legacy_s = _time(lambda: legacy_search(chunks, query, CATEGORIES, args.limit), 1)
+            legacy_ms = f"{legacy_s * 1000:12.1f}"
+            speedup = f"{legacy_s / index_s:7.1f}x"
+        else:
+            legacy_ms, speedup = f"{'skipped':>12}", f"{'-':>8}"
+        print(f"{n:>10} {build_s:>10.2f} {legacy_ms} {index_s * 1000:>10.2f} {speedup}")
+        del chunks, index
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_rag_store.py — RAG persistence: legacy rag_index.json vs RAGSegmentStore.
+
+Usage:
+    python3 scripts/bench_rag_store.py
+    python3 scripts/bench_rag_store.py --chunks 200000 --dim 768 --files 2000
+
+Builds a synthetic corpus of N chunks spread over F files and measures:
+  - incremental save   re-index one file (replace its chunks) and persist
+  - startup            read the index back into {id: Chunk}
+
+The legacy path is the pre-store behaviour (json.dumps(indent=2) of every
+chunk + embedding on each save, json.loads of everything at startup). The
+store path appends the changed file's chunks and loads metadata only;
+embeddings stay in the float32 sidecar until the first search.
+"""
+
+import argparse
+import json
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from core.rag_db import Chunk  # noqa: E402
+from core.rag_store import RAGSegmentStore  # noqa: E402
+
+
+def make_chunk(cid, source, dim, rng):
+    return Chunk(
+        id=cid, source_file=source, category="verilog", level=1 + rng.randrange(5),
+        chunk_type="always", content="always @(posedge clk) q <= d;" * 8,
+        start_line=1, end_line=8, embedding=[rng.uniform(-1, 1) for _ in range(dim)],
+        metadata={"module_name": source.rsplit("/", 1)[-1]},
+    )
+
+
+def make_corpus(n, files, dim, seed=0):
+    rng = random.Random(seed)
+    return {f"chunk_{i:08d}": make_chunk(f"chunk_{i:08d}", f"rtl/f{i % files}.sv", dim, rng)
+            for i in range(n)}
+
+
+def reindex_one_file(chunks, source, dim, seq):
+    rng = random.Random(seq)
+    old = [cid for cid, c in chunks.items() if c.source_file == source]
+    for cid in old:
+        del chunks[cid]
+    for k in range(len(old)):
+        cid = f"chunk_r{seq}_{k}"
+        chunks[cid] = make_chunk(cid, source, dim, rng)
+
+
+def legacy_save(path, chunks, hashes):
+    data = {"chunks": {cid: c.to_dict() for cid, c in chunks.items()}, "file_hashes": hashes}
+    path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def legacy_load(path):
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return {cid: Chunk.from_dict(d) for cid, d in data["chunks"].items()}
+
+
+def store_load(rag_dir):
+    store = RAGSegmentStore(rag_dir)
+    chunks = {cid: Chunk.from_dict(d) for cid, d in store.load_chunks().items()}
+    store.close()
+    return chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=50_000)
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--saves", type=int, default=5, help="incremental saves to average")
+    args = parser.parse_args()
+
+    work = Path(tempfile.mkdtemp(prefix="rag_store_bench_"))
+    try:
+        chunks = make_corpus(args.chunks, args.files, args.dim)
+        hashes = {f"rtl/f{i}.sv": f"h{i}" for i in range(args.files)}
+        legacy_path = work / "rag_index.json"
+        store_dir = work / "store"
+
+        legacy_save(legacy_path, chunks, hashes)
+        store = RAGSegmentStore(store_dir)
+        t0 = time.perf_counter()
+        store.sync(chunks, hashes)
+        initial_store_s = time.perf_counter() - t0
+
+        legacy_total = store_total = 0.0
+        for seq in range(args.saves):
+            source = f"rtl/f{seq % args.files}.sv"
+            reindex_one_file(chunks, source, args.dim, seq)
+            hashes[source] = f"h{source}-{seq}"
+            t0 = time.perf_counter()
+            legacy_save(legacy_path, chunks, hashes)
+            legacy_total += time.perf_counter() - t0
+            t0 = time.perf_counter()
+            store.sync(chunks, hashes)
+            store_total += time.perf_counter() - t0
+        store.close()
+
+        t0 = time.perf_counter()
+        legacy_load(legacy_path)
+        legacy_start = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        store_load(store_dir)
+        store_start = time.perf_counter() - t0
+
+        print(f"chunks={args.chunks} files={args.files} dim={args.dim}")
+        print(f"legacy json size : {legacy_path.stat().st_size / 1e6:10.1f} MB")
+        print(f"store initial    : {initial_store_s:10.3f} s (one-time bulk import)")
+        print(f"{'':17}{'legacy':>10} {'store':>10} {'speedup':>8}")
+        n = args.saves
+        print(f"{'incremental save':17}{legacy_total / n:>9.3f}s {store_total / n:>9.4f}s "
+              f"{legacy_total / max(store_total, 1e-9):>7.1f}x")
+        print(f"{'startup load':17}{legacy_start:>9.3f}s {store_start:>9.4f}s "
+              f"{legacy_start / max(store_start, 1e-9):>7.1f}x")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
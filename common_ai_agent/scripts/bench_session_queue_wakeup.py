@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_session_queue_wakeup.py — session_queue readers: 50 ms polling vs the queue doorbell.
+
+Usage:
+    python3 scripts/bench_session_queue_wakeup.py                    # 10, 100, 500 sessions
+    python3 scripts/bench_session_queue_wakeup.py --sessions 100 --messages 400
+
+Each (mode, sessions) pair runs in a fresh child process on a temp DB:
+  - N SessionWorker threads block in wait_matching(["prompt"]) and answer
+    every prompt with one out-row, like a worker starting a turn;
+  - one _MultiUserBridge (process mode, a manager that reports the N
+    sessions as active) delivers out-rows through next_event().
+
+Measured:
+  - idle CPU   process CPU time / wall time over --idle seconds with no
+               traffic (the cost of waiting);
+  - in  p50/p99   prompt enqueue → worker wait_matching returns it;
+  - out p50/p99   worker enqueue → bridge next_event returns the event.
+
+Modes: poll (ATLAS_QUEUE_DOORBELL=false: the 50 ms worker sleep and the
+10 ms bridge sweep) and doorbell (core.queue_doorbell). Every session
+shares one DB here (central runtime-DB mode).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+
+def _pct(values, q):
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)] * 1e3 if values else float("nan")
+
+
+def run_child(db_path, sessions, messages, idle_s):
+    from core import atlas_multiuser, session_worker
+    from core.session_process_manager import SessionProcessManager
+
+    ids = [f"bench/s{i}/IP/wf" for i in range(sessions)]
+    in_lat, out_lat = [], []
+    ready = threading.Barrier(sessions + 1)
+
+    def worker(sid):
+        w = session_worker.SessionWorker(sid, db_path)
+        ready.wait()
+        while True:
+            msg = w.wait_matching(["prompt"])
+            payload = session_worker._decode_payload(msg.get("payload"))
+            if payload.get("quit"):
+                return
+            in_lat.append(time.perf_counter() - payload["sent"])
+            w.emit("agent_state", {"running": True, "sent": time.perf_counter()})
+
+    class _Manager(SessionProcessManager):
+        def list_active(self):
+            return list(ids)
+
+        def cleanup_zombies(self):
+            return []
+
+    bridge = atlas_multiuser._MultiUserBridge()
+    bridge._process_manager = _Manager(db_path=db_path)
+    for sid in ids:
+        threading.Thread(target=worker, args=(sid,), daemon=True).start()
+    ready.wait()
+
+    stop = threading.Event()
+    delivered = threading.Semaphore(0)
+
+    def pump():
+        async def loop():
+            while not stop.is_set():
+                event, _ = await bridge.next_event()
+                if event and event.get("type") == "agent_state" and "sent" in event:
+                    out_lat.append(time.perf_counter() - event["sent"])
+                    delivered.release()
+        asyncio.run(loop())
+
+    threading.Thread(target=pump, daemon=True).start()
+    time.sleep(1.0)  # let every reader settle into its wait
+
+    usage = os.times()
+    wall = time.perf_counter()
+    time.sleep(idle_s)
+    cpu = (os.times().user - usage.user) + (os.times().system - usage.system)
+    idle_cpu = cpu / (time.perf_counter() - wall) * 100
+
+    db = session_worker.AtlasDB(db_path)
+    rng = random.Random(0)
+    for _ in range(messages):
+        sid = rng.choice(ids)
+        db.enqueue_message(sid, "in", "prompt", {"sent": time.perf_counter()})
+        time.sleep(0.01)
+    for _ in range(messages):
+        delivered.acquire(timeout=30)
+    stop.set()
+    print(json.dumps({"idle_cpu": idle_cpu, "in": in_lat, "out": out_lat}))
+    sys.stdout.flush()
+    os._exit(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--idle", type=float, default=3.0, help="idle window in seconds")
+    parser.add_argument("--child", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        db_path, sessions, messages, idle_s = args.child
+        run_child(db_path, int(sessions), int(messages), float(idle_s))
+        return
+
+    work = Path(tempfile.mkdtemp(prefix="queue_bench_"))
+    try:
+        print(f"{'sessions':>8} {'mode':9}{'idle CPU':>10}{'in p50':>10}{'in p99':>10}"
+              f"{'out p50':>10}{'out p99':>10}")
+        for n in args.sessions:
+            for mode in ("poll", "doorbell"):
+                env = dict(os.environ, ATLAS_QUEUE_DOORBELL="true" if mode == "doorbell" else "false",
+                           ATLAS_QUEUE_DOORBELL_DIR=str(work / "bell"))
+                db_path = work / f"{mode}-{n}.db"
+                out = subprocess.run(
+                    [sys.executable, __file__, "--child", str(db_path), str(n), str(args.messages),
+                     str(args.idle)],
+                    capture_output=True, text=True, check=True, env=env).stdout
+                r = json.loads(out.strip().splitlines()[-1])
+                print(f"{n:>8} {mode:9}{r['idle_cpu']:>9.1f}%"
+                      f"{_pct(r['in'], .5):>8.1f}ms{_pct(r['in'], .99):>8.1f}ms"
+                      f"{_pct(r['out'], .5):>8.1f}ms{_pct(r['out'], .99):>8.1f}ms", flush=True)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
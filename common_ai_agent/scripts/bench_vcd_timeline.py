@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_vcd_timeline.py — core/vcd_timeline.load: whole-file tuples vs streaming arrays.
+
+Usage:
+    python3 scripts/bench_vcd_timeline.py                  # 1 GB synthetic VCD
+    python3 scripts/bench_vcd_timeline.py --mb 128 --signals 500
+    python3 scripts/bench_vcd_timeline.py --vcd path/to/dump.vcd
+
+Writes a synthetic VCD (a clock plus random scalar and bus signals) and, in
+a fresh child process per mode, measures parse time, peak RSS, value_at and
+edges latency:
+  - legacy    the old loader: read_text + per-signal [(time, value)] lists,
+              linear value_at, edges recomputed per call (skipped above
+              --legacy-max-mb, where it needs many times the file size in RAM)
+  - stream    vcd_timeline.load(path)
+  - filtered  vcd_timeline.load(path, signals=[clk, one bus])
+"""
+
+import argparse
+import json
+import random
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+
+def _ident(i):
+    chars = [chr(c) for c in range(33, 127)]
+    out = ""
+    i += 1
+    while i:
+        i, r = divmod(i - 1, len(chars))
+        out += chars[r]
+    return out
+
+
+def write_vcd(path, mb, signals, seed=0):
+    rng = random.Random(seed)
+    ids = [_ident(i) for i in range(signals)]
+    with open(path, "w", encoding="ascii") as f:
+        f.write("$timescale 1ns $end\n$scope module tb $end\n")
+        f.write(f"$var wire 1 {ids[0]} clk $end\n")
+        for i in range(1, signals):
+            width = 1 if i % 3 else 16
+            f.write(f"$var wire {width} {ids[i]} s{i} $end\n")
+        f.write("$upscope $end\n$enddefinitions $end\n")
+        limit = mb << 20
+        t = 0
+        clk = 0
+        buf = []
+        written = 0
+        while written < limit:
+            t += 5
+            clk ^= 1
+            buf.append(f"#{t}\n{clk}{ids[0]}\n")
+            for i in rng.sample(range(1, signals), min(8, signals - 1)):
+                if i % 3:
+                    buf.append(f"{rng.getrandbits(1)}{ids[i]}\n")
+                else:
+                    buf.append(f"b{rng.getrandbits(16):016b} {ids[i]}\n")
+            if len(buf) > 4096:
+                chunk = "".join(buf)
+                f.write(chunk)
+                written += len(chunk)
+                buf.clear()
+        f.write("".join(buf))
+    return t
+
+
+# ── the loader before streaming (kept here for comparison) ───────────
+def legacy_load(path):
+    text = Path(path).read_text(encoding="utf-8", errors="replace")
+    by_full, changes = {}, {}
+    scope, in_defs, cur_t = [], True, 0
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        if in_defs:
+            if line.startswith("$scope"):
+                scope.append(line.split()[2])
+            elif line.startswith("$upscope"):
+                scope.pop()
+            elif line.startswith("$var"):
+                m = re.search(r"\$var\s+\w+\s+(\d+)\s+(\S+)\s+(.+?)\s*\$end", line)
+                by_full[".".join(scope + [m.group(3)]).lower()] = m.group(2)
+            elif line.startswith("$enddefinitions"):
+                in_defs = False
+            continue
+        c0 = line[0]
+        if c0 == "#":
+            cur_t = int(line[1:])
+            continue
+        if c0 == "$":
+            continue
+        if c0 in "bBrR":
+            val, vid = line.split(" ", 1)
+        else:
+            val, vid = c0, line[1:]
+        changes.setdefault(vid, []).append((cur_t, val))
+    return by_full, changes
+
+
+def legacy_value_at(series, t):
+    val = None
+    for ct, v in series:
+        if ct > t:
+            break
+        val = v
+    return val
+
+
+def legacy_edges(series):
+    out, prev = [], None
+    for t, v in series:
+        if prev is not None and prev != "1" and v == "1":
+            out.append(t)
+        prev = v
+    return out
+
+
+def run_child(mode, path, t_end, bus):
+    rng = random.Random(1)
+    probes = [rng.randrange(t_end) for _ in range(200)]
+    t0 = time.perf_counter()
+    if mode == "legacy":
+        by_full, changes = legacy_load(path)
+        parse_s = time.perf_counter() - t0
+        clk, data = changes[by_full["tb.clk"]], changes[by_full[f"tb.{bus}"]]
+        t0 = time.perf_counter()
+        for t in probes:
+            legacy_value_at(data, t)
+        value_us = (time.perf_counter() - t0) / len(probes) * 1e6
+        timings = []
+        for _ in range(2):
+            t0 = time.perf_counter()
+            legacy_edges(clk)
+            timings.append(time.perf_counter() - t0)
+        changes_n = sum(len(v) for v in changes.values())
+    else:
+        from core import vcd_timeline
+        signals = ["tb.clk", f"tb.{bus}"] if mode == "filtered" else None
+        tl = vcd_timeline.load(path, signals=signals)
+        parse_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for t in probes:
+            tl.value_at(f"tb.{bus}", t)
+        value_us = (time.perf_counter() - t0) / len(probes) * 1e6
+        timings = []
+        for _ in range(2):
+            t0 = time.perf_counter()
+            tl.edges("tb.clk", "rising")
+            timings.append(time.perf_counter() - t0)
+        changes_n = tl.change_count()
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"parse_s": parse_s, "rss_mb": rss_mb, "value_at_us": value_us,
+                      "edges_first_ms": timings[0] * 1e3, "edges_again_ms": timings[1] * 1e3,
+                      "changes": changes_n}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mb", type=int, default=1024, help="synthetic VCD size")
+    parser.add_argument("--signals", type=int, default=200)
+    parser.add_argument("--vcd", help="benchmark an existing VCD (expects tb.clk and tb.s3)")
+    parser.add_argument("--legacy-max-mb", type=int, default=256)
+    parser.add_argument("--child", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, path, t_end, bus = args.child
+        run_child(mode, path, int(t_end), bus)
+        return
+
+    work = Path(tempfile.mkdtemp(prefix="vcd_bench_"))
+    try:
+        if args.vcd:
+            path = Path(args.vcd)
+            t_end = 10 ** 6
+        else:
+            path = work / "synthetic.vcd"
+            t0 = time.perf_counter()
+            t_end = write_vcd(path, args.mb, args.signals)
+            print(f"generated {path.stat().st_size / 2**20:.0f} MB in {time.perf_counter() - t0:.1f}s")
+        size_mb = path.stat().st_size / 2**20
+        modes = ["stream", "filtered"]
+        if size_mb <= args.legacy_max_mb:
+            modes.insert(0, "legacy")
+        else:
+            print(f"legacy skipped ({size_mb:.0f} MB > --legacy-max-mb {args.legacy_max_mb})")
+
+        print(f"{'mode':9}{'parse':>9}{'peak RSS':>11}{'value_at':>11}{'edges':>10}{'edges 2nd':>11}{'changes':>12}")
+        for mode in modes:
+            out = subprocess.run([sys.executable, __file__, "--child", mode, str(path), str(t_end), "s3"],
+                                 capture_output=True, text=True, check=True).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print(f"{mode:9}{r['parse_s']:>8.1f}s{r['rss_mb']:>8.0f} MB{r['value_at_us']:>8.1f} us"
+                  f"{r['edges_first_ms']:>7.1f} ms{r['edges_again_ms']:>8.3f} ms{r['changes']:>12}")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
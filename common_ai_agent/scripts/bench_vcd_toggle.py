@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_vcd_toggle.py — regression toggle coverage: merge-then-parse vs toggle_many.
+
+Usage:
+    python3 scripts/bench_vcd_toggle.py                       # 300 seeds × 1 MB
+    python3 scripts/bench_vcd_toggle.py --seeds 100 --mb 4 --jobs 8
+
+Writes --seeds synthetic dumps of one DUT (a clock, scalar nets and 16-bit
+buses with sparse one-hot activity) and times:
+  - merge+parse  vcd_merge.merge_concat to a merged VCD, then
+                 vcd_toggle.parse_vcd + summarize (the /coverage-vcd-merge →
+                 /coverage-vcd-toggle flow)
+  - many j=1     vcd_toggle.toggle_many, in process
+  - many j=N     vcd_toggle.toggle_many over a --jobs process pool
+and checks all three summaries are identical.
+"""
+
+import argparse
+import importlib.util
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+ADAPTERS = REPO_ROOT / "workflow" / "coverage" / "adapters"
+
+
+def _load(name):
+    spec = importlib.util.spec_from_file_location(name, ADAPTERS / f"{name}.py")
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def _ident(i):
+    chars = [chr(c) for c in range(33, 127)]
+    out = ""
+    i += 1
+    while i:
+        i, r = divmod(i - 1, len(chars))
+        out += chars[r]
+    return out
+
+
+def write_seed(path, kb, signals, seed):
+    rng = random.Random(seed)
+    ids = [_ident(i) for i in range(signals)]
+    head = ["$timescale 1ns $end", "$scope module tb $end", f"$var wire 1 {ids[0]} clk $end"]
+    for i in range(1, signals):
+        head.append(f"$var wire {1 if i % 4 else 16} {ids[i]} s{i} $end")
+    head += ["$upscope $end", "$enddefinitions $end", "$dumpvars"]
+    head += [f"0{ids[i]}" if i % 4 else f"b0 {ids[i]}" for i in range(signals)]
+    body = ["\n".join(head), "$end"]
+    size, t, clk = 0, 0, 0
+    while size < kb << 10:
+        t += 5
+        clk ^= 1
+        lines = [f"#{t}", f"{clk}{ids[0]}"]
+        for i in rng.sample(range(1, signals), min(4, signals - 1)):
+            if i % 4:
+                lines.append(f"{rng.getrandbits(1)}{ids[i]}")
+            else:
+                lines.append(f"b{1 << rng.randrange(16):b} {ids[i]}")
+        chunk = "\n".join(lines)
+        size += len(chunk) + 1
+        body.append(chunk)
+    Path(path).write_text("\n".join(body) + "\n", encoding="ascii")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seeds", type=int, default=300)
+    parser.add_argument("--mb", type=float, default=1.0, help="size of each seed dump")
+    parser.add_argument("--signals", type=int, default=400)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    vcd_toggle = _load("vcd_toggle")
+    vcd_merge = _load("vcd_merge")
+    work = Path(tempfile.mkdtemp(prefix="vcd_toggle_bench_"))
+    try:
+        paths = [str(work / f"seed{s:04d}.vcd") for s in range(args.seeds)]
+        t0 = time.perf_counter()
+        for s, p in enumerate(paths):
+            write_seed(p, int(args.mb * 1024), args.signals, s)
+        total = sum(os.path.getsize(p) for p in paths)
+        print(f"generated {args.seeds} dumps, {total / 2**20:.0f} MB in {time.perf_counter() - t0:.1f}s"
+              f" ({os.cpu_count()} CPUs)")
+
+        merged = work / "merged.vcd"
+        t0 = time.perf_counter()
+        vcd_merge.merge_concat(paths, str(merged))
+        ref = vcd_toggle.summarize(vcd_toggle.parse_vcd(str(merged)))
+        legacy_s = time.perf_counter() - t0
+        print(f"{'merge+parse':12}{legacy_s:>8.1f}s   extra disk {merged.stat().st_size / 2**20:.0f} MB")
+        merged.unlink()
+
+        for jobs in sorted({1, args.jobs}):
+            t0 = time.perf_counter()
+            got = vcd_toggle.summarize(vcd_toggle.toggle_many(paths, jobs=jobs))
+            took = time.perf_counter() - t0
+            status = "match" if got == ref else "MISMATCH"
+            print(f"{f'many j={jobs}':12}{took:>8.1f}s   {legacy_s / took:.1f}x   {status}"
+                  f"   ({got['toggled_bits']}/{got['total_bits']} bits)")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 """ATLAS VCD API — extracted from atlas_ui.py.
 
 Second step of the gradual atlas_ui.py decomposition: pull the
-self-contained `/api/vcd/*` routes (list, raw) into their own module.
+self-contained `/api/vcd/*` routes (list, raw, window) into their own module.
 The host (atlas_ui.py) wires routes via `register_vcd_routes` and
 injects callables/values for runtime state (PROJECT_ROOT, _safe,
 SKIP_DIRS, MAX_VCD_BYTES) so this module never reaches into the host's
@@ -19,6 +19,8 @@ from typing import Any, Callable
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
+from core.vcd_index import open_timeline
+from core.vcd_window import query_window
 from src.atlas_api_files import AtlasContext
 from src.atlas_vcd_conversion import list_waveform_vcd_entries, read_vcd_target
 
@@ -389,3 +391,46 @@ def register_vcd_routes(
         except OSError as e:
             return JSONResponse({"error": str(e)}, status_code=500)
         return JSONResponse(payload, status_code=status_code)
+
+    @app.get("/api/vcd/window")
+    async def api_vcd_window(
+        request: Request,
+        path: str,
+        signals: str = "",
+        t0: int | None = None,
+        t1: int | None = None,
+        width: int = 1000,
+        session_id: str = "",
+        session: str = "",
+    ):
+        """Value changes of `signals` (comma-separated) within [t0, t1].
+
+        At most ~`width` entries per signal come back: exact changes when
+        the window is sparse, min/max per pixel column when it is dense (see
+        core/vcd_window.py). The VCD is parsed once into the shared timeline
+        cache / sidecar index, so zoom and pan never re-read the dump and
+        are not limited by max_vcd_bytes.
+        """
+        target, root, context, rel_path = _target_for_session(path, session_id or session)
+        denied = _gate_context_path(request, rel_path or path, context)
+        if denied is not None:
+            return denied
+        names = [s.strip() for s in signals.split(",") if s.strip()][:64]
+        if not names:
+            return JSONResponse({"error": "signals required"}, status_code=400)
+
+        def _work():
+            if target is None or not target.is_file():
+                return 404, {"error": "not found"}
+            conversion, vcd_target = read_vcd_target(root.resolve(), target)
+            if vcd_target is None:
+                status = 503 if conversion.status in {"converter_missing", "conversion_timeout"} else 400
+                return status, {"error": conversion.status, "message": conversion.message}
+            payload = query_window(open_timeline(vcd_target), names, t0, t1, width)
+            payload["path"] = _rel(root, vcd_target) or path
+            return 200, payload
+        try:
+            status_code, payload = await asyncio.to_thread(_work)
+        except OSError as e:
+            return JSONResponse({"error": str(e)}, status_code=500)
+        return JSONResponse(payload, status_code=status_code)
@@ -42,6 +42,16 @@ def _cache_path(root: Path, fst_path: Path) -> Path:
     return _cache_dir(fst_path) / f"{fst_path.stem}-{digest}.vcd"
 
 
+def index_cache_path(vcd_path: Path) -> Path:
+    """Sidecar waveform index for *vcd_path* (see core/vcd_index.py).
+
+    Lives in the same ``.wave_cache`` directory as FST→VCD conversions, keyed
+    by the VCD's absolute path so same-named dumps never collide.
+    """
+    digest = hashlib.sha1(str(vcd_path.resolve()).encode("utf-8")).hexdigest()[:12]
+    return _cache_dir(vcd_path) / f"{vcd_path.stem}-{digest}.vcdidx"
+
+
 def _fresh(cache: Path, source: Path) -> bool:
     return cache.is_file() and cache.stat().st_size > 0 and cache.stat().st_mtime >= source.stat().st_mtime
 
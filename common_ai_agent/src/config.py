@@ -1275,6 +1275,13 @@ if USE_OPENCODE_OAUTH and not (CURSOR_AGENT_ENABLE or CLAUDE_CLI_ENABLE):
 TPM_LIMIT = int(os.getenv("TPM_LIMIT", "0"))
 RPM_LIMIT = int(os.getenv("RPM_LIMIT", "0"))
 
+# Share the TPM/RPM window between every process on this host that talks to
+# the same BASE_URL + API_KEY (session workers, parallel todo workers, the web
+# server) through a small SQLite file. false = each process enforces the full
+# limits on its own, which overshoots the provider quota with many sessions.
+RATE_LIMIT_SHARED = os.getenv("RATE_LIMIT_SHARED", "true").lower() in ("true", "1", "yes")
+RATE_LIMIT_DB_PATH = os.getenv("RATE_LIMIT_DB_PATH", "~/.common_ai_agent/rate_limit.db")
+
 # Legacy: fixed delay (seconds) between API calls. Ignored when TPM/RPM > 0.
 # Set to 0 to disable.
 RATE_LIMIT_DELAY = float(os.getenv("RATE_LIMIT_DELAY", "5"))
@@ -1348,6 +1355,12 @@ REACT_LOOP_STALL_SEC = int(os.getenv("REACT_LOOP_STALL_SEC", "900"))
 # idle window avoids reusing an already-dead socket. 0 disables expiry.
 LLM_CONN_MAX_IDLE_SEC = int(os.getenv("LLM_CONN_MAX_IDLE_SEC", "45"))
 
+# Keep-alive connections pooled per API host. Concurrent calls from one
+# process (parallel todo workers, sub-agents) each lease their own connection
+# instead of tearing down a shared one; calls beyond the pool size still run,
+# on a connection that is closed afterwards.
+LLM_CONN_POOL_SIZE = int(os.getenv("LLM_CONN_POOL_SIZE", "8"))
+
 # Bound the pre-stream phase (connect + send + wait for response headers).
 # Headers (200 OK + content-type) arrive before the model starts generating, so
 # this can be far shorter than STREAM_API_TIMEOUT. Without it, a dropped/half-open
@@ -1814,6 +1827,12 @@ EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
 _emb_dim_env = os.getenv("EMBEDDING_DIMENSION")
 EMBEDDING_DIMENSION = int(_emb_dim_env) if _emb_dim_env else None
 
+# Persistent embedding cache shared by RAG, GraphLite and memory notes
+# (SQLite, keyed by model + dimension + sha256 of the text; LRU-evicted).
+# Enabled by RAG_ENABLE_PERSISTENT_CACHE.
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "~/.common_ai_agent/embedding_cache.db")
+EMBEDDING_CACHE_MAX_MB = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "512"))
+
 # ============================================================
 # Memory System Configuration
 # ============================================================
@@ -1927,6 +1946,11 @@ RAG_RATE_LIMIT_DELAY_MS = int(os.getenv("RAG_RATE_LIMIT_DELAY_MS", "100"))
 # Default: "~/.rag" (stored in home directory, not project dir)
 RAG_DIR = os.getenv("RAG_DIR", "~/.rag")
 
+# Watch indexed files with inotify (Linux) so each search only re-checks files
+# written since the previous one. Off: every indexed file is stat()ed per
+# search (and hashed only when its mtime/size/inode changed).
+RAG_WATCH_FILES = os.getenv("RAG_WATCH_FILES", "false").lower() in ("true", "1", "yes")
+
 # RAG config file path (.ragconfig location)
 # Default: None (uses RAG_DIR/.ragconfig)
 # Set to project .ragconfig path for project-specific indexing patterns
@@ -1943,7 +1967,11 @@ RAG_CHUNK_OVERLAP = int(os.getenv("RAG_CHUNK_OVERLAP", "200"))
 # Batch size for embedding API calls
 RAG_EMBEDDING_BATCH_SIZE = int(os.getenv("RAG_EMBEDDING_BATCH_SIZE", "50"))
 
-# Enable persistent caching (SQLite)
+# Embedding batch requests kept in flight concurrently during rag_index
+# (each still paced by RAG_RATE_LIMIT_DELAY_MS)
+RAG_EMBEDDING_MAX_IN_FLIGHT = int(os.getenv("RAG_EMBEDDING_MAX_IN_FLIGHT", "4"))
+
+# Enable persistent embedding caching (SQLite, see EMBEDDING_CACHE_PATH)
 RAG_ENABLE_PERSISTENT_CACHE = os.getenv("RAG_ENABLE_PERSISTENT_CACHE", "true").lower() in ("true", "1", "yes")
 
 # Search Algorithm: 'vector', 'hybrid_simple', 'hybrid_rrf'
@@ -2164,6 +2192,11 @@ ATLAS_CHAT_FEED_SUMMARY = _env_bool("ATLAS_CHAT_FEED_SUMMARY", "true")
 # SIM_DEBUG_ELAB_BACKEND env var or this config value.
 SIM_DEBUG_ELAB_BACKEND = os.getenv("SIM_DEBUG_ELAB_BACKEND", "dual").lower()
 
+# Memory budget (MB) for parsed VCD timelines kept between sim_debug queries
+# and /api/vcd window requests. Each VCD also gets an on-disk index in
+# <ip>/sim/.wave_cache so other processes skip the parse.
+SIM_DEBUG_TIMELINE_CACHE_MB = int(os.getenv("SIM_DEBUG_TIMELINE_CACHE_MB", "512"))
+
 # ============================================================
 # Phase 4: Autonomous Decision-Making
 # ============================================================
@@ -8,8 +8,10 @@ OpenCode-Inspired Features:
 - Agent-aware API calls
 - Dynamic model switching
 """
+import hashlib
 import json
 import socket
+import sqlite3
 import ssl
 import http.client
 import urllib.request
@@ -36,6 +38,7 @@ sys.path.insert(0, os.path.join(_project_root, 'vendor'))
 import config
 from display import Color
 from text_utils import strip_metadata_tokens as _strip_metadata_tokens
+import token_counter
 
 # --- Global Token Tracking ---
 # Stores actual token counts from API responses
@@ -46,11 +49,6 @@ last_output_tokens = 0  # Last reported output tokens from API
 _last_debug_prompt_text = ""
 _last_debug_messages = None
 
-_DATA_IMAGE_RE = re.compile(
-    r"data:image/[A-Za-z0-9.+-]+(?:;[A-Za-z0-9=.+-]+)*;base64,[A-Za-z0-9+/=\r\n]+"
-)
-_RESIZED_IMAGE_BYTES_ESTIMATE = 7373
-
 
 def get_active_model() -> str:
     """Return the display name for the currently active LLM backend.
@@ -225,18 +223,157 @@ class _RateLimiter:
             }
 
 
+class _SharedRateLimiter(_RateLimiter):
+    """
+    Host-wide variant of _RateLimiter: the sliding window lives in a small
+    SQLite file, so every process using the same endpoint + key (session
+    workers, ParallelTodoDispatcher workers, the web server) draws from ONE
+    TPM/RPM budget instead of each enforcing the full quota alone.
+
+    acquire() claims its slot inside a BEGIN IMMEDIATE transaction: purge
+    expired rows, check the budget, insert (ts, estimate). When the request
+    does not fit it commits, sleeps until enough of the window expires and
+    checks again (other processes may have taken the room meanwhile).
+    update_actual_usage() rewrites this thread's last row with the real count.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS rate_window (
+            id INTEGER PRIMARY KEY,
+            scope TEXT NOT NULL,
+            ts REAL NOT NULL,
+            tokens INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_rate_window_scope_ts ON rate_window(scope, ts);
+    """
+
+    def __init__(self, tpm: int = 0, rpm: int = 0, window_s: float = 60.0,
+                 path: str = "", scope: str = "default"):
+        super().__init__(tpm=tpm, rpm=rpm, window_s=window_s)
+        self.path = os.path.expanduser(path)
+        self.scope = scope
+        self._conn = None
+        self._conn_pid = 0
+        self._last_row = threading.local()
+
+    def _db(self):
+        if self._conn is None or self._conn_pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self._SCHEMA)
+            self._conn, self._conn_pid = conn, os.getpid()
+        return self._conn
+
+    def _wait_needed(self, conn, now: float, est: int) -> float:
+        """Seconds until (1 request, est tokens) fits; 0 when it fits now."""
+        start = now - self._window
+        conn.execute("DELETE FROM rate_window WHERE scope = ? AND ts < ?", (self.scope, start))
+        used, reqs = conn.execute(
+            "SELECT COALESCE(SUM(tokens), 0), COUNT(*) FROM rate_window WHERE scope = ?",
+            (self.scope,),
+        ).fetchone()
+        wait_s = 0.0
+        # A single request larger than the whole budget runs on an empty window.
+        if self.tpm > 0 and used > 0 and used + est > self.tpm:
+            need = used + est - self.tpm
+            freed = 0
+            for ts, tokens in conn.execute(
+                "SELECT ts, tokens FROM rate_window WHERE scope = ? ORDER BY ts", (self.scope,)
+            ):
+                freed += tokens
+                if freed >= need:
+                    wait_s = max(wait_s, ts + self._window - now)
+                    break
+        if self.rpm > 0 and reqs >= self.rpm:
+            row = conn.execute(
+                "SELECT ts FROM rate_window WHERE scope = ? ORDER BY ts LIMIT 1 OFFSET ?",
+                (self.scope, reqs - self.rpm),
+            ).fetchone()
+            wait_s = max(wait_s, row[0] + self._window - now)
+        return wait_s
+
+    def acquire(self, estimated_tokens: Optional[int] = None):
+        if not self.active:
+            return
+        est = estimated_tokens if estimated_tokens is not None else self._default_token_estimate
+        while True:
+            with self._lock:
+                conn = self._db()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    now = time.time()
+                    wait_s = self._wait_needed(conn, now, est)
+                    if wait_s <= 0:
+                        cur = conn.execute(
+                            "INSERT INTO rate_window (scope, ts, tokens) VALUES (?, ?, ?)",
+                            (self.scope, now, est),
+                        )
+                        self._last_row.id = cur.lastrowid
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            if wait_s <= 0:
+                return
+            wait_s = min(wait_s + 0.1, 65.0)  # same slack as _RateLimiter
+            if config.DEBUG_MODE:
+                print(Color.info(f"[RateLimiter] Waiting {wait_s:.1f}s (shared window {self.scope})"))
+            time.sleep(wait_s)
+
+    def update_actual_usage(self, actual_tokens: int):
+        if not self.active:
+            return
+        row_id = getattr(self._last_row, "id", None)
+        with self._lock:
+            if row_id is not None:
+                self._db().execute("UPDATE rate_window SET tokens = ? WHERE id = ?",
+                                   (int(actual_tokens), row_id))
+            old = self._default_token_estimate
+            self._default_token_estimate = int(0.7 * actual_tokens + 0.3 * old)
+
+    def status(self) -> dict:
+        with self._lock:
+            used, reqs = self._db().execute(
+                "SELECT COALESCE(SUM(tokens), 0), COUNT(*) FROM rate_window "
+                "WHERE scope = ? AND ts >= ?",
+                (self.scope, time.time() - self._window),
+            ).fetchone()
+        return {
+            "tpm_limit": self.tpm,
+            "rpm_limit": self.rpm,
+            "tokens_used": used,
+            "requests_used": reqs,
+            "window_s": self._window,
+            "shared": self.path,
+        }
+
+
 # Module-level singleton — initialized lazily from config
 _rate_limiter: Optional[_RateLimiter] = None
 
 
+def _rate_limit_scope() -> str:
+    """Quotas belong to an endpoint + API key; hash them, never store the key."""
+    raw = f"{getattr(config, 'BASE_URL', '')}|{getattr(config, 'API_KEY', '')}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
 def get_rate_limiter() -> _RateLimiter:
     """Get or create the global rate limiter singleton."""
     global _rate_limiter
     if _rate_limiter is None:
-        _rate_limiter = _RateLimiter(
-            tpm=getattr(config, 'TPM_LIMIT', 0),
-            rpm=getattr(config, 'RPM_LIMIT', 0),
-        )
+        tpm = getattr(config, 'TPM_LIMIT', 0)
+        rpm = getattr(config, 'RPM_LIMIT', 0)
+        shared_path = getattr(config, 'RATE_LIMIT_DB_PATH', '')
+        if (tpm > 0 or rpm > 0) and getattr(config, 'RATE_LIMIT_SHARED', False) and shared_path:
+            _rate_limiter = _SharedRateLimiter(
+                tpm=tpm, rpm=rpm, path=shared_path, scope=_rate_limit_scope(),
+            )
+        else:
+            _rate_limiter = _RateLimiter(tpm=tpm, rpm=rpm)
     return _rate_limiter
 
 
@@ -505,21 +642,25 @@ class LLMCallRecord:
     decode_s: float      # generation time after first token (0 for nonstream)
     total_s: float
     timestamp: float
+    est_input_tokens: int = 0  # offline estimate of the prompt (token_counter)
 
 _call_log: list = []     # List[LLMCallRecord]
 
 def _record_call(caller: str, model: str, in_tok: int, out_tok: int,
-                 connect_s: float, ttft_s: float, decode_s: float, total_s: float) -> None:
+                 connect_s: float, ttft_s: float, decode_s: float, total_s: float,
+                 est_in_tok: int = 0) -> None:
     record = LLMCallRecord(
         caller=caller, model=model,
         input_tokens=in_tok, output_tokens=out_tok,
         connect_s=connect_s, ttft_s=ttft_s, decode_s=decode_s, total_s=total_s,
-        timestamp=time.time(),
+        timestamp=time.time(), est_input_tokens=est_in_tok,
     )
     _call_log.append(record)
     if getattr(config, "PERF_TRACKING", False):
         _fk = lambda n: f"{n/1000:.1f}k" if n >= 1000 else str(n)
         tok_str = f"in={_fk(in_tok)} out={_fk(out_tok)}" if in_tok else ""
+        if in_tok and est_in_tok:
+            tok_str += f" est={_fk(est_in_tok)} ({token_counter.error_pct(est_in_tok, in_tok):+.0f}%)"
         print(f"  \033[2m[PERF/call] {caller} | {model} | "
               f"connect={connect_s:.3f}s ttft={ttft_s:.3f}s decode={decode_s:.3f}s "
               f"total={total_s:.3f}s {tok_str}\033[0m")
@@ -537,25 +678,35 @@ def print_call_summary() -> None:
     groups: dict = defaultdict(list)
     for r in _call_log:
         groups[r.caller].append(r)
-    print(f"\n  {'Caller':<20} {'Calls':>5} {'total avg':>10} {'ttft avg':>10} {'in avg':>10} {'out avg':>10}")
-    print(f"  {'─'*70}")
+    print(f"\n  {'Caller':<20} {'Calls':>5} {'total avg':>10} {'ttft avg':>10} {'in avg':>10} {'out avg':>10} {'est err':>8}")
+    print(f"  {'─'*79}")
     for caller, recs in sorted(groups.items()):
         n = len(recs)
         avg_total = sum(r.total_s for r in recs) / n
         avg_ttft  = sum(r.ttft_s  for r in recs) / n
         avg_in    = sum(r.input_tokens  for r in recs) / n
         avg_out   = sum(r.output_tokens for r in recs) / n
+        # Mean |estimate - usage| / usage over calls that reported usage.
+        errs = [abs(token_counter.error_pct(r.est_input_tokens, r.input_tokens))
+                for r in recs if r.est_input_tokens and r.input_tokens]
+        err_str = f"{sum(errs) / len(errs):.0f}%" if errs else "-"
         _fk = lambda v: f"{v/1000:.1f}k" if v >= 1000 else f"{v:.0f}"
-        print(f"  {caller:<20} {n:>5} {avg_total:>9.3f}s {avg_ttft:>9.3f}s {_fk(avg_in):>10} {_fk(avg_out):>10}")
+        print(f"  {caller:<20} {n:>5} {avg_total:>9.3f}s {avg_ttft:>9.3f}s {_fk(avg_in):>10} {_fk(avg_out):>10} {err_str:>8}")
     total_s = sum(r.total_s for r in _call_log)
-    print(f"  {'─'*70}")
+    print(f"  {'─'*79}")
     print(f"  {'TOTAL':<20} {len(_call_log):>5} {total_s:>9.3f}s\n")
 
 # --- Persistent HTTPS Connection Pool ---
 # Reuses TCP+SSL connections across LLM calls to avoid per-call handshake overhead.
+# Each call leases a connection for its request and response; the lease ends
+# when the response is fully read (HTTPResponse.isclosed()), so concurrent
+# streams in one process use separate keep-alive connections (up to
+# LLM_CONN_POOL_SIZE per host) instead of fighting over one.
 _ssl_ctx_cache: Optional[ssl.SSLContext] = None
-_http_conn_pool: Dict[str, http.client.HTTPSConnection] = {}
+_http_conn_pool: Dict[str, http.client.HTTPConnection] = {}  # host -> primary connection
+_http_conn_spares: Dict[str, List[http.client.HTTPConnection]] = {}  # host -> extra connections
 _http_conn_last_used: Dict[str, float] = {}  # host -> last successful use epoch; for idle-expiry
+_http_pool_lock = threading.Lock()
 _last_post_reused: bool = False  # set by _persistent_post; read by PERF logging
 _active_stream_response = None   # current streaming response; closed by cancel_current_stream()
 _stream_cancelled = False        # set by cancel_current_stream(); prevents retry loop
@@ -578,6 +729,15 @@ def cancel_current_stream() -> None:
         except Exception:
             pass
     _http_conn_pool.clear()
+    # Spares leased by other threads' calls stay open; idle ones go.
+    with _http_pool_lock:
+        for host, spares in list(_http_conn_spares.items()):
+            for conn in [c for c in spares if not _conn_in_use(c)]:
+                spares.remove(conn)
+                try:
+                    conn.close()
+                except Exception:
+                    pass
 
 
 def _get_or_create_ssl_ctx() -> ssl.SSLContext:
@@ -613,6 +773,60 @@ def _make_https_conn(host: str, timeout: int = 10) -> http.client.HTTPSConnectio
     return conn
 
 
+def _make_conn(scheme: str, host: str, timeout: int = 10) -> http.client.HTTPConnection:
+    """HTTPS via _make_https_conn; plain HTTP for local OpenAI-compatible servers."""
+    if scheme == "http":
+        return http.client.HTTPConnection(host, timeout=timeout)
+    return _make_https_conn(host, timeout=timeout)
+
+
+def _conn_in_use(conn) -> bool:
+    """True while a call holds *conn* or its last response is still being read."""
+    if getattr(conn, "_atlas_leased", False):
+        return True
+    isclosed = getattr(getattr(conn, "_atlas_response", None), "isclosed", None)
+    return callable(isclosed) and not isclosed()
+
+
+def _lease_pooled_conn(host: str):
+    """Lease an idle pooled connection to *host*, primary first; None if all busy."""
+    with _http_pool_lock:
+        for conn in (_http_conn_pool.get(host), *_http_conn_spares.get(host, ())):
+            if conn is not None and not _conn_in_use(conn):
+                conn._atlas_leased = True
+                return conn
+    return None
+
+
+def _pool_conn(host: str, conn) -> bool:
+    """Add a new connection to the pool; False when the pool is full."""
+    size = max(int(getattr(config, "LLM_CONN_POOL_SIZE", 8) or 1), 1)
+    with _http_pool_lock:
+        if _http_conn_pool.get(host) is None:
+            _http_conn_pool[host] = conn
+            return True
+        spares = _http_conn_spares.setdefault(host, [])
+        if 1 + len(spares) < size:
+            spares.append(conn)
+            return True
+    return False
+
+
+def _drop_conn(host: str, conn) -> None:
+    """Close *conn* and forget it."""
+    try:
+        conn.close()
+    except Exception:
+        pass
+    with _http_pool_lock:
+        if _http_conn_pool.get(host) is conn:
+            _http_conn_pool.pop(host, None)
+            _http_conn_last_used.pop(host, None)
+        spares = _http_conn_spares.get(host)
+        if spares and conn in spares:
+            spares.remove(conn)
+
+
 class _PersistentHTTPError(urllib.error.HTTPError):
     """urllib-compatible HTTPError raised by the persistent-connection path."""
     def __init__(self, url: str, code: int, reason: str, body_bytes: bytes):
@@ -665,7 +879,7 @@ def warmup_connection() -> None:
 
 def _persistent_post(url: str, headers: dict, body: bytes, timeout: int = 300):
     """
-    POST via a persistent HTTPS connection (HTTP keep-alive).
+    POST via a pooled persistent HTTP(S) connection (HTTP keep-alive).
 
     Returns an http.client.HTTPResponse.  The caller MUST drain the response
     with ``response.read()`` (or iterate it fully) before the connection can
@@ -702,26 +916,22 @@ def _persistent_post(url: str, headers: dict, body: bytes, timeout: int = 300):
 
     global _last_post_reused
     for attempt in range(2):
-        conn = None if force_close else _http_conn_pool.get(host)
+        conn = None if force_close else _lease_pooled_conn(host)
         # Idle-expiry: a pooled keep-alive connection that has sat unused longer
         # than the provider's LB idle window is very likely already dropped
         # (CLOSE_WAIT). Reusing it blocks in getresponse(). Drop it pre-emptively
         # and open a fresh one instead of discovering the corpse the hard way.
         if conn is not None and _max_idle:
-            _idle = time.time() - _http_conn_last_used.get(host, 0.0)
-            if _idle > _max_idle:
-                try:
-                    conn.close()
-                except Exception:
-                    pass
-                _http_conn_pool.pop(host, None)
-                _http_conn_last_used.pop(host, None)
+            _last = getattr(conn, "_atlas_last_used", None) or _http_conn_last_used.get(host, 0.0)
+            if time.time() - _last > _max_idle:
+                _drop_conn(host, conn)
                 conn = None
         _was_alive = conn is not None and conn.sock is not None
+        pooled = conn is not None
         if conn is None:
-            conn = _make_https_conn(host, timeout=_headers_timeout)
-            if not force_close:
-                _http_conn_pool[host] = conn
+            conn = _make_conn(parsed.scheme, host, timeout=_headers_timeout)
+            conn._atlas_leased = True
+            pooled = not force_close and _pool_conn(host, conn)
         else:
             # Update socket timeout on reuse — pooled connections keep the timeout
             # from when they were first created (set at connect() time).  Use the
@@ -732,11 +942,14 @@ def _persistent_post(url: str, headers: dict, body: bytes, timeout: int = 300):
                     conn.sock.settimeout(_headers_timeout)
                 except Exception:
                     pass
+        # Beyond the pool size the connection is one-shot.
+        send_headers = req_headers if pooled or force_close else {**req_headers, "Connection": "close"}
         try:
-            conn.request("POST", path, body=body, headers=req_headers)
+            conn.request("POST", path, body=body, headers=send_headers)
             resp = conn.getresponse()
             if resp.status >= 400:
                 body_bytes = resp.read()  # fully drain before raising
+                conn._atlas_leased = False
                 raise _PersistentHTTPError(url, resp.status, resp.reason, body_bytes)
             # Headers landed — raise the socket timeout to the full (streaming)
             # budget for the body read, and mark the connection fresh.
@@ -746,7 +959,11 @@ def _persistent_post(url: str, headers: dict, body: bytes, timeout: int = 300):
                     conn.sock.settimeout(timeout)
             except Exception:
                 pass
-            _http_conn_last_used[host] = time.time()
+            _http_conn_last_used[host] = conn._atlas_last_used = time.time()
+            # The lease now follows the response: the connection is free again
+            # once the caller has read it to the end.
+            conn._atlas_response = resp
+            conn._atlas_leased = False
             _last_post_reused = _was_alive and attempt == 0 and (not force_close)
             return resp
         except _PersistentHTTPError:
@@ -755,15 +972,13 @@ def _persistent_post(url: str, headers: dict, body: bytes, timeout: int = 300):
                 http.client.BadStatusLine,
                 ConnectionResetError, BrokenPipeError, OSError, socket.timeout):
             # Stale connection (or leftover bytes from prev SSE stream) — drop and retry fresh
-            try:
-                conn.close()
-            except Exception:
-                pass
-            _http_conn_pool.pop(host, None)
-            _http_conn_last_used.pop(host, None)
+            _drop_conn(host, conn)
             _last_post_reused = False
             if attempt == 1:
                 raise
+        except BaseException:
+            _drop_conn(host, conn)
+            raise
 
 
 # --- Cache Token Tracking (Anthropic Prompt Caching) ---
@@ -2564,6 +2779,7 @@ def _collect_responses_raw(
                 ended_at - t_connect,
                 0.0,
                 ended_at - started_at,
+                est_in_tok=_estimate_request_tokens(data),
             )
 
             native_calls = [tool_calls[idx] for idx in sorted(tool_calls) if tool_calls[idx].get("name")]
@@ -2591,6 +2807,7 @@ def _collect_responses_raw(
             ended_at - t_connect,
             0.0,
             ended_at - started_at,
+            est_in_tok=_estimate_request_tokens(data),
         )
         return _strip_metadata_tokens("".join(content_parts)).strip()
     except urllib.error.HTTPError as e:
@@ -3400,6 +3617,7 @@ def _chat_completion_nonstream(messages, stop=None, model=None, skip_rate_limit=
         ttft_s=_ns_connect + _ns_read,
         decode_s=0.0,
         total_s=_ns_connect + _ns_read,
+        est_in_tok=_estimate_request_tokens(data),
     )
 
     # Non-streaming tool_calls in message (some internal hosts skip streaming protocol)
@@ -4281,6 +4499,7 @@ def chat_completion_stream(messages, stop=None, model=None, skip_rate_limit=Fals
                     ttft_s=_perf_ttft or 0.0,
                     decode_s=_perf_gen_elapsed or 0.0,
                     total_s=(_perf_connect or 0.0) + (_perf_ttft or 0.0) + (_perf_gen_elapsed or 0.0),
+                    est_in_tok=_estimate_request_tokens(data),
                 )
 
                 # Update global token tracking with actual values from API
@@ -4815,7 +5034,8 @@ def call_llm_raw(
             _raw_ttft = (_raw_t_first - _raw_t_connect) if _raw_t_first else _raw_connect
             _raw_decode = (_raw_t_end - _raw_t_first) if _raw_t_first else 0.0
             _record_call(_raw_caller, resolved_model, last_input_tokens, last_output_tokens,
-                         _raw_connect, _raw_ttft, _raw_decode, _raw_t_end - _raw_t_start)
+                         _raw_connect, _raw_ttft, _raw_decode, _raw_t_end - _raw_t_start,
+                         est_in_tok=_estimate_request_tokens(data))
             content = "".join(full_content)
             return _strip_metadata_tokens(content).strip()
 
@@ -4857,7 +5077,8 @@ def call_llm_raw(
         _raw_connect = _raw_connected - _raw_t_connect
         _raw_read = _raw_t_end - _raw_connected
         _record_call(_raw_caller, resolved_model, last_input_tokens, last_output_tokens,
-                     _raw_connect, _raw_connect + _raw_read, 0.0, _raw_t_end - _raw_t_start)
+                     _raw_connect, _raw_connect + _raw_read, 0.0, _raw_t_end - _raw_t_start,
+                     est_in_tok=_estimate_request_tokens(data))
 
         # Function calling response: model returned tool_calls instead of content
         raw_tool_calls = message.get("tool_calls")
@@ -5009,9 +5230,8 @@ def call_llm_api(messages, temperature=0.7, max_tokens=None, model=None, show_re
 
 
 def estimate_tokens(messages):
-    """Estimates token count based on characters (4 chars ~= 1 token)."""
-    total_chars = sum(len(str(m.get("content", ""))) for m in messages)
-    return total_chars // 4
+    """Estimates the token count of a message list (see estimate_message_tokens)."""
+    return sum(estimate_message_tokens(m) for m in messages)
 
 def is_anthropic_provider():
     """
@@ -5033,34 +5253,12 @@ def is_anthropic_provider():
 
     return False
 
-def _estimate_text_tokens_with_image_discount(text: str) -> int:
-    adjusted = len(text)
-    for match in _DATA_IMAGE_RE.finditer(text):
-        adjusted -= len(match.group(0))
-        adjusted += _RESIZED_IMAGE_BYTES_ESTIMATE
-    return max(0, adjusted // 4)
-
-
-def _estimate_content_tokens(content):
-    if isinstance(content, str):
-        return _estimate_text_tokens_with_image_discount(content)
-    if isinstance(content, dict):
-        if content.get("type") == "input_image":
-            return max(1, _RESIZED_IMAGE_BYTES_ESTIMATE // 4)
-        return sum(
-            _estimate_content_tokens(value)
-            for value in content.values()
-            if isinstance(value, (str, list, dict))
-        )
-    if isinstance(content, list):
-        return sum(_estimate_content_tokens(block) for block in content)
-    return 0
-
-
 def estimate_message_tokens(message):
     """
     Estimates token count for a single message.
-    Uses 4 chars ≈ 1 token heuristic.
+    Counts content and native tool calls with core/token_counter's active
+    tokenizer (a local BPE file, else a script-aware estimate); counts are
+    cached per text, so re-estimating an unchanged history is cheap.
 
     Args:
         message: dict with "content" field (str or list)
@@ -5068,15 +5266,25 @@ def estimate_message_tokens(message):
     Returns:
         int: estimated token count
     """
-    content = message.get("content", "")
+    # Inline image data URLs are transport payloads, so they are counted as
+    # a fixed image cost instead of charging every base64 character.
+    return token_counter.count_message(message)
 
-    # Handle string, optimized dict, and structured block content. Inline
-    # image data URLs are transport payloads, so estimate them as fixed image
-    # cost instead of charging every base64 character as model-visible text.
-    if isinstance(content, (str, dict, list)):
-        return _estimate_content_tokens(content)
 
-    return 0
+def _estimate_request_tokens(data: dict) -> int:
+    """Offline estimate of a request body's prompt tokens, for the call log.
+
+    Chat-format framing costs a few tokens per message on top of the content;
+    tool schemas are billed as prompt tokens too.
+    """
+    items = data.get("messages") or data.get("input") or []
+    if isinstance(items, str):
+        items = [{"content": items}]
+    total = sum(estimate_message_tokens(m) + 4 for m in items if isinstance(m, dict)) + 3
+    total += token_counter.count_text(str(data.get("instructions") or ""))
+    if data.get("tools"):
+        total += token_counter.count_text(json.dumps(data["tools"]))
+    return total
 
 
 def get_actual_tokens(messages):
@@ -5334,6 +5542,202 @@ _cached_embedding_dim = None
 # Key: {model}:{text_hash}, Value: list[float]
 _embedding_cache = {}
 
+def _persistent_embedding_cache():
+    """Shared on-disk embedding cache (core/embedding_cache.py), or None."""
+    try:
+        try:
+            from core.embedding_cache import get_embedding_cache
+        except ImportError:
+            from embedding_cache import get_embedding_cache
+        return get_embedding_cache()
+    except Exception:
+        return None
+
+
+def _persistent_lookup(model: str, texts: List[str]) -> List[Optional[List[float]]]:
+    store = _persistent_embedding_cache()
+    if store is None:
+        return [None] * len(texts)
+    try:
+        # Configured or already-probed dimension; with neither, the cache
+        # returns the most recently used row for the model.
+        dim = config.EMBEDDING_DIMENSION or _cached_embedding_dim
+        return store.get_many(model, texts, dim=dim)
+    except Exception as e:
+        if config.DEBUG_MODE:
+            print(Color.warning(f"[Embedding] Persistent cache lookup failed: {e}"))
+        return [None] * len(texts)
+
+
+def _persistent_store(model: str, items: List[tuple]):
+    store = _persistent_embedding_cache()
+    if store is None:
+        return
+    try:
+        store.put_many(model, items)
+    except Exception as e:
+        if config.DEBUG_MODE:
+            print(Color.warning(f"[Embedding] Persistent cache write failed: {e}"))
+
+
+def _embedding_endpoint(model: str):
+    """Return (url, headers) for the configured embeddings API."""
+    emb_api_key = config.EMBEDDING_API_KEY or config.API_KEY
+    if is_azure_provider():
+        # Azure OpenAI embedding endpoint
+        api_version = getattr(config, "AZURE_OPENAI_API_VERSION", "2025-04-01-preview")
+        url = f"{config.EMBEDDING_BASE_URL.rstrip('/')}/openai/deployments/{model}/embeddings?api-version={api_version}"
+        headers = {
+            "Content-Type": "application/json",
+            "api-key": emb_api_key,
+            "User-Agent": "BrianCoder-Embedding"
+        }
+    else:
+        url = f"{config.EMBEDDING_BASE_URL}/embeddings"
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {emb_api_key}",
+            "User-Agent": "BrianCoder-Embedding"
+        }
+    return url, headers
+
+
+# Batch embedding requests run concurrently (RAG indexing keeps several in
+# flight), so they must not share the single keep-alive connection in
+# _http_conn_pool. Each thread keeps its own connection per scheme+host;
+# every one is also tracked here so close_embedding_connections() can close
+# them when the worker pool is done.
+_embedding_tls = threading.local()
+_embedding_conns: list = []
+_embedding_conns_lock = threading.Lock()
+
+
+def close_embedding_connections():
+    """Close every per-thread embedding connection (each reopens on next use)."""
+    with _embedding_conns_lock:
+        conns = list(_embedding_conns)
+        _embedding_conns.clear()
+    for conn in conns:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def _embedding_post(url: str, headers: dict, body: bytes, timeout: int = 60) -> bytes:
+    """POST on this thread's keep-alive connection and return the body bytes.
+
+    Accepts plain ``http://`` URLs as well, for local OpenAI-compatible
+    embedding servers.
+    """
+    parsed = urllib.parse.urlparse(url)
+    path = parsed.path or "/"
+    if parsed.query:
+        path = f"{path}?{parsed.query}"
+    key = f"{parsed.scheme}://{parsed.netloc}"
+    conns = getattr(_embedding_tls, "conns", None)
+    if conns is None:
+        conns = _embedding_tls.conns = {}
+    req_headers = dict(headers)
+    req_headers["Connection"] = "keep-alive"
+    for attempt in range(2):
+        conn = conns.get(key)
+        if conn is None:
+            if parsed.scheme == "http":
+                conn = http.client.HTTPConnection(parsed.netloc, timeout=timeout)
+            else:
+                conn = _make_https_conn(parsed.netloc, timeout=timeout)
+            conns[key] = conn
+        if conn.sock is None:
+            # New, or closed by close_embedding_connections(): it (re)opens
+            # on this request, so make sure it is tracked again.
+            with _embedding_conns_lock:
+                if conn not in _embedding_conns:
+                    _embedding_conns.append(conn)
+        try:
+            conn.request("POST", path, body=body, headers=req_headers)
+            resp = conn.getresponse()
+            payload = resp.read()
+        except (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                BrokenPipeError, ConnectionResetError):
+            conn.close()
+            conns.pop(key, None)
+            with _embedding_conns_lock:
+                if conn in _embedding_conns:
+                    _embedding_conns.remove(conn)
+            if attempt == 0:
+                continue
+            raise
+        if resp.status >= 400:
+            raise _PersistentHTTPError(url, resp.status, resp.reason, payload)
+        return payload
+    raise RuntimeError("unreachable")
+
+
+def get_embeddings(texts: List[str], model: str = None) -> List[List[float]]:
+    """
+    Embed many texts with one request per call (OpenAI ``input: [...]``).
+    Shares the in-process cache with get_embedding(); only misses are sent.
+
+    Args:
+        texts: Texts to embed
+        model: Model name override (optional)
+
+    Returns:
+        One embedding per input text, in input order.
+    """
+    if model is None:
+        model = config.EMBEDDING_MODEL
+    results: List[Optional[List[float]]] = [None] * len(texts)
+    pending: Dict[str, List[int]] = {}
+    for i, text in enumerate(texts):
+        cached = _embedding_cache.get(f"{model}:{hash(text)}")
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.setdefault(text, []).append(i)
+    if pending:
+        for text, embedding in zip(list(pending), _persistent_lookup(model, list(pending))):
+            if embedding is not None:
+                _embedding_cache[f"{model}:{hash(text)}"] = embedding
+                for i in pending.pop(text):
+                    results[i] = embedding
+    if not pending:
+        return results
+
+    inputs = list(pending)
+    url, headers = _embedding_endpoint(model)
+    body = json.dumps({"input": inputs, "model": model, "encoding_format": "float"}).encode("utf-8")
+    max_retries = 3
+    for attempt in range(max_retries):
+        try:
+            result = json.loads(_embedding_post(url, headers, body).decode("utf-8"))
+            rows = sorted(result["data"], key=lambda d: d.get("index", 0))
+            if len(rows) != len(inputs):
+                raise ValueError(f"expected {len(inputs)} embeddings, got {len(rows)}")
+            break
+        except Exception as e:
+            if attempt < max_retries - 1:
+                delay = 2 ** attempt
+                print(Color.warning(f"[Embedding] Batch retry {attempt+1}/{max_retries} in {delay}s: {e}"))
+                time.sleep(delay)
+                continue
+            print(Color.error(f"[Embedding] Batch of {len(inputs)} failed after {max_retries} attempts: {e}"))
+            raise
+    for text, row in zip(inputs, rows):
+        embedding = row["embedding"]
+        _embedding_cache[f"{model}:{hash(text)}"] = embedding
+        for i in pending[text]:
+            results[i] = embedding
+    _persistent_store(model, [(text, row["embedding"]) for text, row in zip(inputs, rows)])
+    try:
+        while len(_embedding_cache) > 1000:
+            _embedding_cache.pop(next(iter(_embedding_cache)))
+    except (StopIteration, KeyError, RuntimeError):
+        pass  # concurrent batch already trimmed it
+    return results
+
+
 def get_embedding(text: str, model: str = None) -> List[float]:
     """
     Get embedding for text using configured API.
@@ -5356,25 +5760,14 @@ def get_embedding(text: str, model: str = None) -> List[float]:
         val = _embedding_cache.pop(cache_key)
         _embedding_cache[cache_key] = val
         return val
-        
+
+    stored = _persistent_lookup(model, [text])[0]
+    if stored is not None:
+        _embedding_cache[cache_key] = stored
+        return stored
+
     # Prepare API request
-    emb_api_key = config.EMBEDDING_API_KEY or config.API_KEY
-    if is_azure_provider():
-        # Azure OpenAI embedding endpoint
-        api_version = getattr(config, "AZURE_OPENAI_API_VERSION", "2025-04-01-preview")
-        url = f"{config.EMBEDDING_BASE_URL.rstrip('/')}/openai/deployments/{model}/embeddings?api-version={api_version}"
-        headers = {
-            "Content-Type": "application/json",
-            "api-key": emb_api_key,
-            "User-Agent": "BrianCoder-Embedding"
-        }
-    else:
-        url = f"{config.EMBEDDING_BASE_URL}/embeddings"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {emb_api_key}",
-            "User-Agent": "BrianCoder-Embedding"
-        }
+    url, headers = _embedding_endpoint(model)
     data = {
         "input": text,
         "model": model,
@@ -5391,6 +5784,7 @@ def get_embedding(text: str, model: str = None) -> List[float]:
 
             # Cache result
             _embedding_cache[cache_key] = embedding
+            _persistent_store(model, [(text, embedding)])
             # Maintain cache size (max 1000)
             if len(_embedding_cache) > 1000:
                 try:
@@ -24,6 +24,11 @@ os.environ.setdefault("ATLAS_SESSION_WORKER_POLICY", "")
 os.environ.setdefault("ATLAS_SESSION_WORKER_MAX_ACTIVE", "")
 os.environ.setdefault("ATLAS_RUNTIME_DB_MODE", "central")
 
+# Embeddings are cached on disk under the home directory by default; keep
+# tests from reading a developer's cache or filling it with fake vectors.
+# Tests of the cache itself patch config with a temp path.
+os.environ.setdefault("RAG_ENABLE_PERSISTENT_CACHE", "false")
+
 # Add paths for imports
 _tests_dir = os.path.dirname(os.path.abspath(__file__))
 _project_root = os.path.dirname(_tests_dir)
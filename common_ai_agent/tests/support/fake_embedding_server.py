@@ -0,0 +1,108 @@
+"""Local OpenAI-compatible ``/embeddings`` server for embedding tests.
+
+Vectors are a deterministic function of the input text, so callers can check
+that results come back in input order. The server records request count,
+total inputs and peak concurrency, and can add per-request latency to model
+a remote API.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, List
+
+
+def fake_vector(text: str, dim: int = 8) -> List[float]:
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return [(digest[i % len(digest)] - 127.5) / 127.5 for i in range(dim)]
+
+
+class FakeEmbeddingState:
+    def __init__(self, dim: int = 8, latency_s: float = 0.0) -> None:
+        self.dim = dim
+        self.latency_s = latency_s
+        self.requests = 0
+        self.inputs = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.fail_next = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def enter(self) -> None:
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def leave(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+
+@contextmanager
+def fake_embedding_server(dim: int = 8, latency_s: float = 0.0) -> Iterator[tuple]:
+    """Yield ``(base_url, state)`` for a server answering POST /embeddings."""
+    state = FakeEmbeddingState(dim=dim, latency_s=latency_s)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+
+        def setup(self) -> None:
+            super().setup()
+            with state._lock:
+                state.connections += 1
+
+        def do_POST(self) -> None:  # noqa: N802 - http.server API
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            state.enter()
+            try:
+                if state.latency_s:
+                    time.sleep(state.latency_s)
+                with state._lock:
+                    fail = state.fail_next > 0
+                    if fail:
+                        state.fail_next -= 1
+                if fail:
+                    self._send(500, {"error": "injected failure"})
+                    return
+                inputs = payload.get("input")
+                if isinstance(inputs, str):
+                    inputs = [inputs]
+                with state._lock:
+                    state.inputs += len(inputs)
+                data = [{"object": "embedding", "index": i, "embedding": fake_vector(t, state.dim)}
+                        for i, t in enumerate(inputs)]
+                # Out of order on purpose: clients must sort by "index".
+                self._send(200, {"object": "list", "data": list(reversed(data)),
+                                 "model": payload.get("model")})
+            finally:
+                state.leave()
+
+        def _send(self, status: int, body: dict) -> None:
+            raw = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def log_message(self, *_args) -> None:
+            return
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}", state
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join(timeout=2)
@@ -429,6 +429,118 @@ class TestConcurrency:
         assert len(sessions) == 100
 
 
+class TestBatchedWrites:
+    def test_transaction_commits_once_and_rolls_back_on_error(self, db, tmp_path):
+        other = sqlite3.connect(db.db_path)
+        with db.transaction():
+            db.record_trace_event("turn_start", session_id="s1")
+            db.record_llm_call(session_id="s1", model="m", tokens_input=3)
+            db.enqueue_message("s1", "out", "token", {"i": 0})
+            with db.transaction():  # nested blocks flatten into the outer one
+                db.record_trace_event("turn_end", session_id="s1")
+            # Nothing is visible to another connection before the commit.
+            assert other.execute("SELECT COUNT(*) FROM trace_events").fetchone()[0] == 0
+        assert other.execute("SELECT COUNT(*) FROM trace_events").fetchone()[0] == 2
+        assert other.execute("SELECT COUNT(*) FROM llm_calls").fetchone()[0] == 1
+
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                db.record_trace_event("doomed", session_id="s1")
+                raise RuntimeError("boom")
+        assert db.list_trace_events(session_id="s1")[-1]["event_type"] == "turn_end"
+        assert len(db.list_trace_events(session_id="s1")) == 2
+        other.close()
+
+    def test_bulk_apis_match_single_row_writers(self, db):
+        ids = db.record_trace_events([
+            {"event_type": "tool_call", "session_id": "s2", "payload": {"n": i},
+             "idempotency_key": f"k{i % 3}"}
+            for i in range(5)
+        ])
+        # Duplicate keys (in the batch and, below, in the DB) reuse the first id.
+        assert ids[3] == ids[0] and ids[4] == ids[1]
+        assert [e["payload"]["n"] for e in db.list_trace_events(session_id="s2")] == [0, 1, 2]
+        again = db.record_trace_events([{"event_type": "tool_call", "idempotency_key": "k1"}])
+        assert again == [ids[1]]
+
+        call_ids = db.record_llm_calls([
+            {"session_id": "s2", "model": "m", "tokens_input": n, "attribution_confidence": "exact"}
+            for n in (1, 2, 3)
+        ])
+        calls = db.list_llm_calls(session_id="s2")
+        assert sorted(c["id"] for c in calls) == sorted(call_ids)
+        assert sum(c["tokens_input"] for c in calls) == 6
+        with pytest.raises(ValueError):
+            db.record_llm_calls([{"attribution_confidence": "bogus"}])
+
+        msg_ids = db.enqueue_messages(
+            [{"session_id": "s2", "direction": "in", "msg_type": "user", "payload": {"i": i}}
+             for i in range(4)]
+        )
+        got = [db.dequeue_message("s2", "in", timeout=0) for _ in range(4)]
+        assert [m["id"] for m in got] == msg_ids
+        assert [m["payload"]["i"] for m in got] == [0, 1, 2, 3]
+
+    def test_group_commit_coalesces_concurrent_writers(self, db, monkeypatch):
+        monkeypatch.setenv("ATLAS_DB_GROUP_COMMIT_MS", "20")
+        monkeypatch.setattr(AtlasDB, "_COMMITTERS_BY_PATH", {})
+        errors = []
+        results = []
+
+        def writer(n):
+            try:
+                session = AtlasDB(db.db_path)
+                event = session.record_trace_event("turn", session_id=f"s{n}")
+                call = session.record_llm_call(session_id=f"s{n}", tokens_output=n)
+                session.enqueue_message(f"s{n}", "out", "done", {"n": n})
+                results.append((event["session_id"], call["tokens_output"]))
+            except Exception as e:  # noqa: BLE001
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(30)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert errors == []
+        assert sorted(results) == sorted((f"s{n}", n) for n in range(30))
+        committer = db._group_committer()
+        assert committer.rows == 90
+        assert committer.batches < 30  # rows from different sessions shared commits
+
+        # Inside a transaction (or while holding the path lock) writes bypass
+        # the committer, so they cannot deadlock against it.
+        with db.transaction():
+            db.record_trace_event("in_tx", session_id="tx")
+        assert committer.rows == 90
+        assert db.list_trace_events(session_id="tx")[0]["event_type"] == "in_tx"
+
+    def test_group_commit_failure_is_isolated_to_its_writer(self, db, monkeypatch):
+        monkeypatch.setenv("ATLAS_DB_GROUP_COMMIT_MS", "5")
+        monkeypatch.setattr(AtlasDB, "_COMMITTERS_BY_PATH", {})
+        committer = db._group_committer()
+        done = []
+
+        def good():
+            committer.submit(
+                "INSERT INTO session_queue (id, session_id, direction, msg_type, created_at) "
+                "VALUES (?, 's', 'in', 't', 0)", (AtlasDB._new_id(),))
+            done.append("ok")
+
+        dup = AtlasDB._new_id()
+        committer.submit("INSERT INTO session_queue (id, session_id, direction, msg_type, created_at) "
+                         "VALUES (?, 's', 'in', 't', 0)", (dup,))
+        t = threading.Thread(target=good)
+        t.start()
+        with pytest.raises(sqlite3.IntegrityError):
+            committer.submit("INSERT INTO session_queue (id, session_id, direction, msg_type, created_at) "
+                             "VALUES (?, 's', 'in', 't', 0)", (dup,))
+        t.join()
+        assert done == ["ok"]
+        assert db._fetchone("SELECT COUNT(*) AS n FROM session_queue WHERE session_id = 's'")["n"] == 2
+
+
 class TestMemoryDB:
     def test_memory_db_basic(self, memory_db):
         user = memory_db.create_user("mem", "Memory User")
@@ -210,3 +210,30 @@ def test_vcd_raw_reports_missing_fst_converter(tmp_path: Path, monkeypatch) -> N
     payload = response.json()
     assert payload["error"] == "converter_missing"
     assert "fst2vcd" in payload["message"]
+
+
+def test_vcd_window_returns_width_bounded_decimated_columns(tmp_path: Path) -> None:
+    sim_dir = tmp_path / "demo_ip" / "sim"
+    sim_dir.mkdir(parents=True)
+    body = "".join(f"#{t * 5}\n{t % 2}!\n" for t in range(5000))
+    # Far larger than max_vcd_bytes: /raw would refuse it, /window does not read it whole.
+    (sim_dir / "big.vcd").write_text(VCD_TEXT.split("#0")[0] + body, encoding="utf-8")
+    client = _client(tmp_path)
+
+    response = client.get("/api/vcd/window?path=demo_ip/sim/big.vcd&signals=clk,nope&width=100")
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["missing"] == ["nope"]
+    assert payload["t0"] == 0 and payload["t1"] == 24995
+    row = payload["signals"][0]
+    assert row["resolved"] == "top.clk" and row["decimated"]
+    assert len(row["col"]) == 100 and sum(row["n"]) == 5000
+    assert {payload["values"][i] for i in row["min"] + row["max"]} == {"0", "1"}
+
+    zoomed = client.get("/api/vcd/window?path=demo_ip/sim/big.vcd&signals=clk&t0=100&t1=120").json()
+    row = zoomed["signals"][0]
+    assert row["t"] == [100, 105, 110, 115, 120]
+    assert [zoomed["values"][v] for v in row["v"]] == ["0", "1", "0", "1", "0"]
+
+    assert client.get("/api/vcd/window?path=demo_ip/sim/big.vcd").status_code == 400
+    assert client.get("/api/vcd/window?path=demo_ip/sim/none.vcd&signals=clk").status_code == 404
@@ -0,0 +1,190 @@
+"""
+Tests for core/embedding_cache.py: the persistent (model, dim, sha256)
+embedding cache, and that RAGDatabase, GraphLite and graph memory notes all
+hit it through llm_client instead of re-requesting vectors.
+"""
+import io
+import tempfile
+import unittest
+from array import array
+from pathlib import Path
+from unittest.mock import patch
+
+import config
+import llm_client
+from core.embedding_cache import EmbeddingCache, get_embedding_cache
+from core.graph_lite import GraphLite
+from core.rag_db import RAGDatabase
+from tests.support.fake_embedding_server import fake_embedding_server, fake_vector
+
+
+def _f32(vector):
+    return array("f", vector).tolist()
+
+
+def _plain_http_post(url, headers, body, timeout=300):
+    # get_embedding's shared HTTPS transport, pointed at the local http server.
+    return io.BytesIO(llm_client._embedding_post(url, headers, body, timeout=timeout))
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = EmbeddingCache(Path(tempfile.mkdtemp()) / "emb.db")
+        self.addCleanup(self.cache.close)
+
+    def test_roundtrip_and_counters(self):
+        self.cache.put_many("m1", [("alpha", [0.5, -1.0]), ("beta", [2.0, 3.0])])
+        self.assertEqual(self.cache.get_many("m1", ["beta", "gamma", "alpha"]),
+                         [[2.0, 3.0], None, [0.5, -1.0]])
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (2, 1, 2))
+
+    def test_keyed_by_model_and_dimension(self):
+        self.cache.put("m1", "alpha", [1.0, 2.0])
+        self.assertIsNone(self.cache.get("m2", "alpha"))
+        self.assertIsNone(self.cache.get("m1", "alpha", dim=4))
+        self.assertEqual(self.cache.get("m1", "alpha", dim=2), [1.0, 2.0])
+
+    def test_unknown_dimension_returns_most_recent_row(self):
+        with patch("core.embedding_cache.time.time", return_value=100.0):
+            self.cache.put("m1", "alpha", [1.0, 2.0])
+        with patch("core.embedding_cache.time.time", return_value=200.0):
+            self.cache.put("m1", "alpha", [3.0, 4.0, 5.0])
+        self.assertEqual(self.cache.get("m1", "alpha"), [3.0, 4.0, 5.0])
+        self.assertEqual(self.cache.get("m1", "alpha", dim=2), [1.0, 2.0])
+        # Touching the 2-dim row makes it the newest.
+        self.assertEqual(self.cache.get("m1", "alpha"), [1.0, 2.0])
+
+    def test_invalidate_model_keeps_other_models(self):
+        self.cache.put("m1", "alpha", [1.0])
+        self.cache.put("m2", "alpha", [2.0])
+        self.assertEqual(self.cache.invalidate_model("m1"), 1)
+        self.assertIsNone(self.cache.get("m1", "alpha"))
+        self.assertEqual(self.cache.get("m2", "alpha"), [2.0])
+
+    def test_lru_eviction_by_size(self):
+        # Each 4-dim float32 vector is 16 bytes; room for 5.
+        self.cache.max_bytes = 80
+        for i in range(5):
+            self.cache.put("m", f"t{i}", [float(i)] * 4)
+        with patch("core.embedding_cache.time.time", return_value=1e12):
+            self.cache.get("m", "t0")  # most recently used now
+        self.cache.put("m", "t5", [5.0] * 4)
+        stats = self.cache.stats()
+        self.assertLessEqual(stats["bytes"], 80 * 0.9)
+        self.assertGreater(stats["evictions"], 0)
+        self.assertEqual(self.cache.get("m", "t0"), [0.0] * 4)
+        self.assertIsNone(self.cache.get("m", "t1"))
+
+    def test_persists_across_instances(self):
+        self.cache.put("m1", "alpha", [1.5])
+        self.cache.close()
+        reopened = EmbeddingCache(self.cache.path)
+        self.addCleanup(reopened.close)
+        self.assertEqual(reopened.get("m1", "alpha"), [1.5])
+
+
+class TestSharedCacheConsumers(unittest.TestCase):
+    """A counting fake embedder behind llm_client; every consumer must hit."""
+
+    def setUp(self):
+        ctx = fake_embedding_server(dim=8)
+        self.base_url, self.state = ctx.__enter__()
+        self.addCleanup(ctx.__exit__, None, None, None)
+        self.cache_path = str(Path(tempfile.mkdtemp()) / "emb.db")
+        for name, value in (("EMBEDDING_BASE_URL", self.base_url),
+                            ("EMBEDDING_MODEL", "fake-embed"),
+                            ("EMBEDDING_DIMENSION", None),
+                            ("LLM_PROVIDER", "openai"),
+                            ("RAG_ENABLE_PERSISTENT_CACHE", True),
+                            ("EMBEDDING_CACHE_PATH", self.cache_path),
+                            ("AMEM_SIMILARITY_THRESHOLD", 1.1)):
+            p = patch.object(config, name, value, create=True)
+            p.start()
+            self.addCleanup(p.stop)
+        p = patch.dict(llm_client._embedding_cache, clear=True)
+        p.start()
+        self.addCleanup(p.stop)
+        for p in (patch.object(RAGDatabase, "_validate_dimension_compatibility"),
+                  patch.object(llm_client, "_persistent_post_with_auth_retry", _plain_http_post),
+                  patch.object(llm_client, "_cached_embedding_dim", None)):
+            p.start()
+            self.addCleanup(p.stop)
+        self.cache = get_embedding_cache()
+
+    def _forget_in_process(self):
+        # Simulate a new process: only the on-disk cache survives.
+        llm_client._embedding_cache.clear()
+
+    def _sources(self, n=5):
+        src = Path(tempfile.mkdtemp())
+        for i in range(n):
+            (src / f"m{i}.v").write_text(
+                f"module m{i}(input clk, output reg q);\n  always @(posedge clk) q <= ~q;\nendmodule\n",
+                encoding="utf-8")
+        return src
+
+    def test_rag_reindex_of_unchanged_files_hits_cache(self):
+        src = self._sources()
+        first = RAGDatabase(rag_dir=tempfile.mkdtemp())
+        first.rate_limit_delay = 0
+        total = first.index_directory(str(src), patterns=["*.v"])
+        sent = self.state.inputs
+        self.assertGreater(sent, 0)
+
+        self._forget_in_process()
+        second = RAGDatabase(rag_dir=tempfile.mkdtemp())  # fresh index, same files
+        second.rate_limit_delay = 0
+        self.assertEqual(second.index_directory(str(src), patterns=["*.v"]), total)
+        self.assertEqual(self.state.inputs, sent)
+        self.assertGreaterEqual(self.cache.stats()["hits"], sent)
+
+    def test_graph_note_and_heal_hit_cache(self):
+        graph = GraphLite(memory_dir=tempfile.mkdtemp())
+        graph.add_note_with_auto_linking("prefer active-low resets")
+        sent = self.state.inputs
+
+        self._forget_in_process()
+        other = GraphLite(memory_dir=tempfile.mkdtemp())
+        node_id = other.add_note_with_auto_linking("prefer active-low resets")
+        self.assertEqual(self.state.inputs, sent)
+        self.assertEqual(other.get_node(node_id).embedding,
+                         _f32(fake_vector("prefer active-low resets")))
+
+        # heal_embeddings re-embeds nodes whose dimension is stale.
+        other.get_node(node_id).embedding = [0.0, 0.0]
+        self._forget_in_process()
+        with patch.object(other, "save"):
+            other.heal_embeddings()
+        self.assertEqual(len(other.get_node(node_id).embedding), 8)
+        self.assertEqual(self.state.inputs, sent + 1)  # only the "probe" text is new
+
+    def test_model_switch_keeps_previous_model_entries(self):
+        src = self._sources(3)
+        rag_dir = tempfile.mkdtemp()
+        db = RAGDatabase(rag_dir=rag_dir)
+        db.rate_limit_delay = 0
+        db.index_directory(str(src), patterns=["*.v"])
+        sent = self.state.inputs
+        (Path(rag_dir) / ".ragconfig").write_text("# kept\n", encoding="utf-8")
+        db.store.close()
+
+        with patch.object(config, "EMBEDDING_MODEL", "other-embed"):
+            switched = RAGDatabase(rag_dir=rag_dir)
+            self.assertEqual(switched.chunks, {})  # vectors belong to the old model
+            switched.rate_limit_delay = 0
+            switched.index_directory(str(src), patterns=["*.v"])
+            self.assertEqual(self.state.inputs, 2 * sent)
+            switched.store.close()
+        self.assertEqual((Path(rag_dir) / ".ragconfig").read_text(encoding="utf-8"), "# kept\n")
+
+        self._forget_in_process()
+        back = RAGDatabase(rag_dir=rag_dir)
+        back.rate_limit_delay = 0
+        back.index_directory(str(src), patterns=["*.v"])
+        self.assertEqual(self.state.inputs, 2 * sent)  # fake-embed entries survived
+        self.assertEqual(set(self.cache.stats()["by_model"]), {"fake-embed", "other-embed"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+"""
+Tests for core/rag_embed_pipeline.py and batched RAG indexing, against a
+fake local OpenAI-compatible embeddings server (tests/support).
+"""
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import config
+import llm_client
+from core.rag_db import RAGDatabase
+from core.rag_embed_pipeline import EmbeddingJournal, EmbeddingPipeline, TokenBucket
+from tests.support.fake_embedding_server import fake_embedding_server, fake_vector
+
+
+class _ServerTestCase(unittest.TestCase):
+    latency_s = 0.0
+
+    def setUp(self):
+        ctx = fake_embedding_server(dim=8, latency_s=self.latency_s)
+        self.base_url, self.state = ctx.__enter__()
+        self.addCleanup(ctx.__exit__, None, None, None)
+        for name, value in (("EMBEDDING_BASE_URL", self.base_url),
+                            ("EMBEDDING_MODEL", "fake-embed"),
+                            ("LLM_PROVIDER", "openai")):
+            p = patch.object(config, name, value, create=True)
+            p.start()
+            self.addCleanup(p.stop)
+        p = patch.dict(llm_client._embedding_cache, clear=True)
+        p.start()
+        self.addCleanup(p.stop)
+
+
+class TestGetEmbeddings(_ServerTestCase):
+    def test_one_request_preserves_input_order(self):
+        texts = ["alpha", "beta", "gamma", "beta"]
+        vectors = llm_client.get_embeddings(texts)
+        self.assertEqual(vectors, [fake_vector(t) for t in texts])
+        self.assertEqual(self.state.requests, 1)
+        self.assertEqual(self.state.inputs, 3)  # duplicate sent once
+
+    def test_cached_texts_are_not_resent(self):
+        llm_client.get_embeddings(["alpha", "beta"])
+        llm_client.get_embeddings(["alpha", "beta", "delta"])
+        self.assertEqual(self.state.requests, 2)
+        self.assertEqual(self.state.inputs, 3)
+
+
+class TestEmbeddingPipeline(_ServerTestCase):
+    latency_s = 0.02
+
+    def _pipeline(self, **kwargs):
+        kwargs.setdefault("batch_size", 10)
+        kwargs.setdefault("max_in_flight", 3)
+        kwargs.setdefault("model", "fake-embed")
+        return EmbeddingPipeline(embed_batch=llm_client.get_embeddings, **kwargs)
+
+    def test_dedupes_and_batches(self):
+        texts = [f"chunk {i % 40}" for i in range(100)]
+        vectors = self._pipeline().embed(texts)
+        self.assertEqual(vectors, [fake_vector(t) for t in texts])
+        self.assertEqual(self.state.inputs, 40)
+        self.assertEqual(self.state.requests, 4)
+
+    def test_bounded_in_flight(self):
+        texts = [f"chunk {i}" for i in range(200)]
+        pipeline = self._pipeline(max_in_flight=3)
+        pipeline.embed(texts)
+        self.assertEqual(pipeline.last_stats.batches, 20)
+        self.assertLessEqual(self.state.peak_in_flight, 3)
+        self.assertGreater(self.state.peak_in_flight, 1)
+
+    def test_connections_are_reused_across_calls_and_closed(self):
+        pipeline = self._pipeline(max_in_flight=2, on_close=llm_client.close_embedding_connections)
+        for round_ in range(3):
+            pipeline.embed([f"r{round_} chunk {i}" for i in range(40)])
+        self.assertEqual(self.state.requests, 12)
+        self.assertLessEqual(self.state.connections, 2)
+        pipeline.close()
+        self.assertEqual(llm_client._embedding_conns, [])
+
+    def test_token_bucket_paces_requests(self):
+        texts = [f"chunk {i}" for i in range(60)]
+        pipeline = self._pipeline(max_in_flight=6, bucket=TokenBucket(rate=50.0, capacity=1))
+        t0 = time.perf_counter()
+        pipeline.embed(texts)
+        # 6 requests at 50/s with burst 1: at least 5 inter-request gaps of 20 ms.
+        self.assertGreaterEqual(time.perf_counter() - t0, 0.09)
+
+    def test_interrupted_run_resumes_from_journal(self):
+        journal = EmbeddingJournal(Path(tempfile.mkdtemp()) / "progress.jsonl")
+        texts = [f"chunk {i}" for i in range(50)]
+        calls = []
+
+        def flaky(batch):
+            calls.append(len(batch))
+            if len(calls) == 3:
+                raise KeyboardInterrupt  # Ctrl+C mid-run
+            return llm_client.get_embeddings(batch)
+
+        first = EmbeddingPipeline(embed_batch=flaky, batch_size=10, max_in_flight=1,
+                                  journal=journal, model="fake-embed")
+        with self.assertRaises(KeyboardInterrupt):
+            first.embed(texts)
+
+        llm_client._embedding_cache.clear()
+        before = self.state.inputs
+        resumed = self._pipeline(journal=journal, max_in_flight=1)
+        vectors = resumed.embed(texts)
+        self.assertEqual(vectors, [fake_vector(t) for t in texts])
+        # Batches finished before the interrupt are reused; queued ones were
+        # cancelled (the one racing the interrupt may or may not have run).
+        self.assertIn(resumed.last_stats.resumed, (20, 30))
+        self.assertEqual(self.state.inputs - before, 50 - resumed.last_stats.resumed)
+
+    def test_journal_is_keyed_by_model(self):
+        journal = EmbeddingJournal(Path(tempfile.mkdtemp()) / "progress.jsonl")
+        self._pipeline(journal=journal).embed(["a", "b"])
+        other = self._pipeline(journal=journal, model="other-model")
+        other.embed(["a", "b"])
+        self.assertEqual(other.last_stats.resumed, 0)
+
+    def test_failed_batch_uses_fallback(self):
+        self.state.fail_next = 100
+        pipeline = EmbeddingPipeline(
+            embed_batch=lambda batch: (_ for _ in ()).throw(RuntimeError("boom")),
+            batch_size=5, fallback=lambda text: [0.0] * 8,
+        )
+        self.assertEqual(pipeline.embed(["x", "y"]), [[0.0] * 8, [0.0] * 8])
+        self.assertEqual(pipeline.last_stats.failed_batches, 1)
+
+
+class TestIndexDirectoryBatched(_ServerTestCase):
+    latency_s = 0.01
+
+    def test_index_directory_batches_across_files(self):
+        src = Path(tempfile.mkdtemp())
+        for i in range(30):
+            (src / f"m{i}.v").write_text(
+                f"module m{i}(input clk, input rst, output reg [7:0] q);\n"
+                f"  always @(posedge clk) q <= q + {i};\n"
+                f"endmodule\n" * 1,
+                encoding="utf-8",
+            )
+        with patch.object(RAGDatabase, "_validate_dimension_compatibility"), \
+             patch.object(config, "RAG_EMBEDDING_BATCH_SIZE", 16, create=True), \
+             patch.object(config, "RAG_EMBEDDING_MAX_IN_FLIGHT", 4, create=True):
+            db = RAGDatabase(rag_dir=tempfile.mkdtemp())
+            db.rate_limit_delay = 0
+            t0 = time.perf_counter()
+            total = db.index_directory(str(src), patterns=["*.v"])
+            elapsed = time.perf_counter() - t0
+
+        self.assertGreater(total, 30)
+        self.assertEqual(len(db.chunks), total)
+        self.assertTrue(all(c.embedding for c in db.chunks.values()))
+        self.assertEqual(len(db.file_hashes), 30)
+        # Far fewer requests than chunks, and the journal is gone after success.
+        self.assertLess(self.state.requests, total / 4)
+        self.assertFalse((db.rag_dir / "embed_progress.jsonl").exists())
+        print(f"\n[bench] {total} chunks in {elapsed:.3f}s = {total / elapsed:.0f} chunks/s, "
+              f"{self.state.requests} requests")
+
+    def test_rate_limit_keeps_minimum_spacing(self):
+        with patch.object(RAGDatabase, "_validate_dimension_compatibility"):
+            db = RAGDatabase(rag_dir=tempfile.mkdtemp())
+        db.rate_limit_delay = 0.25
+        bucket = db._get_embed_pipeline().bucket
+        # No burst: concurrent batches still start one delay apart.
+        self.assertEqual((bucket.rate, bucket.capacity), (4.0, 1.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+"""
+Tests for core/rag_store.py (segmented RAG persistence) and RAGDatabase's
+use of it: append-only saves, lazy embedding load, legacy JSON migration and
+background compaction.
+"""
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import core.rag_store as rag_store
+from core.rag_db import Chunk, RAGDatabase
+from core.rag_store import RAGSegmentStore
+
+
+def _chunk(cid, source="a.v", dim=4, seed=1.0):
+    return Chunk(
+        id=cid, source_file=source, category="verilog", level=1, chunk_type="module",
+        content=f"module {cid};", start_line=1, end_line=1,
+        embedding=[seed + i for i in range(dim)], metadata={"module_name": cid},
+    )
+
+
+class TestRAGSegmentStore(unittest.TestCase):
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.store = RAGSegmentStore(self.dir)
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_sync_appends_only_new_vectors(self):
+        chunks = {"c1": _chunk("c1"), "c2": _chunk("c2", seed=5.0)}
+        self.store.sync(chunks, {"a.v": "h1"})
+        size_after_first = self.store.vec_path.stat().st_size
+        self.assertEqual(size_after_first, 2 * 4 * 4)
+
+        # Re-saving the same chunks writes nothing new.
+        self.store.sync(chunks, {"a.v": "h1"})
+        self.assertEqual(self.store.vec_path.stat().st_size, size_after_first)
+
+        chunks["c3"] = _chunk("c3", seed=9.0)
+        self.store.sync(chunks, {"a.v": "h2"})
+        self.assertEqual(self.store.vec_path.stat().st_size, 3 * 4 * 4)
+
+    def test_reload_returns_metadata_without_embeddings(self):
+        self.store.sync({"c1": _chunk("c1", seed=2.0)}, {"a.v": "h1"}, embedding_model="m1")
+        self.store.close()
+        fresh = RAGSegmentStore(self.dir)
+        chunks = fresh.load_chunks()
+        self.assertIsNone(chunks["c1"]["embedding"])
+        self.assertEqual(chunks["c1"]["metadata"], {"module_name": "c1"})
+        self.assertEqual(fresh.load_file_hashes(), {"a.v": "h1"})
+        self.assertEqual(fresh.get_meta()["embedding_model"], "m1")
+        self.assertEqual(list(fresh.load_embeddings()["c1"]), [2.0, 3.0, 4.0, 5.0])
+        fresh.close()
+
+    def test_removed_chunks_are_deleted(self):
+        chunks = {"c1": _chunk("c1"), "c2": _chunk("c2")}
+        self.store.sync(chunks, {"a.v": "h1", "b.v": "h2"})
+        del chunks["c1"]
+        self.store.sync(chunks, {"b.v": "h2"})
+        self.assertEqual(set(self.store.load_chunks()), {"c2"})
+        self.assertEqual(self.store.load_file_hashes(), {"b.v": "h2"})
+        self.assertEqual(self.store.get_meta()["garbage_bytes"], 16)
+
+    def test_compaction_keeps_live_vectors(self):
+        chunks = {f"c{i}": _chunk(f"c{i}", seed=float(i)) for i in range(10)}
+        self.store.sync(chunks, {})
+        for i in range(0, 10, 2):
+            del chunks[f"c{i}"]
+        with patch.object(rag_store, "COMPACT_MIN_BYTES", 0):
+            self.store.sync(chunks, {})
+            self.store.wait_for_compaction(5)
+        self.assertEqual(self.store.vec_path.stat().st_size, 5 * 4 * 4)
+        self.assertEqual(self.store.get_meta()["garbage_bytes"], 0)
+        vectors = self.store.load_embeddings()
+        for i in range(1, 10, 2):
+            self.assertEqual(list(vectors[f"c{i}"]), [float(i + k) for k in range(4)])
+        # Only the active generation remains on disk.
+        self.assertEqual([p.name for p in self.dir.glob("rag_embeddings*.f32")], [self.store.vec_path.name])
+
+    def test_uncommitted_compaction_output_is_discarded(self):
+        self.store.sync({"c1": _chunk("c1", seed=3.0)}, {})
+        self.store.close()
+        # Simulate a crash after writing the new generation but before commit.
+        (self.dir / "rag_embeddings.1.f32").write_bytes(b"\0" * 16)
+        fresh = RAGSegmentStore(self.dir)
+        self.assertEqual(list(fresh.load_embeddings()["c1"]), [3.0, 4.0, 5.0, 6.0])
+        self.assertFalse((self.dir / "rag_embeddings.1.f32").exists())
+        fresh.close()
+
+
+    def test_second_store_follows_compaction_by_first(self):
+        # Two handles on one dir, as two session workers sharing ~/.rag.
+        other = RAGSegmentStore(self.dir)
+        self.addCleanup(other.close)
+        chunks = {f"c{i}": _chunk(f"c{i}", seed=float(i)) for i in range(10)}
+        self.store.sync(chunks, {})
+        other.load_chunks()
+        for i in range(0, 10, 2):
+            del chunks[f"c{i}"]
+        with patch.object(rag_store, "COMPACT_MIN_BYTES", 0):
+            self.store.sync(chunks, {})
+            self.store.wait_for_compaction(5)
+        self.assertNotEqual(self.store.vec_path.name, rag_store.EMBEDDINGS_FILE)
+
+        # The stale handle appends a new chunk after the other compacted.
+        mine = dict(chunks, c20=_chunk("c20", seed=90.0))
+        other.sync(mine, {})
+        self.assertEqual(other.vec_path, self.store.vec_path)
+        self.assertEqual(list(self.store.load_embeddings()["c20"]), [90.0, 91.0, 92.0, 93.0])
+        self.assertEqual(list(other.load_embeddings()["c3"]), [3.0, 4.0, 5.0, 6.0])
+
+    def test_sync_during_compaction_is_not_blocked_or_lost(self):
+        chunks = {f"c{i}": _chunk(f"c{i}", seed=float(i)) for i in range(10)}
+        self.store.sync(chunks, {})
+        for i in range(0, 10, 2):
+            del chunks[f"c{i}"]
+        self.store.sync(chunks, {})
+
+        real_open = open
+        appended = []
+
+        def slow_open(path, mode="r", *args, **kwargs):
+            # While the compactor copies (outside the lock), a save lands.
+            if mode == "wb" and str(path).endswith(".tmp") and not appended:
+                chunks["c11"] = _chunk("c11", seed=11.0)
+                self.store.sync(chunks, {})
+                appended.append(True)
+            return real_open(path, mode, *args, **kwargs)
+
+        with patch("builtins.open", slow_open):
+            self.store.compact()
+        self.assertEqual(appended, [True])
+        vectors = self.store.load_embeddings()
+        self.assertEqual(list(vectors["c11"]), [11.0, 12.0, 13.0, 14.0])
+        self.assertEqual(list(vectors["c7"]), [7.0, 8.0, 9.0, 10.0])
+        self.assertEqual(self.store.vec_path.stat().st_size, 6 * 4 * 4)
+
+
+class TestRAGDatabaseStore(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        patcher = patch.object(RAGDatabase, "_validate_dimension_compatibility")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_save_then_lazy_reload(self):
+        db = RAGDatabase(rag_dir=self.dir)
+        db.chunks = {"c1": _chunk("c1", seed=1.0), "c2": _chunk("c2", seed=-4.0)}
+        db.file_hashes = {"a.v": "h"}
+        db.save()
+
+        reopened = RAGDatabase(rag_dir=self.dir)
+        self.assertEqual(set(reopened.chunks), {"c1", "c2"})
+        self.assertIsNone(reopened.chunks["c1"].embedding)
+        self.assertEqual(reopened.file_hashes, {"a.v": "h"})
+
+        with patch.object(reopened, "_smart_reindex"), \
+             patch.object(reopened, "_expand_query_cognitively", side_effect=lambda q: q), \
+             patch.object(reopened, "_get_embedding", return_value=[1.0, 1.0, 1.0, 1.0]):
+            hits = reopened.search("x", limit=5)
+        self.assertEqual([c.id for _, c in hits], ["c1"])
+
+    def test_legacy_json_index_is_migrated(self):
+        import config
+        legacy = {
+            "chunks": {"c1": _chunk("c1").to_dict()},
+            "file_hashes": {"a.v": "h"},
+            "embedding_model": config.EMBEDDING_MODEL,
+        }
+        (Path(self.dir) / "rag_index.json").write_text(json.dumps(legacy), encoding="utf-8")
+        db = RAGDatabase(rag_dir=self.dir)
+        self.assertEqual(set(db.chunks), {"c1"})
+        self.assertEqual(db.file_hashes, {"a.v": "h"})
+        self.assertFalse((Path(self.dir) / "rag_index.json").exists())
+        self.assertTrue((Path(self.dir) / "rag_store.db").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
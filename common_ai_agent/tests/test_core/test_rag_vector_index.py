@@ -0,0 +1,191 @@
+"""
+Tests for core/rag_vector_index.py and its use by RAGDatabase.search.
+
+The index must rank exactly like the old per-chunk cosine loop (category /
+level filters, intent / importance / confidence boosts, score > 0 guard).
+"""
+import math
+import random
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from core.rag_db import Chunk, RAGDatabase
+from core.rag_vector_index import EmbeddingIndex
+
+
+def _cosine(v1, v2):
+    if len(v1) != len(v2):
+        return 0.0
+    dot = sum(a * b for a, b in zip(v1, v2))
+    na = math.sqrt(sum(a * a for a in v1))
+    nb = math.sqrt(sum(b * b for b in v2))
+    if na == 0 or nb == 0:
+        return 0.0
+    return dot / (na * nb)
+
+
+def _legacy_search(chunks, query, categories, limit, level=None, intent=None):
+    """Reference copy of the pre-index RAGDatabase.search scoring loop."""
+    intent = intent or {"preferred_type": None, "boost_factor": 1.0}
+    results = []
+    for chunk in chunks.values():
+        if chunk.category not in categories:
+            continue
+        if level is not None and chunk.level != level:
+            continue
+        score = _cosine(query, chunk.embedding or [])
+        if score > 0.0:
+            if intent["preferred_type"] and chunk.metadata.get("content_type") == intent["preferred_type"]:
+                score *= intent["boost_factor"]
+            importance = chunk.metadata.get("importance")
+            if importance == "critical":
+                score *= 1.3
+            elif importance == "important":
+                score *= 1.1
+            if chunk.metadata.get("classification_confidence", 1.0) < 0.7:
+                score *= 0.9
+            results.append((score, chunk))
+    results.sort(reverse=True, key=lambda x: x[0])
+    return results[:limit]
+
+
+def _make_chunks(n=200, dim=16, seed=7):
+    rng = random.Random(seed)
+    cats = ["verilog", "testbench", "spec"]
+    types = [None, "definition", "example", "table"]
+    chunks = {}
+    for i in range(n):
+        meta = {}
+        ctype = rng.choice(types)
+        if ctype:
+            meta["content_type"] = ctype
+            meta["importance"] = rng.choice(["critical", "important", "normal"])
+            meta["classification_confidence"] = rng.choice([0.5, 0.9])
+        cid = f"chunk_{i:04d}"
+        chunks[cid] = Chunk(
+            id=cid, source_file=f"f{i % 5}.v", category=rng.choice(cats),
+            level=rng.randint(1, 5), chunk_type="module", content=f"c{i}",
+            start_line=1, end_line=2,
+            embedding=[rng.uniform(-1, 1) for _ in range(dim)], metadata=meta,
+        )
+    return chunks
+
+
+class TestEmbeddingIndex(unittest.TestCase):
+    def setUp(self):
+        self.chunks = _make_chunks()
+        self.index = EmbeddingIndex.build(self.chunks)
+        self.query = [random.Random(1).uniform(-1, 1) for _ in range(16)]
+
+    def _assert_same(self, expected, got):
+        self.assertEqual([c.id for _, c in expected], [cid for _, cid in got])
+        for (s1, _), (s2, _) in zip(expected, got):
+            self.assertAlmostEqual(s1, s2, places=4)
+
+    def test_matches_legacy_loop_all_categories(self):
+        cats = ["verilog", "testbench", "spec"]
+        expected = _legacy_search(self.chunks, self.query, cats, 10)
+        self._assert_same(expected, self.index.search(self.query, cats, limit=10))
+
+    def test_category_and_level_filters(self):
+        expected = _legacy_search(self.chunks, self.query, ["spec"], 5, level=3)
+        got = self.index.search(self.query, ["spec"], limit=5, level=3)
+        self._assert_same(expected, got)
+        self.assertTrue(all(self.chunks[cid].category == "spec" and self.chunks[cid].level == 3
+                            for _, cid in got))
+
+    def test_intent_boost(self):
+        intent = {"preferred_type": "definition", "boost_factor": 2.0}
+        cats = ["verilog", "testbench", "spec"]
+        expected = _legacy_search(self.chunks, self.query, cats, 8, intent=intent)
+        got = self.index.search(self.query, cats, limit=8,
+                                preferred_type="definition", boost_factor=2.0)
+        self._assert_same(expected, got)
+
+    def test_only_positive_scores_returned(self):
+        got = self.index.search(self.query, ["verilog", "testbench", "spec"], limit=1000)
+        self.assertTrue(got)
+        self.assertTrue(all(score > 0 for score, _ in got))
+        self.assertLess(len(got), len(self.chunks))
+
+    def test_missing_or_mismatched_embeddings_are_skipped(self):
+        self.chunks["chunk_0000"].embedding = None
+        self.chunks["chunk_0001"].embedding = [1.0, 2.0]
+        self.chunks["chunk_0002"].embedding = [0.0] * 16
+        index = EmbeddingIndex.build(self.chunks)
+        ids = {cid for _, cid in index.search(self.query, ["verilog", "testbench", "spec"], limit=1000)}
+        self.assertFalse(ids & {"chunk_0000", "chunk_0001", "chunk_0002"})
+
+    def test_query_dimension_mismatch_returns_empty(self):
+        self.assertEqual(self.index.search([1.0, 0.0], ["spec"], limit=5), [])
+
+    def test_unknown_category_returns_empty(self):
+        self.assertEqual(self.index.search(self.query, ["nope"], limit=5), [])
+
+
+class TestRAGDatabaseSearchUsesIndex(unittest.TestCase):
+    def setUp(self):
+        self.db = RAGDatabase(rag_dir=tempfile.mkdtemp())
+        self.db.chunks = _make_chunks(n=50)
+        self.db._invalidate_vector_index()
+        self.query = [random.Random(3).uniform(-1, 1) for _ in range(16)]
+
+    def _search(self, **kwargs):
+        with patch.object(self.db, "_smart_reindex"), \
+             patch.object(self.db, "_expand_query_cognitively", side_effect=lambda q: q), \
+             patch.object(self.db, "_get_embedding", return_value=self.query):
+            return self.db.search("counter module", **kwargs)
+
+    def test_search_results_match_legacy(self):
+        expected = _legacy_search(self.db.chunks, self.query, ["verilog"], 5)
+        got = self._search(categories="verilog", limit=5)
+        self.assertEqual([c.id for _, c in expected], [c.id for _, c in got])
+
+    def test_index_rebuilt_after_chunk_change(self):
+        self._search(limit=3)
+        built = self.db._vector_index
+        self.assertIsNotNone(built)
+        self.db.clear()
+        self.assertIsNot(self.db._vector_index, built)
+        self.assertEqual(self._search(limit=3), [])
+
+    def test_reopened_instance_reads_vectors_from_store(self):
+        self.db.save()
+        with patch.object(RAGDatabase, "_validate_dimension_compatibility"):
+            reopened = RAGDatabase(rag_dir=str(self.db.rag_dir))
+        self.assertEqual(set(reopened.chunks), set(self.db.chunks))
+        index = reopened._get_vector_index()
+        # Vectors went into the matrix without being attached to chunks, and
+        # nothing besides the store's own sidecar was written.
+        self.assertTrue(all(c.embedding is None for c in reopened.chunks.values()))
+        self.assertEqual(sorted(p.name for p in Path(self.db.rag_dir).glob("*.f32")),
+                         ["rag_embeddings.f32"])
+        expected = _legacy_search(self.db.chunks, self.query, ["spec"], 5)
+        got = index.search(self.query, ["spec"], limit=5)
+        self.assertEqual([c.id for _, c in expected], [cid for _, cid in got])
+
+    def test_rebuild_reuses_rows_of_unchanged_chunks(self):
+        reference = {cid: Chunk(**{**c.__dict__}) for cid, c in self.db.chunks.items()}
+        self._search(limit=1)
+        # Drop every in-memory vector: the rebuild can only succeed by
+        # reusing the previous index's rows.
+        for chunk in self.db.chunks.values():
+            chunk.embedding = None
+        extra = Chunk(id="chunk_new", source_file="g.v", category="spec", level=1,
+                      chunk_type="module", content="new", start_line=1, end_line=1,
+                      embedding=list(self.query))
+        self.db.chunks["chunk_new"] = extra
+        reference["chunk_new"] = extra
+        self.db._invalidate_vector_index()
+        rebuilt = self.db._get_vector_index()
+        self.assertEqual(rebuilt.size, 51)
+        expected = _legacy_search(reference, self.query, ["spec"], 5)
+        got = rebuilt.search(self.query, ["spec"], limit=5)
+        self.assertEqual([c.id for _, c in expected], [cid for _, cid in got])
+        self.assertEqual(got[0][1], "chunk_new")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+Tests for stat-first change detection in RAGDatabase._smart_reindex and the
+optional inotify watcher (core/rag_watch.py).
+"""
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from core.rag_db import RAGDatabase
+from core.rag_watch import InotifyWatcher, file_stat
+
+
+def _open_db(rag_dir, project):
+    with patch.object(RAGDatabase, "_validate_dimension_compatibility"):
+        db = RAGDatabase(rag_dir=rag_dir)
+    db.project_root = project
+    return db
+
+
+class TestStatFirstReindex(unittest.TestCase):
+    def setUp(self):
+        self.project = Path(tempfile.mkdtemp()).resolve()
+        self.rag_dir = tempfile.mkdtemp()
+        self.files = []
+        for i in range(5):
+            path = self.project / f"spec{i}.md"
+            path.write_text(f"# Section {i}\n\nbody {i}\n")
+            self.files.append(path)
+        self.db = _open_db(self.rag_dir, self.project)
+        for path in self.files:
+            self.db.index_file(str(path), quiet=True, skip_embeddings=True)
+
+    def tearDown(self):
+        self.db.store.close()
+
+    def _reindex(self, db=None):
+        db = db or self.db
+        real_hash = RAGDatabase._get_file_hash
+        hashed = []
+
+        def counting_hash(inner_self, file_path):
+            hashed.append(Path(file_path).name)
+            return real_hash(inner_self, file_path)
+
+        with patch.object(RAGDatabase, "_get_file_hash", counting_hash), \
+             patch.object(RAGDatabase, "index_file", wraps=db.index_file) as index_file:
+            db._smart_reindex()
+        return hashed, index_file.call_count
+
+    def test_unchanged_files_are_not_read(self):
+        self.assertEqual(self._reindex(), ([], 0))
+
+    def test_touched_file_is_hashed_once_and_not_reindexed(self):
+        st = self.files[2].stat()
+        os.utime(self.files[2], ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000))
+        self.assertEqual(self._reindex(), (["spec2.md"], 0))
+        # The new stat was recorded, so the next search reads nothing.
+        self.assertEqual(self._reindex(), ([], 0))
+
+    def test_modified_file_is_reindexed(self):
+        self.files[1].write_text("# Section 1\n\nrewritten body, longer than before\n")
+        hashed, reindexed = self._reindex()
+        self.assertIn("spec1.md", hashed)
+        self.assertEqual(reindexed, 1)
+        chunks = [c for c in self.db.chunks.values() if c.source_file == "spec1.md"]
+        self.assertTrue(any("rewritten" in c.content for c in chunks))
+        self.assertEqual(self._reindex(), ([], 0))
+
+    def test_stats_survive_reopen(self):
+        reopened = _open_db(self.rag_dir, self.project)
+        try:
+            self.assertEqual(reopened.file_stats["spec0.md"], file_stat(self.files[0]))
+            self.assertEqual(self._reindex(reopened), ([], 0))
+        finally:
+            reopened.store.close()
+
+    def test_index_file_skips_unchanged_without_hashing(self):
+        with patch.object(RAGDatabase, "_get_file_hash") as get_hash:
+            self.assertEqual(self.db.index_file(str(self.files[0]), quiet=True, skip_embeddings=True), 0)
+        get_hash.assert_not_called()
+
+
+@unittest.skipUnless(InotifyWatcher.supported(), "inotify not available")
+class TestInotifyWatcher(unittest.TestCase):
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.path = self.dir / "top.v"
+        self.path.write_text("module top; endmodule\n")
+        self.watcher = InotifyWatcher()
+        self.watcher.watch([self.path])
+
+    def tearDown(self):
+        self.watcher.close()
+
+    def _wait_for(self, name, timeout=5.0):
+        seen = set()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            seen |= self.watcher.drain() or set()
+            if any(Path(p).name == name for p in seen):
+                return seen
+            time.sleep(0.02)
+        self.fail(f"no event for {name}; saw {seen}")
+
+    def test_first_drain_requests_full_rescan(self):
+        self.assertIsNone(self.watcher.drain())
+        self.assertEqual(self.watcher.drain(), set())
+
+    def test_write_is_reported(self):
+        self.watcher.drain()
+        self.path.write_text("module top(input clk); endmodule\n")
+        self.assertIn(str(self.path), self._wait_for("top.v"))
+
+    def test_atomic_replace_is_reported(self):
+        self.watcher.drain()
+        tmp = self.dir / "top.v.tmp"
+        tmp.write_text("module top2; endmodule\n")
+        os.replace(tmp, self.path)
+        self._wait_for("top.v")
+
+    def test_search_only_checks_reported_files(self):
+        project = self.dir.resolve()
+        other = project / "other.md"
+        other.write_text("# Other\n\ntext\n")
+        rag_dir = tempfile.mkdtemp()
+        db = _open_db(rag_dir, project)
+        try:
+            for path in (self.path, other):
+                db.index_file(str(path), quiet=True, skip_embeddings=True)
+            with patch("config.RAG_WATCH_FILES", True):
+                db._smart_reindex()  # first call: full stat sweep, starts watching
+            other.write_text("# Other\n\nchanged text\n")
+            deadline = time.monotonic() + 5.0
+            candidates = []
+            while time.monotonic() < deadline and "other.md" not in candidates:
+                time.sleep(0.02)
+                candidates += db._reindex_candidates()
+            self.assertIn("other.md", candidates)
+            self.assertNotIn("top.v", candidates)
+        finally:
+            if db._watcher:
+                db._watcher.close()
+            db.store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
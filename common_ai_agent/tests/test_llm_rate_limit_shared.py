@@ -0,0 +1,140 @@
+"""Host-wide rate limiting and the per-host connection pool in llm_client."""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import config
+import llm_client
+
+
+def _limiter(path, **kw):
+    kw.setdefault("window_s", 1.0)
+    return llm_client._SharedRateLimiter(path=str(path), scope="test", **kw)
+
+
+def _max_in_window(events, window):
+    """Largest token sum over any [t, t + window) span of (ts, tokens) events."""
+    events = sorted(events)
+    best, lo, total = 0, 0, 0
+    for ts, tokens in events:
+        total += tokens
+        while events[lo][0] <= ts - window:
+            total -= events[lo][1]
+            lo += 1
+        best = max(best, total)
+    return best
+
+
+def _child(path, deadline, out):
+    rl = _limiter(path, tpm=1000)
+    while True:
+        rl.acquire(100)
+        now = time.time()
+        if now >= deadline:
+            return
+        out.put((now, 100))
+
+
+def test_processes_share_one_tpm_budget(tmp_path):
+    ctx = multiprocessing.get_context("fork")
+    out = ctx.Queue()
+    deadline = time.time() + 3.0
+    procs = [ctx.Process(target=_child, args=(tmp_path / "rl.db", deadline, out)) for _ in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+    events = []
+    while not out.empty():
+        events.append(out.get())
+    assert _max_in_window(events, 1.0) <= 1000
+    # Three seconds of a 1000-tokens-per-second budget: close to the cap.
+    assert sum(t for _, t in events) >= 2500
+
+
+def test_actual_usage_replaces_the_estimate(tmp_path):
+    rl = _limiter(tmp_path / "rl.db", tpm=1000)
+    rl.acquire(100)
+    rl.update_actual_usage(700)
+    assert rl.status()["tokens_used"] == 700
+    start = time.time()
+    rl.acquire(400)  # 700 + 400 > 1000: waits for the first row to expire
+    assert time.time() - start >= 0.8
+    assert rl.status()["shared"] == str(tmp_path / "rl.db")
+
+
+def test_rpm_and_oversized_requests(tmp_path):
+    rl = _limiter(tmp_path / "rl.db", tpm=100, rpm=2, window_s=0.5)
+    start = time.time()
+    rl.acquire(5000)  # larger than the whole budget: runs on an empty window
+    assert time.time() - start < 0.2
+    rl.acquire(1)
+    assert time.time() - start >= 0.4
+
+
+def test_get_rate_limiter_picks_shared_when_configured(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_client, "_rate_limiter", None)
+    monkeypatch.setattr(config, "TPM_LIMIT", 1000)
+    monkeypatch.setattr(config, "RATE_LIMIT_SHARED", True)
+    monkeypatch.setattr(config, "RATE_LIMIT_DB_PATH", str(tmp_path / "rl.db"))
+    assert isinstance(llm_client.get_rate_limiter(), llm_client._SharedRateLimiter)
+    monkeypatch.setattr(llm_client, "_rate_limiter", None)
+    monkeypatch.setattr(config, "RATE_LIMIT_SHARED", False)
+    assert type(llm_client.get_rate_limiter()) is llm_client._RateLimiter
+
+
+@pytest.fixture()
+def server():
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.server.peers.add(self.client_address)
+            body = json.dumps({"choices": [{"message": {"content": "ok"}}],
+                               "usage": {"total_tokens": 10}}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    srv.peers = set()
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_concurrent_calls_lease_separate_pooled_connections(server, monkeypatch):
+    monkeypatch.setattr(config, "LLM_CONN_POOL_SIZE", 2)
+    host = f"127.0.0.1:{server.server_address[1]}"
+    url = f"http://{host}/v1/chat/completions"
+    monkeypatch.setitem(llm_client._http_conn_spares, host, [])
+    llm_client._http_conn_pool.pop(host, None)
+
+    first = llm_client._persistent_post(url, {}, b"{}", timeout=10)
+    second = llm_client._persistent_post(url, {}, b"{}", timeout=10)  # first still unread
+    third = llm_client._persistent_post(url, {}, b"{}", timeout=10)  # pool full: one-shot
+    for resp in (first, second, third):
+        assert json.loads(resp.read())["usage"]["total_tokens"] == 10
+    assert len(server.peers) == 3
+    assert len(llm_client._http_conn_spares[host]) == 1
+
+    for _ in range(4):
+        llm_client._persistent_post(url, {}, b"{}", timeout=10).read()
+        assert llm_client._last_post_reused
+    assert len(server.peers) == 3
+    for conn in [llm_client._http_conn_pool.pop(host), *llm_client._http_conn_spares[host]]:
+        conn.close()
@@ -0,0 +1,122 @@
+"""Queue doorbell: readers of session_queue wake on commit instead of polling."""
+
+from __future__ import annotations
+
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+
+import pytest
+
+from core import queue_doorbell
+from core.atlas_db import AtlasDB
+
+
+@pytest.fixture(autouse=True)
+def doorbell_dir(monkeypatch):
+    # Short path: AF_UNIX socket paths are limited to ~108 bytes.
+    root = tempfile.mkdtemp(prefix="dbell-")
+    monkeypatch.setenv("ATLAS_QUEUE_DOORBELL_DIR", root)
+    monkeypatch.delenv("ATLAS_QUEUE_DOORBELL", raising=False)
+    yield root
+    shutil.rmtree(root, ignore_errors=True)
+
+
+@pytest.fixture()
+def db(tmp_path):
+    return AtlasDB(db_path=str(tmp_path / "queue.db"))
+
+
+def test_ring_reaches_exact_and_direction_subscribers(db):
+    exact = queue_doorbell.listen()
+    exact.subscribe(db.db_path, "s1", "in")
+    every = queue_doorbell.listen()
+    every.subscribe_direction("out")
+
+    db.enqueue_message("s2", "in", "prompt", {})
+    assert exact.wait(0) == set()
+    db.enqueue_message("s1", "in", "prompt", {})
+    db.enqueue_message("s1", "out", "token", {})
+    db.enqueue_messages([{"session_id": s, "direction": "out", "msg_type": "t"}
+                         for s in ("s2", "s3", "s2")])
+    assert exact.wait(1) == {"s1"}
+    assert every.wait(1) == {"s1", "s2", "s3"}
+    exact.close()
+    every.close()
+
+
+def test_transaction_rings_after_commit_only(db):
+    listener = queue_doorbell.listen()
+    listener.subscribe(db.db_path, "s1", "in")
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.enqueue_message("s1", "in", "prompt", {})
+            raise RuntimeError("boom")
+    with db.transaction():
+        db.enqueue_message("s1", "in", "prompt", {})
+        assert listener.wait(0) == set()
+    assert listener.wait(1) == {"s1"}
+    listener.close()
+
+
+def test_dequeue_wakes_on_enqueue_not_on_fallback(db, monkeypatch):
+    monkeypatch.setattr(queue_doorbell, "FALLBACK_POLL_S", 30.0)
+    result = {}
+
+    def reader():
+        start = time.monotonic()
+        result["msg"] = db.dequeue_message("s1", "in", timeout=20)
+        result["waited"] = time.monotonic() - start
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    time.sleep(0.2)
+    db.enqueue_message("s1", "in", "prompt", {"text": "hi"})
+    thread.join(10)
+    assert result["msg"]["msg_type"] == "prompt"
+    assert result["waited"] < 5
+
+
+def test_dequeue_falls_back_to_polling_when_disabled(db, monkeypatch):
+    monkeypatch.setenv("ATLAS_QUEUE_DOORBELL", "false")
+    assert queue_doorbell.listen() is None
+    threading.Timer(0.1, db.enqueue_message, ("s1", "in", "prompt", {})).start()
+    assert db.dequeue_message("s1", "in", timeout=5)["msg_type"] == "prompt"
+
+
+def test_full_queue_reports_all(db):
+    listener = queue_doorbell.listen()
+    listener.subscribe_direction("out")
+    for i in range(200):
+        queue_doorbell.ring(db.db_path, f"s{i}", "out")
+    rung = listener.wait(1)
+    assert queue_doorbell.ALL in rung and len(rung) < 200
+    assert queue_doorbell.ALL not in listener.wait(0)
+    listener.close()
+
+
+def test_closed_and_dead_listeners_are_unsubscribed(db, doorbell_dir):
+    closed = queue_doorbell.listen()
+    closed.subscribe(db.db_path, "s1", "in")
+    closed.close()
+    dead = queue_doorbell.listen()
+    dead.subscribe(db.db_path, "s1", "in")
+    dead._sock.close()  # a crashed process leaves its files behind
+    queue_doorbell.ring(db.db_path, "s1", "in")
+    leftovers = [f for _, _, files in os.walk(doorbell_dir) for f in files]
+    assert leftovers == []
+
+
+def test_poke_wakes_without_a_ring():
+    listener = queue_doorbell.listen()
+    threading.Timer(0.05, listener.poke).start()
+    assert listener.wait(5) == {""}
+    listener.close()
+
+
+def test_datagram_sockets_unavailable_means_no_listener(monkeypatch):
+    monkeypatch.delattr(socket, "AF_UNIX")
+    assert queue_doorbell.listen() is None
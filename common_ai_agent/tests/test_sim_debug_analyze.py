@@ -127,6 +127,58 @@ def test_timeline_resolves_scope_and_refuses_ambiguous_leaf(tmp_path):
     assert tl.resolve_id("dout", scope="tb.top.u_other") == '"'
 
 
+def test_timeline_value_at_boundaries_and_compact_storage(tmp_path):
+    tl = vcd_timeline.load(_write_vcd(tmp_path))
+    vid = tl.resolve_id("en")
+    # int64 times + interned value codes, not per-change tuples
+    assert tl.times[vid].typecode == "q" and tl.codes[vid].typecode == "I"
+    assert list(tl.times[vid]) == [0, 10, 20]
+    assert tl.value_at("en", -1) is None
+    assert tl.value_at("en", 0) == "0"
+    assert tl.value_at("en", 9) == "0"
+    assert tl.value_at("en", 10) == "1"
+    assert tl.value_at("en", 10**12) == "0"
+    # '0' and '1' are shared by every scalar signal
+    assert len(tl._values) == 4
+    assert tl.changes[vid] == [(0, "0"), (10, "1"), (20, "0")]
+
+
+def test_timeline_edges_cached_per_kind(tmp_path):
+    tl = vcd_timeline.load(_write_vcd(tmp_path))
+    first = tl.edges("clk", "rising")
+    first.append(999)  # callers get a copy; the cache is unaffected
+    assert tl.edges("clk", "rising") == [5, 15]
+    assert tl.edges("clk", "falling") == [10, 20]
+    assert set(tl._edges_cache) == {(tl.resolve_id("clk"), "rising"), (tl.resolve_id("clk"), "falling")}
+
+
+def test_timeline_signal_filter_stores_only_requested(tmp_path):
+    tl = vcd_timeline.load(_write_vcd(tmp_path), signals=["top.en", "nope"])
+    en = tl.resolve_id("en")
+    assert tl.loaded == {en}
+    assert set(tl.times) == {en}
+    assert tl.edges("en", "rising") == [10]
+    # other signals still resolve by name but carry no samples
+    assert tl.resolve_id("clk") is not None
+    assert tl.value_at("clk", 5) is None and tl.edges("clk", "rising") == []
+    assert tl.time_range() == (0, 20)
+
+
+def test_timeline_multiline_header(tmp_path):
+    p = tmp_path / "ml.vcd"
+    p.write_text(
+        "$date\n  today\n$end\n$timescale\n  10ps\n$end\n"
+        "$scope module top $end\n$var wire 4 % bus [3:0] $end\n$upscope $end\n"
+        "$enddefinitions $end\n#0\n$dumpvars\nb0000 %\n$end\n"
+        "$comment 1% b1111 % $end\n#30\nb1x01 %\n",
+        encoding="utf-8",
+    )
+    tl = vcd_timeline.load(p)
+    assert tl.timescale == "ps"
+    assert tl.value_at("top.bus", 40) == "b1x01"
+    assert tl.edges("bus", "any") == [30]
+
+
 def test_analyze_find_and_value_synthetic(tmp_path, monkeypatch):
     monkeypatch.setenv("ATLAS_PROJECT_ROOT", str(tmp_path))
     sim = tmp_path / "IPS" / "sim"
@@ -0,0 +1,136 @@
+"""core.token_counter: offline tokenizers and the per-text count cache."""
+
+from __future__ import annotations
+
+import base64
+
+import pytest
+
+from core import token_counter
+from core.context_tracker import ContextTracker
+
+KOREAN = "안녕하세요. 오늘은 컨텍스트 압축 기능이 언제 동작하는지 설명하겠습니다."
+VERILOG = "always @(posedge clk) begin\n  if (!rst_n) cnt <= 8'h00;\n  else cnt <= cnt + 1'b1;\nend\n"
+JSON = '{"status": "ok", "items": [{"id": 12345, "name": "uart_tx"}, {"id": 7, "name": "fifo"}]}'
+ENGLISH = "The compressor summarizes older turns once the context crosses its threshold."
+
+
+class _Counting:
+    name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    def count(self, text):
+        self.calls += 1
+        return len(text)
+
+
+@pytest.fixture(autouse=True)
+def fresh(monkeypatch):
+    monkeypatch.delenv("TOKENIZER", raising=False)
+    monkeypatch.setenv("TOKENIZER_BPE_PATH", "/nonexistent/rank.tiktoken")
+    monkeypatch.setattr(token_counter, "_active", None)
+    token_counter.clear_cache()
+    yield
+    token_counter.clear_cache()
+
+
+def _rank_file(tmp_path, merges):
+    ranks = [bytes([b]) for b in range(256)] + [m.encode() for m in merges]
+    path = tmp_path / "tiny.tiktoken"
+    path.write_bytes(b"".join(base64.b64encode(t) + b" %d\n" % i for i, t in enumerate(ranks)))
+    return path
+
+
+def test_bpe_rank_file_is_merged_by_rank(tmp_path):
+    path = _rank_file(tmp_path, ["ab", "abc", " x", "cd"])
+    tok = token_counter.BPETokenizer(path)
+    assert tok.count("abc") == 1
+    assert tok.count("abcd") == 2       # "abc" + "d": "ab" outranks "cd"
+    assert tok.count("abc xyz") == 4    # "abc", " x", "y", "z"
+    assert tok.count("12345") == 5      # digits pre-split in groups of three
+    assert tok.count("가") == 3          # unmerged UTF-8 bytes
+
+
+def test_auto_uses_local_bpe_file_and_falls_back(tmp_path, monkeypatch):
+    assert token_counter.tokenizer_name() == "heuristic"
+    monkeypatch.setenv("TOKENIZER_BPE_PATH", str(_rank_file(tmp_path, ["ab"])))
+    assert token_counter.tokenizer_name() == "bpe"
+    monkeypatch.setenv("TOKENIZER", "chars4")
+    assert token_counter.count_text("x" * 40) == 10
+
+
+def test_heuristic_tracks_scripts_that_chars4_undercounts():
+    heuristic = token_counter.HeuristicTokenizer()
+    chars4 = token_counter.CharsTokenizer()
+    hangul = sum(1 for ch in KOREAN if "가" <= ch <= "힣")
+    assert heuristic.count(KOREAN) >= hangul > 3 * chars4.count(KOREAN)
+    # Punctuation-dense sources: well above len/4.
+    for text in (VERILOG, JSON):
+        assert heuristic.count(text) > 1.3 * chars4.count(text)
+    # English prose: about one token per word, plus a few for long words.
+    words = len(ENGLISH.split())
+    assert words <= heuristic.count(ENGLISH) <= 1.5 * words
+
+
+def test_heuristic_is_close_to_cl100k():
+    tiktoken = pytest.importorskip("tiktoken")
+    try:
+        enc = tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        pytest.skip("cl100k_base not available offline")
+    heuristic = token_counter.HeuristicTokenizer()
+    for text in (KOREAN, VERILOG, JSON, ENGLISH, "\n".join([KOREAN, VERILOG, JSON] * 5)):
+        actual = len(enc.encode_ordinary(text))
+        assert abs(token_counter.error_pct(heuristic.count(text), actual)) < 35, text
+
+
+def test_counts_are_cached_by_identity_and_content():
+    tok = _Counting()
+    token_counter.set_tokenizer(tok)
+    text = VERILOG * 4
+    assert token_counter.count_text(text) == len(text)
+    token_counter.count_text(text)
+    token_counter.count_text("".join(list(text)))  # equal copy, new object
+    assert tok.calls == 1
+
+
+def test_history_recount_only_counts_new_messages():
+    tok = _Counting()
+    token_counter.set_tokenizer(tok)
+    history = [{"role": "user" if i % 2 else "assistant", "content": f"{i} {KOREAN} {JSON}"}
+               for i in range(2000)]
+    tracker = ContextTracker(max_tokens=10_000_000)
+    tracker.update_messages(history)
+    assert tok.calls == 2000
+    first = tracker.messages_tokens
+
+    history.append({"role": "user", "content": "next turn " + VERILOG})
+    tracker.update_messages(history)
+    assert tok.calls == 2001
+    assert tracker.messages_tokens == first + len("next turn " + VERILOG)
+
+
+def test_message_counts_include_tool_calls_and_fixed_image_cost():
+    image = "data:image/png;base64," + "A" * 200_000
+    msg = {"role": "assistant", "content": [{"type": "text", "text": "see"},
+                                            {"type": "input_image", "image_url": image}],
+           "tool_calls": [{"function": {"name": "read_file", "arguments": '{"path": "rtl/top.sv"}'}}]}
+    total = token_counter.count_message(msg)
+    assert token_counter.IMAGE_TOKENS < total < token_counter.IMAGE_TOKENS + 40
+    inline = token_counter.count_content(f"look {image}")
+    assert inline == token_counter.IMAGE_TOKENS + token_counter.count_text("look ")
+
+
+def test_call_log_reports_estimate_error(capsys, monkeypatch):
+    import llm_client
+
+    monkeypatch.setattr(llm_client, "_call_log", [])
+    est = llm_client._estimate_request_tokens({"messages": [{"role": "user", "content": ENGLISH}]})
+    assert est == token_counter.count_text(ENGLISH) + 4 + 3
+    llm_client._record_call("main", "m", 100, 5, 0.1, 0.2, 0.3, 0.6, est_in_tok=112)
+    llm_client._record_call("main", "m", 100, 5, 0.1, 0.2, 0.3, 0.6, est_in_tok=92)
+    assert llm_client.get_call_log()[0].est_input_tokens == 112
+    llm_client.print_call_summary()
+    assert "10%" in capsys.readouterr().out
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO = Path(__file__).resolve().parents[1]
+if str(REPO) not in sys.path:
+    sys.path.insert(0, str(REPO))
+
+from core import vcd_index, vcd_timeline
+
+
+_VCD = """$timescale 1ns $end
+$scope module top $end
+$var wire 1 ! clk $end
+$var wire 1 " en $end
+$var wire 8 # data $end
+$upscope $end
+$scope module mirror $end
+$var wire 1 " en_alias $end
+$upscope $end
+$enddefinitions $end
+#0
+0!
+0"
+b00000000 #
+#5
+1!
+#10
+0!
+1"
+b00001010 #
+#15
+1!
+#20
+0"
+0!
+"""
+
+
+def _write_ip_vcd(tmp_path, text=_VCD) -> Path:
+    sim = tmp_path / "IPS" / "sim"
+    sim.mkdir(parents=True, exist_ok=True)
+    p = sim / "IPS.vcd"
+    p.write_text(text, encoding="utf-8")
+    return p
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache(monkeypatch):
+    monkeypatch.setattr(vcd_index, "_cache", vcd_index.TimelineCache(64 << 20))
+    monkeypatch.setattr(vcd_index, "stats", dict.fromkeys(vcd_index.stats, 0))
+
+
+def test_repeated_queries_parse_once(tmp_path, monkeypatch):
+    monkeypatch.setenv("ATLAS_PROJECT_ROOT", str(tmp_path))
+    _write_ip_vcd(tmp_path)
+    from core.sim_debug_analyze import find_event, signal_value
+
+    for _ in range(5):
+        assert find_event("IPS", "en", "rising", 1)["time"] == 10
+        assert signal_value("IPS", "data", 12)["value"] == "b00001010"
+    assert vcd_index.stats["parses"] == 1
+    assert vcd_index.stats["hits"] == 9
+
+
+def test_sidecar_lives_in_wave_cache_and_matches_parse(tmp_path):
+    vcd = _write_ip_vcd(tmp_path)
+    parsed = vcd_index.open_timeline(vcd)
+    sidecars = list((vcd.parent / ".wave_cache").glob("*.vcdidx"))
+    assert len(sidecars) == 1 and sidecars[0].name.startswith("IPS-")
+
+    st = vcd.stat()
+    tl = vcd_index.open_index(sidecars[0], st.st_size, st.st_mtime_ns)
+    assert tl is not None and not tl.times  # nothing loaded up front
+    assert tl.time_range() == parsed.time_range() and tl.timescale == "ns"
+    assert tl.value_at("data", 12) == "b00001010"
+    assert tl.value_at("en", -1) is None
+    assert not tl.times  # value_at read a page, not the signal
+    assert tl.edges("clk", "rising") == parsed.edges("clk", "rising") == [5, 15]
+    assert tl.resolve_id("mirror.en_alias") == parsed.resolve_id("en") == '"'
+    assert tl.changes == parsed.changes
+
+
+def test_new_process_opens_sidecar_without_parsing(tmp_path):
+    vcd = _write_ip_vcd(tmp_path)
+    vcd_index.open_timeline(vcd)
+    assert vcd_index.stats["parses"] == 1
+    code = (
+        "import json, sys; sys.path.insert(0, sys.argv[1]);"
+        "from core import vcd_index;"
+        "tl = vcd_index.open_timeline(sys.argv[2]);"
+        "print(json.dumps({'stats': vcd_index.stats, 'edges': tl.edges('en', 'rising')}))"
+    )
+    out = subprocess.run([sys.executable, "-c", code, str(REPO), str(vcd)],
+                         capture_output=True, text=True, check=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    assert result["edges"] == [10]
+    assert result["stats"]["parses"] == 0 and result["stats"]["index_opens"] == 1
+
+
+def test_changed_vcd_invalidates_memory_and_sidecar(tmp_path):
+    vcd = _write_ip_vcd(tmp_path)
+    assert vcd_index.open_timeline(vcd).edges("en", "rising") == [10]
+    vcd.write_text(_VCD.replace("#10\n0!\n1\"", "#10\n0!\n0\"").replace("#20\n0\"", "#20\n1\""),
+                   encoding="utf-8")
+    st = vcd.stat()
+    os.utime(vcd, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert vcd_index.open_timeline(vcd).edges("en", "rising") == [20]
+    assert vcd_index.stats["parses"] == 2
+    assert len(vcd_index.timeline_cache()) == 1  # the old version was dropped
+
+
+def test_lru_respects_memory_cap(tmp_path):
+    cache = vcd_index.TimelineCache(max_bytes=1)
+    a = _write_ip_vcd(tmp_path)
+    b = tmp_path / "other.vcd"
+    b.write_text(_VCD, encoding="utf-8")
+    cache.get(a, use_index=False)
+    cache.get(b, use_index=False)
+    assert len(cache) == 1  # the newest entry is always kept
+    cache.get(b, use_index=False)
+    assert vcd_index.stats["hits"] == 1 and vcd_index.stats["parses"] == 2
+
+
+def test_sidecar_value_at_across_pages(tmp_path):
+    n = vcd_index.PAGE * 2 + 37
+    lines = ["$scope module top $end", "$var wire 4 ! cnt $end", "$upscope $end",
+             "$enddefinitions $end"]
+    for i in range(n):
+        lines += [f"#{i * 3}", f"b{i % 16:04b} !"]
+    vcd = tmp_path / "long.vcd"
+    vcd.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    parsed = vcd_timeline.load(vcd)
+    out = tmp_path / "long.vcdidx"
+    st = vcd.stat()
+    vcd_index.write_index(parsed, out, st.st_size, st.st_mtime_ns)
+    tl = vcd_index.open_index(out, st.st_size, st.st_mtime_ns)
+    for t in (-1, 0, 1, 3 * vcd_index.PAGE - 1, 3 * vcd_index.PAGE, 3 * vcd_index.PAGE + 2,
+              3 * (n - 1), 10 ** 9):
+        assert tl.value_at("cnt", t) == parsed.value_at("cnt", t), t
+    assert vcd_index.open_index(out, st.st_size + 1, st.st_mtime_ns) is None
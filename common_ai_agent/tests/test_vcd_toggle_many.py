@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO = Path(__file__).resolve().parents[1]
+ADAPTERS = REPO / "workflow" / "coverage" / "adapters"
+
+
+def _load(name: str):
+    spec = importlib.util.spec_from_file_location(name, ADAPTERS / f"{name}.py")
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[name] = mod  # pool workers unpickle functions by module name
+    spec.loader.exec_module(mod)
+    return mod
+
+
+vcd_toggle = _load("vcd_toggle")
+vcd_merge = _load("vcd_merge")
+
+_HEADER = """$date today $end
+$timescale 1ns $end
+$scope module tb $end
+$var wire 1 ! clk $end
+$var wire 24 " bus [23:0] $end
+$var reg 4 # nib [3:0] $end
+$var real 64 $ temp $end
+$scope module dut $end
+$var wire 1 % en $end
+$var wire 1 ! clk_alias $end
+$var wire 3 & wide [2:0] $end
+$upscope $end
+$upscope $end
+$enddefinitions $end
+"""
+
+
+def _seed_dump(path: Path, seed: int) -> None:
+    rng = random.Random(seed)
+    lines = ["$dumpvars", "0!", "bx \"", "b0 #", "r0.5 $", "z%", "b000 &", "$end"]
+    for t in range(1, rng.randrange(5, 60)):
+        lines.append(f"#{t * 10}")
+        if rng.random() < 0.6:
+            lines.append(f"{t % 2}!")
+        if rng.random() < 0.1:
+            # one-hot writes, so bus coverage stays partial across seeds
+            lines.append(f"b{1 << rng.randrange(24):b} \"")
+        if rng.random() < 0.2:
+            lines.append(rng.choice(["b1x #", "bz #", "b10 #", "B1111 #", "b1-01 #"]))
+        if rng.random() < 0.2:
+            lines.append(f"{rng.choice('01xzX')}%")
+        if rng.random() < 0.15:
+            # scalar write to a vector: upper bits become unknown
+            lines.append(f"{rng.choice('01')}&" if rng.random() < 0.5 else f"b{rng.getrandbits(3):03b} &")
+        if rng.random() < 0.05:
+            lines.append("r1.25 $")
+    path.write_text(_HEADER + "\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _merged_nets(paths, tmp_path):
+    merged = tmp_path / "merged.vcd"
+    vcd_merge.merge_concat([str(p) for p in paths], str(merged))
+    return vcd_toggle.parse_vcd(str(merged))
+
+
+def _reference(paths, tmp_path):
+    return vcd_toggle.summarize(_merged_nets(paths, tmp_path))
+
+
+def _toggled(nets):
+    return {ident: [r > 0 and f > 0 for r, f in zip(n.rises, n.falls)] for ident, n in nets.items()}
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_matches_merge_then_parse(tmp_path, jobs):
+    paths = []
+    for seed in range(40):
+        paths.append(tmp_path / f"seed{seed:03d}.vcd")
+        _seed_dump(paths[-1], seed)
+    nets = vcd_toggle.toggle_many([str(p) for p in paths], jobs=jobs)
+    ref = _merged_nets(paths, tmp_path)
+    assert _toggled(nets) == _toggled(ref)
+    summary = vcd_toggle.summarize(nets)
+    assert summary == vcd_toggle.summarize(ref)
+    assert 0 < summary["toggled_bits"] < summary["total_bits"]
+    for one in paths[:5]:
+        assert vcd_toggle.summarize(vcd_toggle.toggle_many([str(one)])) == \
+            vcd_toggle.summarize(vcd_toggle.parse_vcd(str(one)))
+
+
+def test_transition_across_file_boundary(tmp_path):
+    a, b = tmp_path / "a.vcd", tmp_path / "b.vcd"
+    a.write_text(_HEADER + "#0\n1%\n#5\n0%\n", encoding="utf-8")
+    b.write_text(_HEADER + "#0\n1%\n", encoding="utf-8")
+    nets = vcd_toggle.toggle_many([str(a), str(b)], jobs=2)
+    assert nets["%"].toggled_bits() == 1  # the rise is b's first change
+    assert vcd_toggle.summarize(nets) == _reference([a, b], tmp_path)
+
+
+def test_rejects_different_duts(tmp_path):
+    a, b = tmp_path / "a.vcd", tmp_path / "b.vcd"
+    _seed_dump(a, 1)
+    b.write_text(_HEADER.replace("en $end", "enable $end") + "#0\n1%\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="var declarations differ"):
+        vcd_toggle.toggle_many([str(a), str(b)])
+    with pytest.raises(ValueError, match="missing \\$enddefinitions"):
+        (tmp_path / "bad.vcd").write_text("$scope module x $end\n", encoding="utf-8")
+        vcd_toggle.toggle_many([str(tmp_path / "bad.vcd")])
+
+
+def test_cli_json_for_several_inputs(tmp_path):
+    paths = []
+    for seed in range(3):
+        paths.append(tmp_path / f"s{seed}.vcd")
+        _seed_dump(paths[-1], seed)
+    out = subprocess.run(
+        [sys.executable, str(ADAPTERS / "vcd_toggle.py"), "--json", "-j", "2", *map(str, paths)],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    doc = json.loads(out)
+    ref = _reference(paths, tmp_path)
+    assert doc["inputs"] == [str(p) for p in paths]
+    assert (doc["total_bits"], doc["toggled_bits"], doc["pct"]) == \
+        (ref["total_bits"], ref["toggled_bits"], ref["pct"])
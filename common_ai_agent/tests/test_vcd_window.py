@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import json
+import random
+import sys
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+if str(REPO) not in sys.path:
+    sys.path.insert(0, str(REPO))
+
+from core import vcd_timeline, vcd_window
+
+
+def _generate(path: Path, cycles: int, seed: int = 0) -> None:
+    """clk toggles every 5; `bus` changes randomly (with some x); `rare` twice."""
+    rng = random.Random(seed)
+    lines = ["$timescale 1ps $end", "$scope module tb $end",
+             "$var wire 1 ! clk $end", "$var wire 8 \" bus [7:0] $end",
+             "$var wire 1 # rare $end", "$upscope $end", "$enddefinitions $end",
+             "#0", "0!", "b00000000 \"", "0#"]
+    for i in range(1, cycles):
+        lines += [f"#{i * 5}", f"{i % 2}!"]
+        if rng.random() < 0.3:
+            val = "bxxxxxxxx" if rng.random() < 0.05 else f"b{rng.getrandbits(8):08b}"
+            lines.append(f"{val} \"")
+        if i in (cycles // 3, 2 * cycles // 3):
+            lines.append(f"{int(i == cycles // 3)}#")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _brute_columns(tl, name, t0, t1, width):
+    """Reference decimation: per column n, min/max (incl. entering value), last."""
+    vid = tl.resolve_id(name)
+    times, codes = tl.times[vid], tl.codes[vid]
+    key = lambda code: vcd_window._numeric_key(tl._values[code])  # noqa: E731
+    span = t1 - t0 + 1
+    out = {}
+    for c in range(width):
+        lo_t = t0 + c * span // width
+        hi_t = t0 + (c + 1) * span // width if c < width - 1 else t1 + 1
+        a, b = bisect_left(times, lo_t), bisect_left(times, hi_t)
+        if b > a:
+            shown = [codes[i] for i in range(max(a - 1, 0), b)]
+            out[c] = (b - a, tl._values[min(shown, key=key)], tl._values[max(shown, key=key)],
+                      tl._values[codes[b - 1]])
+    return out
+
+
+def _decoded(reply, row):
+    values = reply["values"]
+    return {c: (n, values[lo], values[hi], values[last])
+            for c, n, lo, hi, last in zip(row["col"], row["n"], row["min"], row["max"], row["last"])}
+
+
+def test_sparse_window_is_exact(tmp_path):
+    p = tmp_path / "w.vcd"
+    _generate(p, 4000)
+    tl = vcd_timeline.load(p)
+    reply = vcd_window.query_window(tl, ["rare", "clk"], t0=100, t1=160, width=50)
+    rare, clk = reply["signals"]
+    values = reply["values"]
+    assert rare["t"] == [] and values[rare["initial"]] == "0"
+    # 13 clock edges in [100, 160] ≤ width → exact
+    assert not clk.get("decimated")
+    assert clk["t"] == list(range(100, 161, 5))
+    assert [values[v] for v in clk["v"]] == [str((t // 5) % 2) for t in clk["t"]]
+    assert values[clk["initial"]] == "1"  # clk at 95
+
+
+def test_dense_window_matches_brute_force(tmp_path):
+    p = tmp_path / "w.vcd"
+    _generate(p, 20000)
+    tl = vcd_timeline.load(p)
+    for t0, t1, width in ((0, tl.t_max, 300), (12345, 45678, 97), (0, tl.t_max, 1)):
+        reply = vcd_window.query_window(tl, ["clk", "tb.bus"], t0, t1, width)
+        for row, name in zip(reply["signals"], ("clk", "bus")):
+            assert row["decimated"]
+            assert _decoded(reply, row) == _brute_columns(tl, name, t0, t1, width)
+            assert sum(row["n"]) == len([t for t in tl.times[tl.resolve_id(name)] if t0 <= t <= t1])
+
+
+def test_unknown_values_surface_as_max(tmp_path):
+    p = tmp_path / "w.vcd"
+    _generate(p, 20000)
+    tl = vcd_timeline.load(p)
+    reply = vcd_window.query_window(tl, ["bus"], 0, tl.t_max, 10)
+    values = reply["values"]
+    row = reply["signals"][0]
+    assert any(values[m] == "bxxxxxxxx" for m in row["max"])
+    assert all("x" not in values[m] for m in row["min"])
+
+
+def test_reply_size_is_bounded_by_width(tmp_path):
+    p = tmp_path / "w.vcd"
+    _generate(p, 200000)
+    tl = vcd_timeline.load(p)
+    reply = vcd_window.query_window(tl, ["clk", "bus", "rare"], width=800)
+    body = json.dumps(reply, separators=(",", ":"))
+    assert len(body) < 100_000 < p.stat().st_size
+    assert all(len(r.get("col", r.get("t"))) <= 800 for r in reply["signals"])
+
+
+def test_pyramid_range_min_max():
+    rng = random.Random(7)
+    ranks = array("I", [rng.randrange(1000) for _ in range(50000)])
+    pyr = vcd_window._Pyramid(ranks)
+    assert len(pyr.mins) >= 3
+    for _ in range(300):
+        a = rng.randrange(len(ranks))
+        b = rng.randrange(a + 1, len(ranks) + 1)
+        assert pyr.min_max(a, b) == (min(ranks[a:b]), max(ranks[a:b]))
+
+
+def test_missing_signals_reported(tmp_path):
+    p = tmp_path / "w.vcd"
+    _generate(p, 100)
+    reply = vcd_window.query_window(vcd_timeline.load(p), ["nope", "clk"], width=10)
+    assert reply["missing"] == ["nope"]
+    assert [r["resolved"] for r in reply["signals"]] == ["tb.clk"]
@@ -10,6 +10,11 @@ Output:
   - text summary (default): prints overall % + per-scope breakdown
   - --json: emits a JSON object suitable for the Atlas UI panel to render
 
+Several VCDs (e.g. one per regression seed) are scored as if concatenated
+by vcd_merge.py, without writing the merged file: `toggle_many` streams
+each dump once across a process pool (--jobs) and ORs per-net toggle
+bitmaps.
+
 Why this exists alongside `verilator --coverage-toggle`:
   Verilator's instrumented toggle is fast and accurate but requires a
   verilator-friendly DUT (no inline #delays, no force/release, etc.).
@@ -31,8 +36,10 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
@@ -104,24 +111,10 @@ def _bin_decompose(value: str, width: int) -> List[Optional[str]]:
     return bits
 
 
-def parse_vcd(path: str) -> Dict[str, Net]:
-    """Parse a VCD file. Returns {ident: Net}."""
-    text = Path(path).read_text(encoding="utf-8", errors='replace')
+def _parse_header(header: str) -> Dict[str, Net]:
+    """Nets declared in a VCD header (`$scope` / `$upscope` / `$var`)."""
     nets: Dict[str, Net] = {}
     scope_stack: List[str] = []
-
-    if "$enddefinitions" not in text:
-        raise ValueError(f"{path}: missing $enddefinitions")
-
-    h_idx = text.index("$enddefinitions")
-    after = h_idx + len("$enddefinitions")
-    end_idx = text.index("$end", after)
-    header = text[:end_idx]
-    body = text[end_idx + len("$end"):].lstrip("\n")
-
-    # ── Parse header ──
-    # We track $scope / $upscope and $var lines.
-    i = 0
     tokens: List[str] = []
     for line in header.splitlines():
         for tok in line.split():
@@ -172,6 +165,23 @@ def parse_vcd(path: str) -> Dict[str, Net]:
             j += 1
             continue
         j += 1
+    return nets
+
+
+def parse_vcd(path: str) -> Dict[str, Net]:
+    """Parse a VCD file. Returns {ident: Net}."""
+    text = Path(path).read_text(encoding="utf-8", errors='replace')
+
+    if "$enddefinitions" not in text:
+        raise ValueError(f"{path}: missing $enddefinitions")
+
+    h_idx = text.index("$enddefinitions")
+    after = h_idx + len("$enddefinitions")
+    end_idx = text.index("$end", after)
+    header = text[:end_idx]
+    body = text[end_idx + len("$end"):].lstrip("\n")
+
+    nets = _parse_header(header)
 
     # ── Parse body ──
     # Lines: `#<time>` or `0!`, `1!`, `x!`, `z!`, `b<bits> <ident>`, `r<real> <ident>`.
@@ -241,28 +251,227 @@ def summarize(nets: Dict[str, Net]) -> dict:
     }
 
 
+# ── Many VCDs, one pass each ─────────────────────────────────────────
+# `toggle_many` gives the same nets (and so the same summarize() output) as
+# vcd_merge.merge_concat + parse_vcd, without writing the merged VCD and
+# with each dump streamed once by a pool worker.
+#
+# A net's current value is a pair of bitmasks (ones, zeros): bit i is in
+# `ones` when it is '1', in `zeros` when it is '0', in neither when x/z or
+# unknown. A rise is `old_zeros & new_ones`, a fall `old_ones & new_zeros`,
+# so a whole bus updates with a few int ops. A run of dumps reduces to, per
+# net: first value, last value, rise bitmap, fall bitmap — enough to chain
+# segments in order (the transition across a file boundary is last→first),
+# so workers take contiguous groups of files and the parent ORs the groups.
+
+_SCALAR = {"0": (0, 1), "1": (1, 0), "x": (0, 0), "z": (0, 0)}
+_ONES = str.maketrans("01xz", "0100")
+_ZEROS = str.maketrans("01xz", "1000")
+_KNOWN = str.maketrans("", "", "01xz")
+_READ_CHUNK = 8 << 20
+
+
+def _bits_mask(value: str, width: int) -> Tuple[int, int]:
+    """(ones, zeros) of a binary literal, padded/truncated like _bin_decompose."""
+    value = value.strip().lower() or "0"
+    msb = value[0] if value[0] in '01xz' else 'x'
+    pad = msb if msb in 'xz' else '0'
+    if len(value) < width:
+        value = pad * (width - len(value)) + value
+    elif len(value) > width:
+        value = value[-width:]
+    if value.translate(_KNOWN):
+        # Characters outside 01xz count as 'x' (neither mask).
+        value = "".join(c if c in '01xz' else 'x' for c in value)
+    return int(value.translate(_ONES) or "0", 2), int(value.translate(_ZEROS) or "0", 2)
+
+
+def _var_signature(header: str) -> str:
+    """Same DUT check as vcd_merge: sorted `type width ident name` of each $var."""
+    var_lines = []
+    for line in header.splitlines():
+        line = line.strip()
+        if line.startswith("$var "):
+            parts = line.split()
+            if len(parts) >= 5:
+                var_lines.append(" ".join(parts[1:5]))
+    return "\n".join(sorted(var_lines))
+
+
+def _open_vcd(path: str):
+    """Open *path* and read past the header. Returns (file, header, body head)."""
+    f = open(path, encoding="utf-8", errors='replace')
+    text = ""
+    while True:
+        chunk = f.read(_READ_CHUNK)
+        text += chunk
+        h_idx = text.find("$enddefinitions")
+        end_idx = text.find("$end", h_idx + len("$enddefinitions")) if h_idx >= 0 else -1
+        if end_idx >= 0:
+            return f, text[:end_idx], text[end_idx + len("$end"):]
+        if not chunk:
+            f.close()
+            raise ValueError(f"{path}: missing $enddefinitions")
+
+
+def _body_lines(f, head: str):
+    """Lines of the value-change section, read in large blocks."""
+    rest = head
+    while True:
+        chunk = f.read(_READ_CHUNK)
+        if not chunk:
+            yield rest.splitlines()
+            return
+        rest += chunk
+        cut = rest.rfind("\n") + 1
+        if cut:
+            yield rest[:cut].splitlines()
+            rest = rest[cut:]
+
+
+def _scan(path: str, widths: Dict[str, int]) -> Tuple[str, Dict[str, list]]:
+    """Stream one VCD → (var signature, {ident: [first, last, rises, falls]})."""
+    f, header, head = _open_vcd(path)
+    state: Dict[str, Optional[Tuple[int, int]]] = dict.fromkeys(widths)
+    first: Dict[str, Tuple[int, int]] = {}
+    rises: Dict[str, int] = {}
+    falls: Dict[str, int] = {}
+    scalar = _SCALAR
+    with f:
+        for lines in _body_lines(f, head):
+            for s in lines:
+                s = s.strip()
+                if not s:
+                    continue
+                c = s[0]
+                if c in "01xz":
+                    ident = s[1:].strip()
+                    new = scalar[c]
+                elif c == 'b' or c == 'B':
+                    try:
+                        value, ident = s[1:].split(None, 1)
+                    except ValueError:
+                        continue
+                    ident = ident.strip()
+                    if ident not in widths:
+                        continue
+                    new = _bits_mask(value, widths[ident])
+                else:
+                    continue  # `#time`, `$directive`, real values
+                try:
+                    old = state[ident]
+                except KeyError:
+                    continue
+                if old is None:
+                    first[ident] = new
+                elif old is not new:
+                    r = old[1] & new[0]
+                    if r:
+                        rises[ident] = rises.get(ident, 0) | r
+                    r = old[0] & new[1]
+                    if r:
+                        falls[ident] = falls.get(ident, 0) | r
+                state[ident] = new
+    return _var_signature(header), {
+        ident: [v, state[ident], rises.get(ident, 0), falls.get(ident, 0)]
+        for ident, v in first.items()
+    }
+
+
+def _chain(acc: Dict[str, list], part: Dict[str, list]) -> None:
+    """Append segment *part* after *acc* (in place)."""
+    for ident, (first, last, r, f) in part.items():
+        prev = acc.get(ident)
+        if prev is None:
+            acc[ident] = [first, last, r, f]
+            continue
+        p_ones, p_zeros = prev[1]
+        prev[1] = last
+        prev[2] |= r | (p_zeros & first[0])
+        prev[3] |= f | (p_ones & first[1])
+
+
+def _scan_group(paths: List[str], widths: Dict[str, int], signature: str) -> Dict[str, list]:
+    acc: Dict[str, list] = {}
+    for path in paths:
+        sig, part = _scan(path, widths)
+        if sig != signature:
+            raise ValueError(
+                f"var declarations differ between {path} and the first input "
+                f"— toggle merge assumes same DUT."
+            )
+        _chain(acc, part)
+    return acc
+
+
+def toggle_many(paths: List[str], jobs: Optional[int] = None) -> Dict[str, Net]:
+    """Toggle coverage over *paths* as one concatenated run. Returns {ident: Net}.
+
+    Equivalent to parse_vcd() of merge_concat(paths); `jobs` worker
+    processes (default: CPU count) each stream a contiguous group of files.
+    The returned nets carry 0/1 per-bit rise/fall flags rather than counts.
+    """
+    if not paths:
+        raise ValueError("no input VCDs provided")
+    for p in paths:
+        if not Path(p).exists():
+            raise FileNotFoundError(p)
+    f, header, _ = _open_vcd(paths[0])
+    f.close()
+    nets = _parse_header(header)
+    widths = {ident: net.width for ident, net in nets.items()}
+    signature = _var_signature(header)
+
+    jobs = max(1, jobs or os.cpu_count() or 1)
+    n_groups = min(len(paths), jobs * 4) if jobs > 1 else 1
+    size = -(-len(paths) // n_groups)
+    groups = [paths[k:k + size] for k in range(0, len(paths), size)]
+    if len(groups) == 1:
+        parts = [_scan_group(groups[0], widths, signature)]
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(groups))) as pool:
+            parts = list(pool.map(_scan_group, groups,
+                                  [widths] * len(groups), [signature] * len(groups)))
+    acc: Dict[str, list] = {}
+    for part in parts:
+        _chain(acc, part)
+
+    for ident, (_, (ones, zeros), r, f) in acc.items():
+        net = nets[ident]
+        bits = range(max(net.width, 0))
+        net.rises = [(r >> i) & 1 for i in bits]
+        net.falls = [(f >> i) & 1 for i in bits]
+        net.last = ['1' if (ones >> i) & 1 else '0' if (zeros >> i) & 1 else None for i in bits]
+    return nets
+
+
 def main(argv: List[str]) -> int:
     p = argparse.ArgumentParser(description="Extract toggle coverage from a VCD file.")
-    p.add_argument("vcd", help="Input VCD file")
+    p.add_argument("vcd", nargs="+",
+                   help="Input VCD file(s); several are scored as one concatenated run")
     p.add_argument("--json", action="store_true", help="Emit JSON instead of text summary")
     p.add_argument("--top", type=int, default=10, help="Show top-N worst-toggle scopes")
+    p.add_argument("--jobs", "-j", type=int, default=0,
+                   help="Worker processes for several VCDs (default: CPU count)")
     args = p.parse_args(argv)
 
-    if not Path(args.vcd).exists():
-        print(f"ERROR: {args.vcd} not found", file=sys.stderr)
-        return 1
+    for path in args.vcd:
+        if not Path(path).exists():
+            print(f"ERROR: {path} not found", file=sys.stderr)
+            return 1
 
     try:
-        nets = parse_vcd(args.vcd)
+        nets = toggle_many(args.vcd, jobs=args.jobs or None)
     except ValueError as e:
         print(f"ERROR: {e}", file=sys.stderr)
         return 1
 
     summary = summarize(nets)
+    label = args.vcd[0] if len(args.vcd) == 1 else f"{args.vcd[0]} (+{len(args.vcd) - 1} more)"
 
     if args.json:
         out = {
-            "vcd": args.vcd,
+            "vcd": label,
             "total_bits": summary["total_bits"],
             "toggled_bits": summary["toggled_bits"],
             "pct": summary["pct"],
@@ -278,11 +487,13 @@ def main(argv: List[str]) -> int:
                 for sc, s in summary["by_scope"].items()
             ],
         }
+        if len(args.vcd) > 1:
+            out["inputs"] = args.vcd
         print(json.dumps(out, indent=2))
         return 0
 
     # Text summary
-    print(f"=== VCD Toggle Coverage: {args.vcd} ===")
+    print(f"=== VCD Toggle Coverage: {label} ===")
     print(f"Nets         : {summary['nets']}")
     print(f"Total bits   : {summary['total_bits']}")
     print(f"Toggled bits : {summary['toggled_bits']}")
@@ -15,6 +15,10 @@ CLI / env contract preserved:
     insensitive), and resolve inside ``<DUT>/`` (else specific ERROR + 1).
   * Otherwise prefer ``<DUT>/cov/merged.vcd`` else first ``*.vcd`` (sorted).
     None ⇒ ERROR guidance + 1.
+  * ``--all`` scores every ``*.vcd`` under ``<DUT>/`` (except
+    ``cov/merged.vcd``) as one run, in sorted order — the same result as
+    /coverage-vcd-merge followed by this command, without writing the merged
+    VCD; ``--jobs N`` sets the adapter's worker processes.
   * Always write the JSON snapshot (``adapter --json --top N TARGET`` →
     ``<DUT>/cov/toggle.json``); then either cat the JSON (``--json``) or pretty
     print a text summary.
@@ -34,14 +38,18 @@ def _resolve(path: str) -> str:
     return str(Path(path).resolve())
 
 
-def _find_first_vcd(dut: str) -> str:
-    # find "${DUT}" -name "*.vcd" | sort  → first
+def _find_vcds(dut: str) -> "list[str]":
+    # find "${DUT}" -name "*.vcd" | sort
     results: "list[str]" = []
     for dirpath, _dirnames, filenames in os.walk(dut):
         for name in filenames:
             if name.endswith(".vcd"):
                 results.append(str(Path(dirpath) / name))
-    results.sort()
+    return sorted(results)
+
+
+def _find_first_vcd(dut: str) -> str:
+    results = _find_vcds(dut)
     return results[0] if results else ""
 
 
@@ -56,6 +64,8 @@ def main(argv: "list[str] | None" = None) -> int:
     want_json = False
     top = 10
     vcd_path = ""
+    use_all = False
+    jobs = ""
 
     i = 0
     while i < len(argv):
@@ -66,6 +76,12 @@ def main(argv: "list[str] | None" = None) -> int:
             i += 1
             if i < len(argv):
                 top = argv[i]
+        elif arg == "--all":
+            use_all = True
+        elif arg == "--jobs":
+            i += 1
+            if i < len(argv):
+                jobs = argv[i]
         elif arg == "--vcd":
             i += 1
             if i < len(argv):
@@ -83,7 +99,11 @@ def main(argv: "list[str] | None" = None) -> int:
         return 1
 
     target = ""
-    if vcd_path:
+    targets: "list[str]" = []
+    if use_all and not vcd_path:
+        targets = [p for p in _find_vcds(dut) if not p.endswith("/cov/merged.vcd")]
+        target = targets[0] if targets else ""
+    elif vcd_path:
         if not Path(vcd_path).is_file():
             print(f"ERROR: VCD not found: {vcd_path}")
             return 1
@@ -108,7 +128,10 @@ def main(argv: "list[str] | None" = None) -> int:
         print("  /coverage-vcd-merge to combine multiple VCDs.")
         return 1
 
-    print(f"VCD: {target}")
+    if len(targets) > 1:
+        print(f"VCD: {len(targets)} files under {dut}/ (scored as one run)")
+    else:
+        print(f"VCD: {target}")
     print("")
 
     cov_dir = Path(dut) / "cov"
@@ -118,7 +141,8 @@ def main(argv: "list[str] | None" = None) -> int:
     # python3 "${ADAPTER}" --json --top "${TOP}" "${TARGET}" > toggle.json
     with open(toggle_json_path, "w", encoding="utf-8") as handle:
         subprocess.run(
-            [sys.executable, str(adapter), "--json", "--top", str(top), target],
+            [sys.executable, str(adapter), "--json", "--top", str(top),
+             *(["--jobs", str(jobs)] if jobs else []), *(targets or [target])],
             stdout=handle,
         )
     print(f"JSON snapshot: {toggle_json_path}")